@@ -14,10 +14,9 @@ sys.path.insert(0, root_dir)
 
 from woodshed.modules.questions.main import (
     QuestionProcessingContext,
+    answer_with_related,
     create_openai_client,
-    generate_related_questions,
     get_config,
-    process_questions,
 )
 
 # Configure logging
@@ -101,11 +100,8 @@ async def process_question(
             stop_animation=dummy_stop_animation,
         )
 
-        # Process questions
-        results = []
-        related_questions = await generate_related_questions(context)
-        all_questions = [request.question] + related_questions
-        results = await process_questions(context, all_questions)
+        # Answer the question while its related questions are generated
+        results = await answer_with_related(context)
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
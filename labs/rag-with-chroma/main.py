@@ -3,15 +3,33 @@ This module provides a pipeline for processing documents using a retrieval-based
 question-answering system. It loads documents, splits them into chunks, creates
 a vector database, and retrieves answers to queries using a language model.
 
-Usage: from the project root, run `python labs/rag-with-chroma/main.py`
+The vector database is built once and persisted; later runs load it from
+disk and only embed the query. Pass --rebuild after changing the articles.
+
+Pass --rerank to over-fetch candidates and keep the best after reranking them
+with a local scorer.
+
+Usage: from the project root, run
+`python labs/rag-with-chroma/main.py [--rebuild] [--rerank]`
 """
 
+import sys
+from pathlib import Path
+
 from langchain.chains import RetrievalQA
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain_openai import OpenAI, OpenAIEmbeddings
 
+from woodshed.modules.langchain.embedding_cache import CachedEmbeddings
+from woodshed.modules.langchain.rerank import DEFAULT_FETCH_K, RerankingRetriever
+
+PERSIST_DIRECTORY = "tmp/rag-with-chroma"
+
+# Vector databases already opened in this process, by persist directory
+_vector_dbs = {}
+
 
 def load_documents(path):
     """
@@ -41,9 +59,9 @@ def split_documents(documents):
     return text_splitter.split_documents(documents)
 
 
-def create_vector_db(text, embedding, persist_directory="db"):
+def create_vector_db(text, embedding, persist_directory=PERSIST_DIRECTORY):
     """
-    Create a vector database from text documents using embeddings.
+    Create a vector database from text documents using embeddings and persist it.
 
     Args:
         text (list): A list of text documents.
@@ -53,37 +71,87 @@ def create_vector_db(text, embedding, persist_directory="db"):
     Returns:
         Chroma: A vector database object.
     """
-    vectordb = Chroma.from_documents(documents=text, embedding=embedding)
-    # Check if persistence is supported and handle accordingly
-    # vectordb.persist()  # Remove or replace this line if persistence is not supported
-    return vectordb
+    return Chroma.from_documents(
+        documents=text, embedding=embedding, persist_directory=str(persist_directory)
+    )
+
+
+def vector_db_exists(persist_directory=PERSIST_DIRECTORY):
+    """
+    Check whether a persisted vector database is present.
+
+    Args:
+        persist_directory (str): Directory where the vector database is stored.
+
+    Returns:
+        bool: True if the directory holds a Chroma database.
+    """
+    return (Path(persist_directory) / "chroma.sqlite3").exists()
+
+
+def load_vector_db(embedding, persist_directory=PERSIST_DIRECTORY):
+    """
+    Load a persisted vector database using the specified embedding function.
+
+    Args:
+        embedding: An embedding function to convert text into vectors.
+        persist_directory (str): Directory where the vector database is stored.
+
+    Returns:
+        Chroma: A vector database object.
+    """
+    return Chroma(
+        persist_directory=str(persist_directory), embedding_function=embedding
+    )
 
 
-def load_vector_db(embedding, persist_directory="db"):
+def get_vector_db(
+    articles_path, embedding, persist_directory=PERSIST_DIRECTORY, rebuild=False
+):
     """
-    Load a vector database using the specified embedding function.
+    Return the vector database, building it only when no persisted copy exists.
+
+    The first call in a process opens the persisted database; later calls
+    reuse the open one, so a query costs one query embedding plus the search.
 
     Args:
+        articles_path (str): The path to the directory containing text files.
         embedding: An embedding function to convert text into vectors.
         persist_directory (str): Directory where the vector database is stored.
+        rebuild (bool): Re-index the articles even if a database exists.
 
     Returns:
         Chroma: A vector database object.
     """
-    return Chroma(embedding_function=embedding)
+    key = str(Path(persist_directory).resolve())
+    if rebuild or not vector_db_exists(persist_directory):
+        _vector_dbs.pop(key, None)
+        if vector_db_exists(persist_directory):
+            load_vector_db(embedding, persist_directory).delete_collection()
+        documents = load_documents(articles_path)
+        text = split_documents(documents)
+        _vector_dbs[key] = create_vector_db(text, embedding, persist_directory)
+    elif key not in _vector_dbs:
+        _vector_dbs[key] = load_vector_db(embedding, persist_directory)
+    return _vector_dbs[key]
 
 
-def create_retriever(vectordb, k=2):
+def create_retriever(vectordb, k=2, rerank=False):
     """
     Create a retriever from the vector database.
 
     Args:
         vectordb (Chroma): A vector database object.
         k (int): The number of top results to retrieve.
+        rerank (bool): Retrieve DEFAULT_FETCH_K candidates and keep the k best
+                       after reranking them.
 
     Returns:
         Retriever: A retriever object for querying the vector database.
     """
+    if rerank:
+        candidates = vectordb.as_retriever(search_kwargs={"k": DEFAULT_FETCH_K})
+        return RerankingRetriever(retriever=candidates, k=k)
     return vectordb.as_retriever(search_kwargs={"k": k})
 
 
@@ -117,22 +185,28 @@ def process_llm_response(llm_response):
         print(source.metadata["source"])
 
 
-def pipeline(articles_path, query):
+def pipeline(
+    articles_path,
+    query,
+    persist_directory=PERSIST_DIRECTORY,
+    rebuild=False,
+    rerank=False,
+):
     """
     Execute the document processing and question-answering pipeline.
 
     Args:
-        lightning_path (str): The path to the directory containing text files.
+        articles_path (str): The path to the directory containing text files.
         query (str): The query to be answered by the language model.
+        persist_directory (str): Directory where the vector database is stored.
+        rebuild (bool): Re-index the articles even if a database exists.
+        rerank (bool): Rerank over-fetched candidates before answering.
     """
-    documents = load_documents(articles_path)
-    text = split_documents(documents)
+    # A rebuild of an unchanged corpus makes no embedding calls
+    embedding = CachedEmbeddings(OpenAIEmbeddings())
+    vectordb = get_vector_db(articles_path, embedding, persist_directory, rebuild)
 
-    embedding = OpenAIEmbeddings()
-    vectordb = create_vector_db(text, embedding)
-    vectordb = load_vector_db(embedding)
-
-    retriever = create_retriever(vectordb)
+    retriever = create_retriever(vectordb, rerank=rerank)
     qa_chain = create_qa_chain(retriever)
 
     llm_response = qa_chain.invoke(query)
@@ -145,7 +219,12 @@ def main():
     """
     articles_path = "data/input/articles"
     query = "How much money did Microsoft raise?"
-    pipeline(articles_path, query)
+    pipeline(
+        articles_path,
+        query,
+        rebuild="--rebuild" in sys.argv,
+        rerank="--rerank" in sys.argv,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""
+Asynchronous retrieval question answering for servers.
+
+query_service.process_query runs a RetrievalQA chain synchronously, which
+blocks an event loop such as FastAPI's for the whole retrieval and
+generation. AsyncQueryService holds one long-lived LLM client and
+retriever, awaits both steps, and bounds how many queries run at once with a
+semaphore. ``astream`` yields the sources as soon as retrieval finishes and
+then the answer token by token; the work runs in a separate task, so a
+client that stops reading does not keep its concurrency slot.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, List, NamedTuple, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.retrievers import BaseRetriever
+
+logger = logging.getLogger(__name__)
+
+# The prompt RetrievalQA uses for the "stuff" chain type
+QA_PROMPT = PromptTemplate.from_template(
+    "Use the following pieces of context to answer the question at the end. "
+    "If you don't know the answer, just say that you don't know, don't try to "
+    "make up an answer.\n\n{context}\n\nQuestion: {question}\nHelpful Answer:"
+)
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class QueryResult(NamedTuple):
+    """A generated answer and the sources of the chunks it was based on."""
+
+    answer: str
+    sources: List[str]
+
+
+class QueryEvent(NamedTuple):
+    """
+    One step of a streamed answer.
+
+    ``kind`` is "sources" (data: List[str]), "token" (data: str) or
+    "done" (data: QueryResult).
+    """
+
+    kind: str
+    data: object
+
+
+def format_documents(documents: Sequence[Document]) -> str:
+    """Join retrieved chunks into the context of the prompt."""
+    return "\n\n".join(doc.page_content for doc in documents)
+
+
+def document_sources(documents: Sequence[Document]) -> List[str]:
+    """The source of every retrieved chunk, in retrieval order."""
+    return [doc.metadata.get("source", "") for doc in documents]
+
+
+class AsyncQueryService:
+    """
+    Answer questions over a retriever without blocking the event loop.
+
+    Example:
+        service = AsyncQueryService(vectordb.as_retriever(search_kwargs={"k": 2}))
+        result = await service.aquery("Who did Databricks acquire?")
+        async for event in service.astream("Who did Databricks acquire?"):
+            ...
+    """
+
+    def __init__(
+        self,
+        retriever: BaseRetriever,
+        llm: Optional[BaseLanguageModel] = None,
+        prompt: PromptTemplate = QA_PROMPT,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if llm is None:
+            from langchain_openai import OpenAI
+
+            llm = OpenAI()
+        self.retriever = retriever
+        self.llm = llm
+        self.chain = prompt | llm | StrOutputParser()
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def aretrieve(self, query: str) -> List[Document]:
+        """Retrieve the chunks for a query."""
+        return await self.retriever.ainvoke(query)
+
+    async def aquery(self, query: str) -> QueryResult:
+        """
+        Answer a question.
+
+        Waits for a free slot when max_concurrency queries are already running.
+
+        Returns:
+            QueryResult: The answer and its sources.
+        """
+        async with self._semaphore:
+            documents = await self.aretrieve(query)
+            answer = await self.chain.ainvoke(
+                {"context": format_documents(documents), "question": query}
+            )
+        return QueryResult(answer, document_sources(documents))
+
+    async def astream(self, query: str) -> AsyncIterator[QueryEvent]:
+        """
+        Answer a question, yielding its sources and then its tokens as they arrive.
+
+        Retrieval and generation run in a producer task that holds the
+        concurrency slot and queues the events, so the slot is released when
+        the answer is complete even if the caller stops reading. Closing the
+        stream cancels the producer.
+
+        Yields:
+            QueryEvent: One "sources" event, a "token" event per generated
+            chunk of text and a final "done" event with the whole result.
+        """
+        queue: "asyncio.Queue[object]" = asyncio.Queue()
+        producer = asyncio.ensure_future(self._produce(query, queue))
+        try:
+            while True:
+                event = await queue.get()
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+                if event.kind == "done":
+                    return
+        finally:
+            producer.cancel()
+
+    async def _produce(self, query: str, queue: asyncio.Queue) -> None:
+        """Answer a question for astream, putting its events or error on a queue."""
+        try:
+            async with self._semaphore:
+                documents = await self.aretrieve(query)
+                sources = document_sources(documents)
+                queue.put_nowait(QueryEvent("sources", sources))
+                tokens = []
+                async for token in self.chain.astream(
+                    {"context": format_documents(documents), "question": query}
+                ):
+                    tokens.append(token)
+                    queue.put_nowait(QueryEvent("token", token))
+            queue.put_nowait(QueryEvent("done", QueryResult("".join(tokens), sources)))
+        except Exception as e:
+            queue.put_nowait(e)
+
+    async def aquery_many(
+        self, queries: Sequence[str], return_exceptions: bool = False
+    ) -> List[QueryResult]:
+        """
+        Answer many questions concurrently, at most max_concurrency at a time.
+
+        Args:
+            queries (Sequence[str]): The questions.
+            return_exceptions (bool): Put a failed query's exception in its
+                place instead of raising it.
+
+        Returns:
+            List[QueryResult]: One result per question, in input order.
+        """
+        results = await asyncio.gather(
+            *(self.aquery(query) for query in queries),
+            return_exceptions=return_exceptions,
+        )
+        for query, result in zip(queries, results):
+            if isinstance(result, Exception):
+                logger.error(f"Query failed: {query[:50]}: {result}")
+        return results
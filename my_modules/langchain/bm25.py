@@ -0,0 +1,298 @@
+"""
+Sparse keyword retrieval with BM25 over a compressed inverted index.
+
+Each term maps to a posting list of (document id, term frequency) pairs.
+Document ids are stored as gaps from the previous id and every number is
+written as a variable-length integer (varint), so the common small gaps and
+counts take one byte each. A query decodes only the lists of its own terms.
+
+HybridRetriever fuses BM25 results with a dense retriever by reciprocal rank
+fusion. When the BM25 ranking is decisive, as with exact lookups of names or
+ticker symbols, it answers from the sparse index alone and skips the dense
+retriever, and with it the embedding API call.
+"""
+
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+TOKEN_PATTERN = re.compile(r"\w+")
+RRF_K = 60  # Rank offset of reciprocal rank fusion
+BM25_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """Append a non-negative integer as a little-endian base-128 varint."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_postings(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode a posting list written by BM25Index.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Document ids and term frequencies.
+    """
+    data = np.frombuffer(bytes(data), dtype=np.uint8)
+    if len(data) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    # A byte below 0x80 ends a number; the others carry 7 more bits each
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    positions = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.int64) << (7 * positions)
+    pairs = np.add.reduceat(parts, starts).reshape(-1, 2)
+    return np.cumsum(pairs[:, 0]), pairs[:, 1]
+
+
+class BM25Index:
+    """
+    Okapi BM25 keyword search over an inverted index of varint posting lists.
+
+    Example:
+        index = BM25Index()
+        index.add(doc.page_content for doc in texts)
+        scores, ids = index.search("AAPL earnings", k=4)
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, bytearray] = {}
+        self.doc_freqs: Dict[str, int] = {}
+        self.doc_lengths: List[int] = []
+        self._last_ids: Dict[str, int] = {}  # Last document id of every list
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the posting lists."""
+        return sum(len(postings) for postings in self.postings.values())
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Index texts; their ids continue from the current size of the index."""
+        for text in texts:
+            doc_id = len(self.doc_lengths)
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, count in counts.items():
+                postings = self.postings.setdefault(term, bytearray())
+                encode_varint(doc_id - self._last_ids.get(term, 0), postings)
+                encode_varint(count, postings)
+                self._last_ids[term] = doc_id
+                self.doc_freqs[term] = self.doc_freqs.get(term, 0) + 1
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency of a term; 0 for unknown terms."""
+        df = self.doc_freqs.get(term, 0)
+        if df == 0:
+            return 0.0
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def score(self, query: str) -> np.ndarray:
+        """BM25 score of every document for a query; 0 where no term matches."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        if not len(self):
+            return scores
+        lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+        average = max(lengths.mean(), 1.0)
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            ids, tfs = decode_postings(self.postings[term])
+            norm = self.k1 * (1 - self.b + self.b * lengths[ids] / average)
+            scores[ids] += self.idf(term) * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k best matching documents for a query.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Scores and ids, best first. Only
+            documents matching at least one query term are returned.
+        """
+        scores = self.score(query)
+        matches = np.flatnonzero(scores)
+        order = np.argsort(-scores[matches], kind="stable")[:k]
+        return scores[matches[order]], matches[order]
+
+    def save(self, directory: Path) -> None:
+        """Write the index to a directory as one postings file and a term table."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        terms = {}
+        offset = 0
+        with open(directory / "postings.bin", "wb") as f:
+            for term, postings in self.postings.items():
+                f.write(postings)
+                terms[term] = [
+                    offset,
+                    len(postings),
+                    self.doc_freqs[term],
+                    self._last_ids[term],
+                ]
+                offset += len(postings)
+        with open(directory / "bm25.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": BM25_VERSION,
+                    "k1": self.k1,
+                    "b": self.b,
+                    "doc_lengths": self.doc_lengths,
+                    "terms": terms,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, directory: Path) -> "BM25Index":
+        """
+        Open an index written by save.
+
+        Raises:
+            ValueError: If the index was written by an unsupported version.
+        """
+        directory = Path(directory)
+        with open(directory / "bm25.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != BM25_VERSION:
+            raise ValueError(f"Unsupported BM25 index version in {directory}")
+        index = cls(meta["k1"], meta["b"])
+        index.doc_lengths = meta["doc_lengths"]
+        data = (directory / "postings.bin").read_bytes()
+        for term, (offset, length, df, last_id) in meta["terms"].items():
+            index.postings[term] = bytearray(data[offset : offset + length])
+            index.doc_freqs[term] = df
+            index._last_ids[term] = last_id
+        return index
+
+
+def _document_key(doc: Document) -> Tuple:
+    """Identify a chunk across retrievers that return separate Document copies."""
+    return (
+        doc.page_content,
+        doc.metadata.get("source"),
+        doc.metadata.get("start_index"),
+    )
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Combine BM25 keyword search with a dense retriever.
+
+    Both rankings are merged by reciprocal rank fusion. If the best BM25
+    score is at least ``confidence_ratio`` times the runner-up (or the only
+    match) and at least ``min_sparse_score``, the sparse results are returned
+    without querying the dense retriever.
+
+    Example:
+        retriever = HybridRetriever.from_documents(
+            texts, dense=vectordb.as_retriever(search_kwargs={"k": 4})
+        )
+        qa_chain = RetrievalQA.from_chain_type(llm, retriever=retriever)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    sparse: BM25Index
+    documents: List[Document]
+    dense: Optional[BaseRetriever] = None
+    k: int = 4
+    sparse_weight: float = 1.0
+    dense_weight: float = 1.0
+    confidence_ratio: Optional[float] = 2.0
+    min_sparse_score: float = 1.0
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[Document],
+        dense: Optional[BaseRetriever] = None,
+        k: int = 4,
+        **kwargs,
+    ) -> "HybridRetriever":
+        """
+        Build the BM25 index over the same chunks the dense retriever holds.
+
+        Args:
+            documents (List[Document]): The chunks to index.
+            dense (BaseRetriever, optional): Retriever to fuse with; BM25 only if None.
+            k (int): Number of documents returned per query.
+            **kwargs: Fusion and gating settings, such as confidence_ratio.
+
+        Returns:
+            HybridRetriever: The retriever over the new index.
+        """
+        sparse = BM25Index()
+        sparse.add(doc.page_content for doc in documents)
+        return cls(sparse=sparse, documents=documents, dense=dense, k=k, **kwargs)
+
+    def sparse_is_confident(self, scores: np.ndarray) -> bool:
+        """Whether a BM25 ranking is decisive enough to skip the dense retriever."""
+        if self.confidence_ratio is None or len(scores) == 0:
+            return False
+        if scores[0] < self.min_sparse_score:
+            return False
+        return len(scores) == 1 or scores[0] >= self.confidence_ratio * scores[1]
+
+    def _sparse_documents(self, scores: np.ndarray, ids: np.ndarray) -> List[Document]:
+        return [
+            Document(
+                page_content=self.documents[i].page_content,
+                metadata={**self.documents[i].metadata, "bm25_score": float(score)},
+            )
+            for score, i in zip(scores, ids)
+        ]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        scores, ids = self.sparse.search(query, self.k)
+        sparse_docs = self._sparse_documents(scores, ids)
+        if self.dense is None or self.sparse_is_confident(scores):
+            return sparse_docs
+
+        dense_docs = self.dense.invoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        fused: Dict[Tuple, float] = {}
+        chosen: Dict[Tuple, Document] = {}
+        for weight, docs in (
+            (self.sparse_weight, sparse_docs),
+            (self.dense_weight, dense_docs),
+        ):
+            for rank, doc in enumerate(docs):
+                key = _document_key(doc)
+                fused[key] = fused.get(key, 0.0) + weight / (RRF_K + rank + 1)
+                chosen.setdefault(key, doc)
+        best = sorted(fused, key=fused.get, reverse=True)[: self.k]
+        return [
+            Document(
+                page_content=chosen[key].page_content,
+                metadata={**chosen[key].metadata, "fusion_score": fused[key]},
+            )
+            for key in best
+        ]
@@ -0,0 +1,202 @@
+"""
+Pack retrieved chunks into a token budget before they are stuffed into a prompt.
+
+The "stuff" chain type concatenates every retrieved document, so large k or
+large chunks overflow the context window or pay for the same text twice
+(neighbouring chunks overlap by design). pack_documents:
+
+1. merges chunks of the same source that overlap or touch, using their
+   ``start_index`` metadata when the splitter recorded it and the overlapping
+   text itself otherwise, and drops chunks contained in another;
+2. orders the passages by retrieval score, best first;
+3. adds passages until the token budget is spent, trimming the last one at a
+   sentence boundary.
+
+ContextPackingRetriever applies it to any retriever, so it slots into
+RetrievalQA unchanged.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from woodshed.modules.text_processing.token_chunking import (
+    Tokenizer,
+    get_tokenizer,
+    split_sentences,
+)
+
+DEFAULT_MAX_TOKENS = 3000
+MIN_TEXT_OVERLAP = 20  # Shortest shared text that joins chunks without positions
+# Metadata keys holding a retrieval score, most specific first
+SCORE_KEYS = ("rerank_score", "fusion_score", "score", "bm25_score")
+
+
+class Passage:
+    """A span of one source built from one or more retrieved chunks."""
+
+    def __init__(self, doc: Document, score: float):
+        self.text = doc.page_content
+        self.metadata = dict(doc.metadata)
+        self.score = score
+        self.start = doc.metadata.get("start_index")
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+    def absorb_positioned(self, other: "Passage") -> bool:
+        """Merge a chunk that starts inside or right after this one."""
+        if other.start > self.end:
+            return False
+        self.text += other.text[self.end - other.start :]
+        self.score = max(self.score, other.score)
+        return True
+
+    def absorb_text(self, other: "Passage") -> bool:
+        """Merge a chunk whose text contains, is contained in or continues this one."""
+        if other.text in self.text:
+            merged = self.text
+        elif self.text in other.text:
+            merged = other.text
+        else:
+            overlap = _text_overlap(self.text, other.text)
+            if overlap >= MIN_TEXT_OVERLAP:
+                merged = self.text + other.text[overlap:]
+            else:
+                overlap = _text_overlap(other.text, self.text)
+                if overlap < MIN_TEXT_OVERLAP:
+                    return False
+                merged = other.text + self.text[overlap:]
+        self.text = merged
+        self.score = max(self.score, other.score)
+        return True
+
+    def to_document(self) -> Document:
+        return Document(
+            page_content=self.text, metadata={**self.metadata, "score": self.score}
+        )
+
+
+def _text_overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of ``first`` that is a prefix of ``second``."""
+    for length in range(min(len(first), len(second)), 0, -1):
+        if first.endswith(second[:length]):
+            return length
+    return 0
+
+
+def document_score(doc: Document, rank: int) -> float:
+    """A document's retrieval score, or one that keeps retrieval order if it has none."""
+    for key in SCORE_KEYS:
+        if key in doc.metadata:
+            return float(doc.metadata[key])
+    return 1.0 / (rank + 1)
+
+
+def merge_passages(documents: Sequence[Document]) -> List[Passage]:
+    """
+    Merge overlapping, adjacent and duplicate chunks of the same source.
+
+    Returns:
+        List[Passage]: The merged passages, in no particular order.
+    """
+    by_source: Dict[object, List[Passage]] = {}
+    for rank, doc in enumerate(documents):
+        passage = Passage(doc, document_score(doc, rank))
+        by_source.setdefault(doc.metadata.get("source"), []).append(passage)
+
+    merged: List[Passage] = []
+    for passages in by_source.values():
+        # Chunks with positions merge in document order
+        spans: List[Passage] = []
+        for passage in sorted(
+            (p for p in passages if p.start is not None), key=lambda p: p.start
+        ):
+            if not (spans and spans[-1].absorb_positioned(passage)):
+                spans.append(passage)
+        # The others are compared with every passage kept so far
+        unpositioned: List[Passage] = []
+        for passage in (p for p in passages if p.start is None):
+            if not any(kept.absorb_text(passage) for kept in unpositioned):
+                unpositioned.append(passage)
+        merged.extend(spans + unpositioned)
+    return merged
+
+
+def _trim_to_budget(text: str, budget: int, tokenizer: Tokenizer) -> str:
+    """Keep the leading sentences of a text that fit the budget; empty if none do."""
+    sentences = split_sentences(text)
+    kept: List[str] = []
+    used = 0
+    for sentence, tokens in zip(sentences, tokenizer.count_batch(sentences)):
+        if used + tokens > budget:
+            break
+        kept.append(sentence)
+        used += tokens + 1  # The joining space
+    return " ".join(kept)
+
+
+def pack_documents(
+    documents: Sequence[Document],
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    tokenizer: Optional[Tokenizer] = None,
+) -> List[Document]:
+    """
+    Merge, order and trim retrieved documents to fit a token budget.
+
+    Args:
+        documents (Sequence[Document]): Retrieved chunks, best first.
+        max_tokens (int): Token budget for the packed context.
+        tokenizer (Tokenizer, optional): Counts tokens; the shared default if None.
+
+    Returns:
+        List[Document]: Passages ordered by score, with a ``score`` in metadata,
+        whose texts together fit max_tokens.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    passages = sorted(merge_passages(documents), key=lambda p: p.score, reverse=True)
+    packed: List[Document] = []
+    remaining = max_tokens
+    for passage, tokens in zip(
+        passages, tokenizer.count_batch([p.text for p in passages])
+    ):
+        if tokens > remaining:
+            passage.text = _trim_to_budget(passage.text, remaining, tokenizer)
+            tokens = tokenizer.count(passage.text) if passage.text else 0
+            if not passage.text or tokens > remaining:
+                continue
+        packed.append(passage.to_document())
+        remaining -= tokens
+        if remaining <= 0:
+            break
+    return packed
+
+
+class ContextPackingRetriever(BaseRetriever):
+    """
+    Pack the documents of another retriever into a token budget.
+
+    Example:
+        retriever = ContextPackingRetriever(
+            retriever=vectordb.as_retriever(search_kwargs={"k": 8}), max_tokens=2000
+        )
+        qa_chain = RetrievalQA.from_chain_type(llm, retriever=retriever)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    tokenizer: str = "approx"  # A name accepted by get_tokenizer
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = self.retriever.invoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        return pack_documents(documents, self.max_tokens, get_tokenizer(self.tokenizer))
@@ -1,8 +1,17 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 
+from woodshed.modules.langchain.embedding_cache import CachedEmbeddings
+from woodshed.modules.langchain.embedding_executor import (
+    ExecutorEmbeddings,
+    StoreSink,
+    embed_into_store,
+)
+from woodshed.modules.text_processing.dedup import deduplicate
+
 
 def load_documents(path):
     loader = DirectoryLoader(path, glob="*.txt", loader_cls=TextLoader)
@@ -14,11 +23,69 @@ def split_text(documents):
     return text_splitter.split_documents(documents)
 
 
-def create_vectordb(texts, persist_directory):
-    embedding = OpenAIEmbeddings()
+def dedupe_documents(texts, threshold=0.8):
+    """
+    Collapse exact and near-duplicate chunks into their first occurrence.
+
+    The sources of the dropped copies are kept on the surviving chunk as a
+    comma separated ``duplicate_sources`` metadata value (Chroma metadata must
+    be scalar), so every source still resolves.
+    """
+    result = deduplicate([doc.page_content for doc in texts], threshold)
+    duplicate_sources = {}
+    for duplicate, original in result.canonical.items():
+        source = texts[duplicate].metadata.get("source")
+        if source and source != texts[original].metadata.get("source"):
+            duplicate_sources.setdefault(original, set()).add(source)
+
+    deduped = []
+    for i in result.kept:
+        doc = texts[i]
+        if i in duplicate_sources:
+            metadata = dict(
+                doc.metadata, duplicate_sources=",".join(sorted(duplicate_sources[i]))
+            )
+            doc = Document(page_content=doc.page_content, metadata=metadata)
+        deduped.append(doc)
+    return deduped
+
+
+def create_vectordb(
+    texts,
+    persist_directory,
+    dedup=False,
+    cache_embeddings=True,
+    embedding_executor=None,
+):
+    if dedup:
+        texts = dedupe_documents(texts)
+    if embedding_executor is not None:
+        # Batched, concurrent and rate limited instead of one blocking call
+        embedding = ExecutorEmbeddings(embedding_executor)
+    else:
+        embedding = OpenAIEmbeddings()
+    if cache_embeddings:
+        # Unchanged chunks are served from the local cache instead of the API
+        embedding = CachedEmbeddings(embedding)
     persist_directory_str = str(persist_directory)  # Convert PosixPath to string
-    vectordb = Chroma.from_documents(
-        documents=texts, embedding=embedding, persist_directory=persist_directory_str
-    )
+    if embedding_executor is not None:
+        # Every batch is written to the store as soon as it is embedded
+        vectordb = Chroma(
+            embedding_function=embedding, persist_directory=persist_directory_str
+        )
+        sink = StoreSink(
+            [doc.page_content for doc in texts],
+            [doc.metadata for doc in texts],
+            store=vectordb,
+        )
+        embed_into_store(
+            embedding_executor, sink, embedding.cache if cache_embeddings else None
+        )
+    else:
+        vectordb = Chroma.from_documents(
+            documents=texts,
+            embedding=embedding,
+            persist_directory=persist_directory_str,
+        )
     vectordb.persist()
     return vectordb
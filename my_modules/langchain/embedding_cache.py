@@ -0,0 +1,255 @@
+"""
+Persistent embedding cache keyed by model name and normalized text hash.
+
+Embeddings are stored as float32 blobs in a local SQLite database. Wrapping
+any LangChain embedding model in CachedEmbeddings means re-indexing an
+unchanged corpus makes no embedding calls at all, and an edited corpus only
+pays for the chunks whose text changed. The least recently used entries are
+evicted once the cache grows past ``max_entries``.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from woodshed.modules.langchain.config import config
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+
+def default_cache_path() -> Path:
+    """Location of the shared embedding cache inside the project tmp directory."""
+    return config.tmp_dir / "embedding_cache.sqlite3"
+
+
+def as_stored(vector: Sequence[float]) -> List[float]:
+    """A vector with the float32 precision the cache stores it at."""
+    return np.asarray(vector, dtype=np.float32).tolist()
+
+
+def text_key(text: str) -> bytes:
+    """Hash a text after collapsing whitespace, so reformatting keeps it cached."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    SQLite store of embedding vectors with least-recently-used eviction.
+
+    Example:
+        with EmbeddingCache(Path("tmp/embeddings.sqlite3")) as cache:
+            vectors = cache.get_many("text-embedding-3-small", texts)
+    """
+
+    def __init__(
+        self, path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.path = Path(path or default_cache_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (model, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._connection.commit()
+        # Kept up to date on every write so eviction needs no COUNT(*) scan
+        self._count = self._connection.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()[0]
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the cached embeddings of several texts.
+
+        Args:
+            model (str): Name of the embedding model.
+            texts (Sequence[str]): The texts to look up.
+
+        Returns:
+            List[Optional[List[float]]]: The vector of each text, or None when it is not cached.
+        """
+        keys = [text_key(text) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's limit on query parameters
+            for start in range(0, len(keys), 500):
+                batch = list(set(keys[start : start + 500]))
+                rows = self._connection.execute(
+                    "SELECT text_hash, vector FROM embeddings WHERE model = ?"
+                    f" AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time_ns()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in found],
+                )
+                self._connection.commit()
+        return [
+            (
+                np.frombuffer(found[key], dtype=np.float32).tolist()
+                if key in found
+                else None
+            )
+            for key in keys
+        ]
+
+    def put_many(
+        self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """
+        Store the embeddings of several texts, evicting old entries if the cache is full.
+
+        Args:
+            model (str): Name of the embedding model.
+            texts (Sequence[str]): The embedded texts.
+            vectors (Sequence[Sequence[float]]): The embedding of each text.
+        """
+        now = time.time_ns()
+        rows = [
+            (model, text_key(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            existing = self._existing_keys(model, [row[1] for row in rows])
+            inserted = self._connection.executemany(
+                "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)",
+                [row for row in rows if row[1] not in existing],
+            ).rowcount
+            if existing:
+                # Texts cached already get their vectors overwritten
+                self._connection.executemany(
+                    "UPDATE embeddings SET vector = ?, last_used = ?"
+                    " WHERE model = ? AND text_hash = ?",
+                    [
+                        (vector, used, model, key)
+                        for _, key, vector, used in rows
+                        if key in existing
+                    ],
+                )
+            self._count += inserted
+            self._evict()
+            self._connection.commit()
+
+    def _existing_keys(self, model: str, keys: List[bytes]) -> set:
+        """The keys among ``keys`` that are cached for a model."""
+        existing = set()
+        # Stay well below SQLite's limit on query parameters
+        for start in range(0, len(keys), 500):
+            batch = list(set(keys[start : start + 500]))
+            existing.update(
+                row[0]
+                for row in self._connection.execute(
+                    "SELECT text_hash FROM embeddings WHERE model = ?"
+                    f" AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                )
+            )
+        return existing
+
+    def _evict(self) -> None:
+        """Delete the least recently used entries beyond max_entries."""
+        excess = self._count - self.max_entries
+        if excess > 0:
+            self._count -= self._connection.execute(
+                "DELETE FROM embeddings WHERE (model, text_hash) IN"
+                " (SELECT model, text_hash FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            ).rowcount
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._connection.close()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain embeddings that consult an EmbeddingCache before calling the wrapped model.
+
+    Only texts missing from the cache are sent to the model, each distinct
+    text once per call. ``hits`` and ``misses`` count looked up texts.
+
+    Example:
+        embedding = CachedEmbeddings(OpenAIEmbeddings())
+        vectordb = Chroma.from_documents(documents=texts, embedding=embedding)
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: Optional[EmbeddingCache] = None,
+        model_name: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.model_name = model_name or getattr(
+            embeddings, "model", type(embeddings).__name__
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the wrapped model only for uncached ones."""
+        vectors = self.cache.get_many(self.model_name, texts)
+        missing = list(
+            dict.fromkeys(
+                text for text, vector in zip(texts, vectors) if vector is None
+            )
+        )
+        misses = sum(vector is None for vector in vectors)
+        self.misses += misses
+        self.hits += len(texts) - misses
+        if not missing:
+            return vectors
+
+        # Rounded like cached vectors, so a text embeds the same either way
+        computed = {
+            text: as_stored(vector)
+            for text, vector in zip(missing, self.embeddings.embed_documents(missing))
+        }
+        self.cache.put_many(self.model_name, missing, [computed[t] for t in missing])
+        return [
+            vector if vector is not None else list(computed[text])
+            for text, vector in zip(texts, vectors)
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing a cached vector when available."""
+        # Some models embed queries differently from documents
+        query_model = f"{self.model_name}:query"
+        cached = self.cache.get_many(query_model, [text])[0]
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        vector = as_stored(self.embeddings.embed_query(text))
+        self.cache.put_many(query_model, [text], [vector])
+        return vector
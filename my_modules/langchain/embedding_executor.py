@@ -0,0 +1,518 @@
+"""
+Batched, concurrent embedding with rate-limit-aware scheduling.
+
+Chunks are packed into batches that fit a token budget, and several batches
+are sent at once with asyncio. A shared limiter keeps the run inside the
+provider's requests-per-minute and tokens-per-minute budgets, failed requests
+are retried with exponential backoff and jitter (honouring Retry-After), and
+vectors are handed to an optional sink as soon as their batch arrives.
+
+StoreSink is a sink that adds every batch to a Chroma or FAISS store, and
+embed_into_store uses it to index texts while the rest of their batches are
+still in flight. HttpEmbeddingClient talks to any OpenAI-compatible
+``/embeddings`` endpoint using only the standard library. ExecutorEmbeddings
+exposes an executor as a LangChain Embeddings object, e.g. to embed queries.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from langchain_core.embeddings import Embeddings
+
+from woodshed.modules.langchain.embedding_cache import EmbeddingCache, as_stored
+from woodshed.modules.text_processing.token_chunking import Tokenizer, get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "text-embedding-3-small"
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+Sink = Callable[[List[int], List[List[float]]], Union[None, Awaitable[None]]]
+TextEmbeddings = List[Tuple[str, List[float]]]
+
+
+class EmbeddingRequestError(Exception):
+    """An embedding request failed; ``retryable`` tells whether trying again can help."""
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status in RETRYABLE_STATUSES
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait according to a Retry-After header.
+
+    The header holds either a number of seconds or an HTTP date. Values that
+    are neither are ignored.
+
+    Returns:
+        Optional[float]: The delay, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class EmbeddingClient(Protocol):
+    """Interface of the clients an EmbeddingExecutor sends batches to."""
+
+    async def embed(self, texts: List[str]) -> List[List[float]]: ...
+
+
+class HttpEmbeddingClient:
+    """
+    Client for OpenAI-compatible embedding endpoints built on urllib.
+
+    Requests run in a worker thread so several can be in flight at once.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        api_key: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 60.0,
+    ):
+        self.url = base_url.rstrip("/") + "/embeddings"
+        self.api_key = (
+            api_key if api_key is not None else os.getenv("OPENAI_API_KEY", "")
+        )
+        self.model = model
+        self.timeout = timeout
+
+    def _post(self, texts: List[str]) -> List[List[float]]:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"model": self.model, "input": texts}).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.load(response)
+        except urllib.error.HTTPError as e:
+            raise EmbeddingRequestError(
+                f"Embedding request failed with HTTP {e.code}",
+                status=e.code,
+                retry_after=parse_retry_after(
+                    e.headers.get("Retry-After") if e.headers else None
+                ),
+            ) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise EmbeddingRequestError(f"Embedding request failed: {e}") from e
+
+        data = sorted(payload["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts."""
+        return await asyncio.to_thread(self._post, texts)
+
+
+class TokenBucket:
+    """Budget that refills continuously up to ``per_minute`` units."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available; 0 if they are now."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Spend ``amount`` units; the budget goes negative for units reserved ahead."""
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Wait until both the request and token budgets allow another request.
+
+    Each request reserves its share of the budgets up front and then sleeps
+    until the reservation is covered, so callers are served in order. The
+    state is guarded by a thread lock rather than an asyncio lock, so one
+    limiter can be shared by calls running on different event loops.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        self._requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        """Reserve one request carrying ``tokens`` tokens, sleeping as long as needed."""
+        budgets = [
+            (b, n) for b, n in ((self._requests, 1), (self._tokens, tokens)) if b
+        ]
+        with self._lock:
+            wait = max((bucket.wait_time(n) for bucket, n in budgets), default=0.0)
+            for bucket, n in budgets:
+                bucket.take(n)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def make_batches(
+    token_counts: Sequence[int], max_batch_tokens: int, max_batch_size: int
+) -> List[List[int]]:
+    """
+    Group text indices into consecutive batches within a token and size budget.
+
+    A single text larger than the token budget gets a batch of its own.
+
+    Returns:
+        List[List[int]]: The indices of the texts in each batch.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if current and (
+            current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_size
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class EmbeddingExecutor:
+    """
+    Embed many texts through a client with batching, concurrency, rate limits and retries.
+
+    Example:
+        executor = EmbeddingExecutor(HttpEmbeddingClient(), requests_per_minute=3000)
+        vectors = executor.embed(texts, sink=lambda indices, vectors: ...)
+    """
+
+    def __init__(
+        self,
+        client: EmbeddingClient,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_batch_tokens: int = 8000,
+        max_batch_size: int = 256,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        tokenizer: Optional[Tokenizer] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.tokenizer = tokenizer or get_tokenizer()
+        # Shared by every call, so the budgets hold across calls and event loops
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+    @property
+    def model_name(self) -> str:
+        """Name of the client's model, as used for the embedding cache."""
+        return getattr(self.client, "model", type(self.client).__name__)
+
+    def _backoff(self, attempt: int, error: EmbeddingRequestError) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        return max(delay, error.retry_after or 0.0)
+
+    async def _embed_batch(
+        self,
+        texts: List[str],
+        tokens: int,
+        limiter: RateLimiter,
+        semaphore: asyncio.Semaphore,
+    ) -> List[List[float]]:
+        attempt = 0
+        while True:
+            async with semaphore:
+                await limiter.acquire(tokens)
+                try:
+                    vectors = await self.client.embed(texts)
+                except EmbeddingRequestError as e:
+                    if not e.retryable or attempt >= self.max_retries:
+                        raise
+                    delay = self._backoff(attempt, e)
+                    logger.warning(
+                        f"Embedding batch failed ({e}), retrying in {delay:.2f}s"
+                    )
+                else:
+                    if len(vectors) != len(texts):
+                        raise EmbeddingRequestError(
+                            f"Expected {len(texts)} embeddings, got {len(vectors)}"
+                        )
+                    return vectors
+            # Sleep outside the semaphore so other batches can use the slot
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aembed(
+        self, texts: Sequence[str], sink: Optional[Sink] = None
+    ) -> List[List[float]]:
+        """
+        Embed texts concurrently, returning the vectors in input order.
+
+        Args:
+            texts (Sequence[str]): The texts to embed.
+            sink (Sink, optional): Called with the input indices and vectors of
+                every batch as soon as it arrives, in completion order, e.g. to
+                write them to a store while other batches are in flight. May
+                be a coroutine function.
+
+        Returns:
+            List[List[float]]: One vector per text.
+
+        Raises:
+            EmbeddingRequestError: If a batch still fails after all retries.
+        """
+        texts = list(texts)
+        token_counts = self.tokenizer.count_batch(texts)
+        batches = make_batches(token_counts, self.max_batch_tokens, self.max_batch_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(indices: List[int]):
+            vectors = await self._embed_batch(
+                [texts[i] for i in indices],
+                sum(token_counts[i] for i in indices),
+                self.limiter,
+                semaphore,
+            )
+            return indices, vectors
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        tasks = [asyncio.ensure_future(run(indices)) for indices in batches]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                indices, vectors = await finished
+                for i, vector in zip(indices, vectors):
+                    results[i] = vector
+                if sink is not None:
+                    outcome = sink(indices, vectors)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
+
+    def embed(
+        self, texts: Sequence[str], sink: Optional[Sink] = None
+    ) -> List[List[float]]:
+        """Blocking version of aembed, for code that is not running an event loop."""
+        return asyncio.run(self.aembed(texts, sink))
+
+
+class ExecutorEmbeddings(Embeddings):
+    """
+    LangChain embeddings backed by an EmbeddingExecutor.
+
+    Example:
+        executor = EmbeddingExecutor(HttpEmbeddingClient(), max_concurrency=8)
+        vectordb = Chroma.from_documents(texts, embedding=ExecutorEmbeddings(executor))
+    """
+
+    def __init__(self, executor: EmbeddingExecutor):
+        self.executor = executor
+        self.model = executor.model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.executor.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.executor.embed([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.executor.aembed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.executor.aembed([text]))[0]
+
+
+def add_to_collection(
+    collection, text_embeddings: TextEmbeddings, metadatas: Optional[List[Dict]]
+) -> None:
+    """Upsert texts with precomputed vectors into a Chroma collection."""
+    ids = [str(uuid.uuid4()) for _ in text_embeddings]
+    texts = [text for text, _ in text_embeddings]
+    vectors = [vector for _, vector in text_embeddings]
+    metadatas = metadatas or [{}] * len(texts)
+    # Chroma rejects empty metadata, so rows without any are written separately
+    for has_metadata in (True, False):
+        rows = [
+            i for i, metadata in enumerate(metadatas) if bool(metadata) is has_metadata
+        ]
+        if not rows:
+            continue
+        collection.upsert(
+            ids=[ids[i] for i in rows],
+            embeddings=[vectors[i] for i in rows],
+            documents=[texts[i] for i in rows],
+            metadatas=[metadatas[i] for i in rows] if has_metadata else None,
+        )
+
+
+class StoreSink:
+    """
+    Sink that adds every batch of vectors to a LangChain vector store as it arrives.
+
+    FAISS and other stores with ``add_embeddings`` are written through it;
+    Chroma's ``add_texts`` always embeds the texts itself, so Chroma stores are
+    written through their collection. FAISS cannot be created empty, so when
+    ``store`` is None the first batch creates it with ``create_store``.
+
+    Example:
+        sink = StoreSink(chunks, create_store=lambda pairs, metadatas:
+            FAISS.from_embeddings(pairs, embedding, metadatas=metadatas))
+        executor.embed(chunks, sink=sink)
+        knowledge_base = sink.store
+    """
+
+    def __init__(
+        self,
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict]] = None,
+        store: Any = None,
+        create_store: Optional[
+            Callable[[TextEmbeddings, Optional[List[Dict]]], Any]
+        ] = None,
+    ):
+        if store is None and create_store is None:
+            raise ValueError("StoreSink needs a store or a create_store function")
+        self.texts = list(texts)
+        self.metadatas = list(metadatas) if metadatas is not None else None
+        self.store = store
+        self.create_store = create_store
+        self.written = 0
+
+    def write(self, indices: List[int], vectors: List[List[float]]) -> None:
+        """Add the texts at ``indices`` with their vectors to the store."""
+        pairs = [(self.texts[i], list(vector)) for i, vector in zip(indices, vectors)]
+        metadatas = (
+            [self.metadatas[i] for i in indices] if self.metadatas is not None else None
+        )
+        if self.store is None:
+            self.store = self.create_store(pairs, metadatas)
+        elif hasattr(self.store, "add_embeddings"):
+            self.store.add_embeddings(pairs, metadatas=metadatas)
+        else:
+            add_to_collection(self.store._collection, pairs, metadatas)
+        self.written += len(pairs)
+
+    async def __call__(self, indices: List[int], vectors: List[List[float]]) -> None:
+        # aembed awaits each write before the next, so the store sees one at a time
+        await asyncio.to_thread(self.write, indices, vectors)
+
+
+def embed_into_store(
+    executor: EmbeddingExecutor,
+    sink: StoreSink,
+    cache: Optional[EmbeddingCache] = None,
+) -> Any:
+    """
+    Embed the texts of a sink, writing every batch to its store as soon as it arrives.
+
+    With a cache, the cached vectors are written first and only the other
+    texts are sent to the executor; their vectors are cached batch by batch.
+
+    Args:
+        executor (EmbeddingExecutor): Executor that embeds the texts.
+        sink (StoreSink): Sink holding the texts and the store to write to.
+        cache (EmbeddingCache, optional): Cache consulted before embedding.
+
+    Returns:
+        The store, or None if there were no texts and the sink had no store.
+    """
+    texts = sink.texts
+    pending = list(range(len(texts)))
+    if cache is not None:
+        cached = cache.get_many(executor.model_name, texts)
+        hits = [i for i, vector in enumerate(cached) if vector is not None]
+        if hits:
+            sink.write(hits, [cached[i] for i in hits])
+        pending = [i for i, vector in enumerate(cached) if vector is None]
+
+    def write(indices: List[int], vectors: List[List[float]]) -> None:
+        originals = [pending[i] for i in indices]
+        if cache is not None:
+            # Rounded like cached vectors, so a text embeds the same either way
+            vectors = [as_stored(vector) for vector in vectors]
+            cache.put_many(executor.model_name, [texts[i] for i in originals], vectors)
+        sink.write(originals, vectors)
+
+    async def write_batch(indices: List[int], vectors: List[List[float]]) -> None:
+        await asyncio.to_thread(write, indices, vectors)
+
+    if pending:
+        executor.embed([texts[i] for i in pending], sink=write_batch)
+    return sink.store
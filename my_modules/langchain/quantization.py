@@ -0,0 +1,258 @@
+"""
+Vector quantizers for compressed index storage.
+
+ScalarQuantizer stores every dimension as one int8 with a per-dimension
+scale, a 4x saving over float32. ProductQuantizer splits vectors into ``m``
+subvectors and stores each as the one-byte id of its nearest k-means
+centroid, so a 1536-dimension vector takes ``m`` bytes instead of 6 KB.
+
+Both score queries with asymmetric distance computation: the query stays in
+float32 and is compared with the codes directly (through scaled int8 values
+or per-subspace lookup tables), so the stored vectors are never decompressed
+as a whole. The scores are approximate; vector_index.QuantizedIndex re-ranks
+the best candidates against the full-precision vectors.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+SCORE_BLOCK_ROWS = 65536  # Codes scored per block, to bound temporary memory
+TRAIN_POINTS_PER_CENTROID = 64  # Larger training sets are subsampled
+
+
+class ScalarQuantizer:
+    """
+    Symmetric int8 quantization with one scale per dimension.
+
+    Example:
+        quantizer = ScalarQuantizer(1536)
+        quantizer.train(vectors)
+        codes = quantizer.encode(vectors)
+        scores = quantizer.scores(queries, codes)
+    """
+
+    method = "int8"
+    code_dtype = np.int8
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.scales: Optional[np.ndarray] = None
+
+    @property
+    def trained(self) -> bool:
+        return self.scales is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the scales."""
+        return 0 if self.scales is None else self.scales.nbytes
+
+    def code_size(self) -> int:
+        """Bytes per encoded vector."""
+        return self.dim
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Fit the scale of every dimension to its largest absolute value."""
+        peaks = np.abs(np.asarray(vectors, dtype=np.float32)).max(axis=0)
+        self.scales = (np.where(peaks == 0, 1.0, peaks) / 127).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Quantize float vectors to int8 codes, shape (n, dim)."""
+        codes = np.rint(np.asarray(vectors, dtype=np.float32) / self.scales)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Approximate float vectors from their codes."""
+        return codes.astype(np.float32) * self.scales
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        Approximate dot products of float queries with encoded vectors.
+
+        Folding the scales into the queries leaves one product with the raw
+        codes, done block by block so only a slice is ever converted to float.
+
+        Returns:
+            np.ndarray: Scores of shape (queries, codes).
+        """
+        scaled = (queries * self.scales).T
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = codes[start : start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start : start + len(block)] = (block @ scaled).T
+        return scores
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Learned parameters, by file name, for saving."""
+        return {"scales.f32": self.scales}
+
+    def load_arrays(self, directory: Path, meta: dict) -> None:
+        """Read the parameters written from arrays."""
+        self.scales = np.fromfile(directory / "scales.f32", np.float32)
+
+    def settings(self) -> dict:
+        """Constructor settings to store with a saved index."""
+        return {}
+
+
+class ProductQuantizer:
+    """
+    Product quantization: each of ``m`` subvectors stored as a one-byte centroid id.
+
+    Example:
+        quantizer = ProductQuantizer(1536, m=96)
+        quantizer.train(vectors)
+        codes = quantizer.encode(vectors)
+        scores = quantizer.scores(queries, codes)
+    """
+
+    method = "pq"
+    code_dtype = np.uint8
+
+    def __init__(self, dim: int, m: int = 8, seed: int = 0):
+        if dim % m:
+            raise ValueError(f"Dimension {dim} is not divisible into {m} subvectors")
+        self.dim = dim
+        self.m = m
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None  # Shape (m, centroids, dim // m)
+
+    @property
+    def trained(self) -> bool:
+        return self.codebooks is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the codebooks."""
+        return 0 if self.codebooks is None else self.codebooks.nbytes
+
+    def code_size(self) -> int:
+        """Bytes per encoded vector."""
+        return self.m
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """Rearrange vectors as (m, n, dim // m) subvectors, contiguous per subspace."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        subvectors = vectors.reshape(len(vectors), self.m, -1).transpose(1, 0, 2)
+        return np.ascontiguousarray(subvectors)
+
+    def train(self, vectors: np.ndarray, iterations: int = 20) -> None:
+        """
+        Learn up to 256 centroids per subspace with k-means.
+
+        At most TRAIN_POINTS_PER_CENTROID points per centroid are used; more
+        slow training down without improving the codebooks noticeably.
+
+        Args:
+            vectors (np.ndarray): A representative sample of the vectors to encode.
+            iterations (int): Number of k-means iterations per subspace.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        count = min(256, len(vectors))
+        generator = np.random.default_rng(self.seed)
+        sample_size = count * TRAIN_POINTS_PER_CENTROID
+        if len(vectors) > sample_size:
+            vectors = vectors[
+                np.sort(generator.choice(len(vectors), sample_size, replace=False))
+            ]
+        subvectors = self._split(vectors)
+        codebooks = np.empty((self.m, count, subvectors.shape[2]), dtype=np.float32)
+        for j, points in enumerate(subvectors):
+            centroids = points[generator.choice(len(points), count, replace=False)]
+            for _ in range(iterations):
+                assignments = self._nearest(points, centroids)
+                sums = np.stack(
+                    [
+                        np.bincount(assignments, weights=column, minlength=count)
+                        for column in points.T
+                    ],
+                    axis=1,
+                )
+                sizes = np.bincount(assignments, minlength=count)
+                empty = sizes == 0
+                centroids = (sums / np.maximum(sizes, 1)[:, np.newaxis]).astype(
+                    np.float32
+                )
+                # Reseed empty clusters with random points
+                centroids[empty] = points[generator.choice(len(points), empty.sum())]
+            codebooks[j] = centroids
+        self.codebooks = codebooks
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Index of the closest centroid of every point by Euclidean distance."""
+        half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        return np.argmax(points @ centroids.T - half_norms, axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Quantize float vectors to centroid ids, shape (n, m)."""
+        subvectors = self._split(vectors)
+        codes = np.empty((subvectors.shape[1], self.m), dtype=np.uint8)
+        for j, points in enumerate(subvectors):
+            codes[:, j] = self._nearest(points, self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Approximate float vectors from their codes."""
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        Approximate dot products of float queries with encoded vectors.
+
+        Each query is compared once with every centroid of every subspace;
+        the score of a stored vector is then the sum of ``m`` table lookups.
+
+        Returns:
+            np.ndarray: Scores of shape (queries, codes).
+        """
+        # tables[j, q, c]: dot product of subvector j of query q with centroid c
+        tables = np.einsum("jqd,jcd->jqc", self._split(queries), self.codebooks)
+        scores = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            # One contiguous row of codes per subspace makes the lookups much faster
+            columns = np.ascontiguousarray(codes[start : start + SCORE_BLOCK_ROWS].T)
+            target = scores[:, start : start + columns.shape[1]]
+            for j in range(self.m):
+                target += np.take(tables[j], columns[j], axis=1)
+        return scores
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Learned parameters, by file name, for saving."""
+        return {"codebooks.f32": self.codebooks}
+
+    def load_arrays(self, directory: Path, meta: dict) -> None:
+        """Read the parameters written from arrays."""
+        self.codebooks = np.fromfile(directory / "codebooks.f32", np.float32).reshape(
+            self.m, meta["centroids"], self.dim // self.m
+        )
+
+    def settings(self) -> dict:
+        """Constructor settings to store with a saved index."""
+        return {"m": self.m, "seed": self.seed, "centroids": self.codebooks.shape[1]}
+
+
+QUANTIZERS = {
+    ScalarQuantizer.method: ScalarQuantizer,
+    ProductQuantizer.method: ProductQuantizer,
+}
+
+
+def make_quantizer(method: str, dim: int, **kwargs):
+    """
+    Create an untrained quantizer.
+
+    Args:
+        method (str): "int8" for scalar quantization or "pq" for product quantization.
+        dim (int): Dimension of the vectors.
+        **kwargs: Extra settings, such as m and seed for product quantization.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in QUANTIZERS:
+        raise ValueError(f"Unknown quantization method: {method}")
+    return QUANTIZERS[method](dim, **kwargs)
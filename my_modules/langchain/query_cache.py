@@ -0,0 +1,258 @@
+"""
+In-memory two-level cache for repeated questions.
+
+The first level maps normalized query text to its embedding, so asking the
+same question again makes no embedding call. The second maps (index
+version, query embedding, k) to the documents found, so it does not search
+again either. Both levels expire entries after a time-to-live and evict the
+least recently used ones past a size bound.
+
+A vector store's cached results are dropped whenever documents are added to
+or removed through its own methods (``add_texts``, ``add_documents``,
+``delete`` and their async and FAISS variants), which the cache wraps the
+first time it sees the store. Writes that bypass them, such as changes made
+by another process, need ``invalidate(store)``. A new store object never sees
+another store's results, and callers get copies of the cached documents.
+"""
+
+import functools
+import hashlib
+import inspect
+import itertools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+DEFAULT_TTL = 3600.0
+DEFAULT_MAX_EMBEDDINGS = 4096
+DEFAULT_MAX_RESULTS = 1024
+
+# Methods that change the contents of a vector store
+STORE_WRITE_METHODS = (
+    "add_texts",
+    "add_documents",
+    "add_embeddings",
+    "merge_from",
+    "delete",
+    "aadd_texts",
+    "aadd_documents",
+    "adelete",
+)
+
+
+def normalize_query(query: str) -> str:
+    """Casefold a query and collapse its whitespace, so trivial variants share an entry."""
+    return " ".join(query.split()).casefold()
+
+
+def copy_documents(documents: List[Document]) -> List[Document]:
+    """Deep copies of documents, so callers cannot change the cached ones."""
+    return [doc.model_copy(deep=True) for doc in documents]
+
+
+class TTLCache:
+    """
+    Thread-safe mapping with a time-to-live and least-recently-used eviction.
+
+    Example:
+        cache = TTLCache(max_entries=1024, ttl=600)
+        cache.put("key", value)
+        value = cache.get("key")
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: Optional[float] = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the live value of a key and mark it recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > self.clock()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries past max_entries."""
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class QueryCache:
+    """
+    Cache query embeddings and similarity search results for vector stores.
+
+    Example:
+        cache = QueryCache()
+        docs = cache.similarity_search(knowledge_base, "What is RAG?")
+        knowledge_base.add_texts(more_chunks)  # Drops the cached results
+    """
+
+    def __init__(
+        self,
+        max_embeddings: int = DEFAULT_MAX_EMBEDDINGS,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        ttl: Optional[float] = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.embeddings = TTLCache(max_embeddings, ttl, clock)
+        self.results = TTLCache(max_results, ttl, clock)
+        # Version token of every store seen; bumped by invalidate
+        self._versions: "weakref.WeakKeyDictionary[Any, int]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def index_version(self, store: VectorStore) -> int:
+        """Token identifying a store and its current contents, unique across stores."""
+        with self._lock:
+            if store not in self._versions:
+                self._versions[store] = next(self._counter)
+                self._watch(store)
+            return self._versions[store]
+
+    def _watch(self, store: VectorStore) -> None:
+        """Make the write methods of a store invalidate its cached results."""
+        cache = weakref.ref(self)
+
+        def invalidate():
+            if cache() is not None:
+                cache().invalidate(store)
+
+        for name in STORE_WRITE_METHODS:
+            method = getattr(store, name, None)
+            if method is None:
+                continue
+            if inspect.iscoroutinefunction(method):
+
+                @functools.wraps(method)
+                async def wrapper(*args, _method=method, **kwargs):
+                    try:
+                        return await _method(*args, **kwargs)
+                    finally:
+                        invalidate()
+
+            else:
+
+                @functools.wraps(method)
+                def wrapper(*args, _method=method, **kwargs):
+                    try:
+                        return _method(*args, **kwargs)
+                    finally:
+                        invalidate()
+
+            try:
+                setattr(store, name, wrapper)
+            except (AttributeError, TypeError, ValueError):
+                pass  # Stores that refuse new attributes need invalidate()
+
+    def invalidate(self, store: Optional[VectorStore] = None) -> None:
+        """
+        Forget cached results after an index changed.
+
+        Args:
+            store (VectorStore, optional): The store that changed. Its old
+                results can no longer be hit and age out of the cache. All
+                results are dropped if omitted.
+        """
+        if store is None:
+            self.results.clear()
+            return
+        with self._lock:
+            self._versions[store] = next(self._counter)
+
+    def embed_query(self, embedding: Embeddings, query: str) -> List[float]:
+        """Embed a query, or return its cached embedding."""
+        model = getattr(embedding, "model", type(embedding).__name__)
+        key = (model, normalize_query(query))
+        vector = self.embeddings.get(key)
+        if vector is None:
+            vector = embedding.embed_query(query)
+            self.embeddings.put(key, vector)
+        return vector
+
+    def similarity_search(
+        self, store: VectorStore, query: str, k: int = 4
+    ) -> List[Document]:
+        """
+        Search a vector store through both cache levels.
+
+        Args:
+            store (VectorStore): A store whose ``embeddings`` embed queries.
+            query (str): The question.
+            k (int): Number of documents to return.
+
+        Returns:
+            List[Document]: Copies of the documents the store returned.
+        """
+        vector = self.embed_query(store.embeddings, query)
+        digest = hashlib.sha256(np.asarray(vector, dtype=np.float32).tobytes())
+        key = (self.index_version(store), digest.digest(), k)
+        documents = self.results.get(key)
+        if documents is None:
+            documents = store.similarity_search_by_vector(vector, k=k)
+            self.results.put(key, copy_documents(documents))
+            return documents
+        return copy_documents(documents)
+
+    def as_retriever(self, store: VectorStore, k: int = 4) -> "CachedSearchRetriever":
+        """Wrap a store in a retriever that searches through this cache."""
+        return CachedSearchRetriever(store=store, cache=self, k=k)
+
+
+class CachedSearchRetriever(BaseRetriever):
+    """
+    Retriever that answers from a QueryCache before searching its vector store.
+
+    Example:
+        retriever = QueryCache().as_retriever(vectordb, k=2)
+        qa_chain = RetrievalQA.from_chain_type(llm, retriever=retriever)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    store: VectorStore
+    cache: QueryCache
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.cache.similarity_search(self.store, query, self.k)
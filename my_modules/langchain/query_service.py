@@ -1,9 +1,55 @@
+from typing import List, Optional
+
 from langchain.chains import RetrievalQA
+from langchain_core.documents import Document
 from langchain_openai import OpenAI
 
+from woodshed.modules.langchain.bm25 import HybridRetriever
+from woodshed.modules.langchain.context_packing import ContextPackingRetriever
+from woodshed.modules.langchain.query_cache import QueryCache
+from woodshed.modules.langchain.rerank import DEFAULT_FETCH_K, RerankingRetriever
+
+
+def create_qa_chain(
+    vectordb,
+    documents: Optional[List[Document]] = None,
+    cache: Optional[QueryCache] = None,
+    max_context_tokens: Optional[int] = None,
+    rerank: bool = False,
+):
+    """
+    Create a question answering chain over a vector store.
 
-def create_qa_chain(vectordb):
-    retriever = vectordb.as_retriever(search_kwargs={"k": 2})
+    Args:
+        vectordb: The vector store holding the embedded chunks.
+        documents (List[Document], optional): The same chunks; when given,
+            retrieval is hybrid BM25 + vector search, and keyword-heavy
+            queries are answered without embedding the query.
+        cache (QueryCache, optional): Cache of query embeddings and search
+            results for repeated questions. Writes through the store's own
+            methods drop its cached results; call ``cache.invalidate(vectordb)``
+            after changing it any other way.
+        max_context_tokens (int, optional): Token budget for the retrieved
+            context; overlapping chunks are merged and the rest trimmed to it.
+        rerank (bool): Fetch DEFAULT_FETCH_K candidates and keep the 2 best
+            after reranking them with a local scorer.
+    """
+    k = 2
+    fetch_k = DEFAULT_FETCH_K if rerank else k
+    if cache is not None:
+        retriever = cache.as_retriever(vectordb, k=fetch_k)
+    else:
+        retriever = vectordb.as_retriever(search_kwargs={"k": fetch_k})
+    if documents is not None:
+        retriever = HybridRetriever.from_documents(
+            documents, dense=retriever, k=fetch_k
+        )
+    if rerank:
+        retriever = RerankingRetriever(retriever=retriever, k=k)
+    if max_context_tokens is not None:
+        retriever = ContextPackingRetriever(
+            retriever=retriever, max_tokens=max_context_tokens
+        )
     return RetrievalQA.from_chain_type(
         llm=OpenAI(),
         chain_type="stuff",
@@ -0,0 +1,186 @@
+"""
+Rerank retrieved chunks with a local scorer before they reach the LLM.
+
+Approximate nearest-neighbour search is tuned for recall, not for the order
+of its top few results. RerankingRetriever over-fetches candidates from any
+retriever, scores each (query, chunk) pair with a cheap local scorer in
+batches, and keeps the best k, so fewer, better passages go into the prompt.
+
+Two scorers are provided. LexicalScorer needs nothing beyond the standard
+library: it rewards chunks that cover more of the query's words and its word
+pairs. CrossEncoderScorer runs a small sentence-transformers cross-encoder
+on the CPU when that package is installed. Scores are cached per
+(scorer, query, chunk) so repeated questions are not scored again.
+"""
+
+import hashlib
+import math
+from typing import List, Optional, Protocol, Sequence
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, Field
+
+from woodshed.modules.langchain.bm25 import tokenize
+from woodshed.modules.langchain.query_cache import TTLCache, normalize_query
+
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_CACHE_ENTRIES = 100_000
+DEFAULT_FETCH_K = 20
+# Words too common to say anything about relevance
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that "
+    "the this to was were what when where which who why will with".split()
+)
+
+
+class Scorer(Protocol):
+    """Interface of the relevance scorers used by Reranker."""
+
+    name: str
+
+    def score_batch(self, query: str, texts: Sequence[str]) -> List[float]: ...
+
+
+class LexicalScorer:
+    """
+    Score chunks by how much of the query's vocabulary they contain.
+
+    A chunk earns ``1 + log(tf)`` for every distinct query word it contains
+    and ``bigram_weight`` for every query word pair that appears in it in
+    order, normalized by the number of query words.
+    """
+
+    name = "lexical"
+
+    def __init__(self, bigram_weight: float = 0.5):
+        self.bigram_weight = bigram_weight
+
+    def score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        terms = [t for t in tokenize(query) if t not in STOPWORDS] or tokenize(query)
+        unique_terms = set(terms)
+        bigrams = set(zip(terms, terms[1:]))
+        scores = []
+        for text in texts:
+            tokens = [t for t in tokenize(text) if t not in STOPWORDS]
+            counts = {}
+            for token in tokens:
+                if token in unique_terms:
+                    counts[token] = counts.get(token, 0) + 1
+            score = sum(1 + math.log(count) for count in counts.values())
+            if bigrams:
+                present = bigrams.intersection(zip(tokens, tokens[1:]))
+                score += self.bigram_weight * len(present)
+            scores.append(score / max(len(unique_terms), 1))
+        return scores
+
+
+class CrossEncoderScorer:
+    """
+    Score (query, chunk) pairs with a sentence-transformers cross-encoder on the CPU.
+
+    Raises:
+        ImportError: If sentence-transformers is not installed.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_CROSS_ENCODER, device: str = "cpu"):
+        from sentence_transformers import CrossEncoder
+
+        self.name = model_name
+        self.model = CrossEncoder(model_name, device=device)
+
+    def score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        scores = self.model.predict([(query, text) for text in texts])
+        return [float(score) for score in scores]
+
+
+def _pair_key(scorer: Scorer, query: str, text: str) -> tuple:
+    return (
+        scorer.name,
+        normalize_query(query),
+        hashlib.sha256(text.encode("utf-8")).digest(),
+    )
+
+
+class Reranker:
+    """
+    Order documents by a scorer, batching calls and caching scores.
+
+    Example:
+        reranker = Reranker(LexicalScorer())
+        best = reranker.rerank("Who did Databricks acquire?", candidates, top_n=2)
+    """
+
+    def __init__(
+        self,
+        scorer: Optional[Scorer] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        cache: Optional[TTLCache] = None,
+    ):
+        self.scorer = scorer or LexicalScorer()
+        self.batch_size = batch_size
+        self.cache = (
+            cache if cache is not None else TTLCache(DEFAULT_CACHE_ENTRIES, ttl=None)
+        )
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        """Score texts against a query, computing only pairs missing from the cache."""
+        keys = [_pair_key(self.scorer, query, text) for text in texts]
+        scores = [self.cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start : start + self.batch_size]
+            computed = self.scorer.score_batch(query, [texts[i] for i in batch])
+            for i, score in zip(batch, computed):
+                scores[i] = score
+                self.cache.put(keys[i], score)
+        return scores
+
+    def rerank(
+        self, query: str, documents: Sequence[Document], top_n: Optional[int] = None
+    ) -> List[Document]:
+        """
+        Return the documents best first, with their score as ``rerank_score``.
+
+        Ties keep the retrieval order.
+        """
+        scores = self.score(query, [doc.page_content for doc in documents])
+        order = sorted(range(len(documents)), key=lambda i: -scores[i])[:top_n]
+        return [
+            Document(
+                page_content=documents[i].page_content,
+                metadata={**documents[i].metadata, "rerank_score": scores[i]},
+            )
+            for i in order
+        ]
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Over-fetch candidates from a retriever and keep the k best after reranking.
+
+    The wrapped retriever should return more than k documents, e.g.
+    ``vectordb.as_retriever(search_kwargs={"k": 20})``.
+
+    Example:
+        retriever = RerankingRetriever(
+            retriever=vectordb.as_retriever(search_kwargs={"k": 20}), k=2
+        )
+        qa_chain = RetrievalQA.from_chain_type(llm, retriever=retriever)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    reranker: Reranker = Field(default_factory=Reranker)
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        candidates = self.retriever.invoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+        return self.reranker.rerank(query, candidates, self.k)
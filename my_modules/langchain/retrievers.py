@@ -0,0 +1,105 @@
+"""
+LangChain retriever adapters for the project's own search indexes.
+
+VectorIndexRetriever answers queries from any vector_index index and a
+parallel list of documents, and can be saved to and loaded from a directory
+so an index is built once and reopened without re-embedding.
+"""
+
+import json
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from woodshed.modules.langchain.vector_index import VectorIndex, build_index, load_index
+
+
+class VectorIndexRetriever(BaseRetriever):
+    """
+    Retrieve documents through a NumPy vector index.
+
+    Example:
+        retriever = VectorIndexRetriever.from_documents(texts, OpenAIEmbeddings())
+        retriever.save(Path("tmp/index"))
+        qa_chain = RetrievalQA.from_chain_type(llm, retriever=retriever)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: VectorIndex
+    documents: List[Document]
+    embedding: Embeddings
+    k: int = 4
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[Document],
+        embedding: Embeddings,
+        kind: str = "flat",
+        k: int = 4,
+        **index_kwargs,
+    ) -> "VectorIndexRetriever":
+        """
+        Embed documents and index them.
+
+        Args:
+            documents (List[Document]): The chunks to index.
+            embedding (Embeddings): Model used for the documents and later queries.
+            kind (str): "flat" for exact search, "ivf" for clustered search or
+                "quantized" for compressed storage.
+            k (int): Number of documents returned per query.
+            **index_kwargs: Extra index settings, such as nlist and nprobe or
+                method and rerank.
+
+        Returns:
+            VectorIndexRetriever: The retriever over the new index.
+        """
+        vectors = embedding.embed_documents([doc.page_content for doc in documents])
+        index = build_index(np.asarray(vectors, dtype=np.float32), kind, **index_kwargs)
+        return cls(index=index, documents=documents, embedding=embedding, k=k)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        scores, ids = self.index.search(
+            np.asarray(self.embedding.embed_query(query)), self.k
+        )
+        return [
+            Document(
+                page_content=self.documents[i].page_content,
+                metadata={**self.documents[i].metadata, "score": float(score)},
+            )
+            for score, i in zip(scores[0], ids[0])
+            if i >= 0
+        ]
+
+    def save(self, directory: Path) -> None:
+        """Write the index and its documents to a directory."""
+        directory = Path(directory)
+        self.index.save(directory)
+        with open(directory / "documents.jsonl", "w", encoding="utf-8") as f:
+            for doc in self.documents:
+                record = {"page_content": doc.page_content, "metadata": doc.metadata}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(
+        cls, directory: Path, embedding: Embeddings, k: int = 4, mmap: bool = True
+    ) -> "VectorIndexRetriever":
+        """Open a retriever written by save, memory-mapping the vectors by default."""
+        directory = Path(directory)
+        with open(directory / "documents.jsonl", "r", encoding="utf-8") as f:
+            documents = [Document(**json.loads(line)) for line in f]
+        return cls(
+            index=load_index(directory, mmap),
+            documents=documents,
+            embedding=embedding,
+            k=k,
+        )
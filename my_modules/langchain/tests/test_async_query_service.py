@@ -0,0 +1,121 @@
+import asyncio
+from typing import List
+
+import pytest
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.language_models.fake import FakeStreamingListLLM
+from langchain_core.retrievers import BaseRetriever
+
+from woodshed.modules.langchain.async_query_service import (
+    AsyncQueryService,
+    QueryResult,
+)
+
+
+class SlowRetriever(BaseRetriever):
+    """Async retriever that records how many calls overlap."""
+
+    delay: float = 0.02
+    running: int = 0
+    max_running: int = 0
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        raise AssertionError("The service must not retrieve synchronously")
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        return [
+            Document(page_content=f"About {query}", metadata={"source": "a.txt"}),
+            Document(page_content="More", metadata={"source": "b.txt"}),
+        ]
+
+
+def make_service(answers, max_concurrency=8):
+    retriever = SlowRetriever()
+    llm = FakeStreamingListLLM(responses=answers)
+    return AsyncQueryService(retriever, llm, max_concurrency=max_concurrency), retriever
+
+
+def test_aquery_returns_answer_and_sources():
+    service, _ = make_service(["Okera"])
+
+    result = asyncio.run(service.aquery("Who did Databricks acquire?"))
+
+    assert result == QueryResult("Okera", ["a.txt", "b.txt"])
+
+
+def test_astream_yields_sources_before_tokens():
+    service, _ = make_service(["Okera"])
+
+    async def collect():
+        return [event async for event in service.astream("question")]
+
+    events = asyncio.run(collect())
+
+    assert events[0].kind == "sources"
+    assert events[0].data == ["a.txt", "b.txt"]
+    tokens = [event.data for event in events if event.kind == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Okera"
+    assert events[-1].kind == "done"
+    assert events[-1].data.answer == "Okera"
+
+
+def test_abandoned_stream_frees_its_slot():
+    service, _ = make_service(["Okera", "Tabular"], max_concurrency=1)
+
+    async def abandon_then_query():
+        stream = service.astream("first")
+        first = await stream.__anext__()
+        # The stream is neither read further nor closed
+        result = await asyncio.wait_for(service.aquery("second"), timeout=2)
+        return first, result, stream
+
+    first, result, _ = asyncio.run(abandon_then_query())
+
+    assert first.kind == "sources"
+    assert result.answer == "Tabular"
+
+
+class FailingRetriever(SlowRetriever):
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        raise ConnectionError("index unavailable")
+
+
+def test_astream_raises_retrieval_errors():
+    service = AsyncQueryService(
+        FailingRetriever(), FakeStreamingListLLM(responses=["Okera"])
+    )
+
+    async def collect():
+        return [event async for event in service.astream("question")]
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(collect())
+
+
+def test_aquery_many_bounds_concurrency():
+    service, retriever = make_service(["answer"] * 10, max_concurrency=3)
+
+    results = asyncio.run(service.aquery_many([f"q{i}" for i in range(10)]))
+
+    assert len(results) == 10
+    assert retriever.max_running == 3
+
+
+def test_rejects_zero_concurrency():
+    with pytest.raises(ValueError):
+        make_service(["x"], max_concurrency=0)
@@ -0,0 +1,103 @@
+from typing import List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from woodshed.modules.langchain.bm25 import (
+    BM25Index,
+    HybridRetriever,
+    decode_postings,
+    encode_varint,
+)
+
+TEXTS = [
+    "Apple shares rose after AAPL beat earnings estimates",
+    "The orchard grew apples and pears",
+    "Databricks acquired Okera to strengthen data governance",
+    "Quarterly earnings season lifted the market",
+]
+
+
+class RecordingRetriever(BaseRetriever):
+    """Dense stand-in that returns fixed documents and counts its calls."""
+
+    results: List[Document]
+    calls: int = 0
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        self.calls += 1
+        return self.results
+
+
+def documents():
+    return [
+        Document(page_content=text, metadata={"source": f"doc{i}"})
+        for i, text in enumerate(TEXTS)
+    ]
+
+
+def test_varint_postings_round_trip():
+    data = bytearray()
+    for gap, tf in [(0, 1), (3, 200), (1000000, 2)]:
+        encode_varint(gap, data)
+        encode_varint(tf, data)
+
+    ids, tfs = decode_postings(data)
+
+    assert ids.tolist() == [0, 3, 1000003]
+    assert tfs.tolist() == [1, 200, 2]
+    assert len(data) == 9  # One byte per small number, three for the big gap
+
+
+def test_bm25_ranks_rare_terms_higher():
+    index = BM25Index()
+    index.add(TEXTS)
+
+    scores, ids = index.search("aapl earnings", k=3)
+
+    assert ids.tolist() == [0, 3]
+    assert scores[0] > scores[1] > 0
+    assert index.search("unknown words", k=3)[1].tolist() == []
+
+
+def test_save_and_load(tmp_path):
+    index = BM25Index()
+    index.add(TEXTS[:2])
+    index.save(tmp_path)
+
+    loaded = BM25Index.load(tmp_path)
+    loaded.add(TEXTS[2:])
+    fresh = BM25Index()
+    fresh.add(TEXTS)
+
+    np.testing.assert_array_equal(
+        loaded.score("earnings okera"), fresh.score("earnings okera")
+    )
+    assert loaded.postings == fresh.postings
+
+
+def test_confident_keyword_query_skips_dense_retriever():
+    dense = RecordingRetriever(results=[])
+    retriever = HybridRetriever.from_documents(documents(), dense=dense, k=2)
+
+    results = retriever.invoke("Okera")
+
+    assert [doc.metadata["source"] for doc in results] == ["doc2"]
+    assert dense.calls == 0
+
+
+def test_ambiguous_query_fuses_both_rankings():
+    dense = RecordingRetriever(results=[documents()[1], documents()[3]])
+    retriever = HybridRetriever.from_documents(documents(), dense=dense, k=2)
+
+    results = retriever.invoke("earnings")
+
+    assert dense.calls == 1
+    # doc3 is ranked by both retrievers, so it wins the fusion
+    assert results[0].metadata["source"] == "doc3"
+    assert len(results) == 2
+    assert results[0].metadata["fusion_score"] > results[1].metadata["fusion_score"]
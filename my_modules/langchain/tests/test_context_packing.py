@@ -0,0 +1,97 @@
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from woodshed.modules.langchain.context_packing import (
+    ContextPackingRetriever,
+    merge_passages,
+    pack_documents,
+)
+from woodshed.modules.text_processing.token_chunking import get_tokenizer
+
+TEXT = (
+    "The first sentence opens the report. The second sentence adds detail. "
+    "The third sentence gives numbers. The fourth sentence closes it."
+)
+
+
+def chunk(start, end, source="report.txt", **metadata):
+    return Document(
+        page_content=TEXT[start:end],
+        metadata={"source": source, "start_index": start, **metadata},
+    )
+
+
+def test_overlapping_and_adjacent_chunks_are_merged():
+    documents = [chunk(70, 131), chunk(0, 80), chunk(131, len(TEXT))]
+
+    passages = merge_passages(documents)
+
+    assert [p.text for p in passages] == [TEXT]
+
+
+def test_chunks_without_positions_merge_on_shared_text():
+    first = Document(page_content=TEXT[:90], metadata={"source": "a"})
+    second = Document(page_content=TEXT[60:], metadata={"source": "a"})
+    duplicate = Document(page_content=TEXT[10:50], metadata={"source": "a"})
+    other = Document(page_content=TEXT[60:], metadata={"source": "b"})
+
+    passages = merge_passages([first, second, duplicate, other])
+
+    assert sorted(p.text for p in passages) == sorted([TEXT, TEXT[60:]])
+
+
+def test_passages_are_ordered_by_score():
+    documents = [
+        Document(
+            page_content="Low scoring text.", metadata={"source": "a", "score": 0.2}
+        ),
+        Document(
+            page_content="High scoring text.", metadata={"source": "b", "score": 0.9}
+        ),
+    ]
+
+    packed = pack_documents(documents)
+
+    assert [doc.page_content for doc in packed] == [
+        "High scoring text.",
+        "Low scoring text.",
+    ]
+    assert packed[0].metadata["score"] == 0.9
+
+
+def test_budget_trims_at_sentence_boundaries():
+    tokenizer = get_tokenizer()
+    budget = tokenizer.count(TEXT) // 2
+    documents = [
+        Document(page_content=TEXT, metadata={"source": "a"}),
+        Document(page_content="Another source entirely.", metadata={"source": "b"}),
+    ]
+
+    packed = pack_documents(documents, max_tokens=budget)
+
+    total = sum(tokenizer.count(doc.page_content) for doc in packed)
+    assert total <= budget
+    assert packed[0].page_content.startswith("The first sentence opens the report.")
+    assert packed[0].page_content.endswith(".")
+    assert len(packed[0].page_content) < len(TEXT)
+
+
+class FixedRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.documents
+
+
+def test_retriever_packs_results():
+    retriever = ContextPackingRetriever(
+        retriever=FixedRetriever(documents=[chunk(0, 80), chunk(70, len(TEXT))]),
+        max_tokens=1000,
+    )
+
+    assert [doc.page_content for doc in retriever.invoke("report")] == [TEXT]
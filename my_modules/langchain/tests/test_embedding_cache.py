@@ -0,0 +1,135 @@
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from woodshed.modules.langchain.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake model that records every text it embeds."""
+
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.calls: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.extend(texts)
+        return [
+            [float(len(text)), float(sum(map(ord, text)) % 97), 0.5] for text in texts
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with EmbeddingCache(tmp_path / "embeddings.sqlite3") as cache:
+        yield cache
+
+
+def test_unchanged_corpus_makes_no_calls(cache):
+    model = CountingEmbeddings()
+    texts = ["alpha beta", "gamma", "alpha beta"]
+
+    first = CachedEmbeddings(model, cache).embed_documents(texts)
+    assert model.calls == ["alpha beta", "gamma"]
+
+    model.calls.clear()
+    embedding = CachedEmbeddings(model, cache)
+    assert embedding.embed_documents(texts) == first
+    assert model.calls == []
+    assert (embedding.hits, embedding.misses) == (3, 0)
+
+
+def test_only_changed_chunks_are_embedded(cache):
+    model = CountingEmbeddings()
+    embedding = CachedEmbeddings(model, cache)
+    embedding.embed_documents(["one", "two"])
+    model.calls.clear()
+
+    embedding.embed_documents(["one", "  two\n", "three"])
+
+    # Whitespace changes keep a chunk cached
+    assert model.calls == ["three"]
+
+
+def test_cache_persists_and_is_keyed_by_model(tmp_path):
+    path = tmp_path / "embeddings.sqlite3"
+    with EmbeddingCache(path) as cache:
+        cache.put_many("model-a", ["text"], [[1.0, 2.0]])
+
+    with EmbeddingCache(path) as cache:
+        assert cache.get_many("model-a", ["text", "other"]) == [[1.0, 2.0], None]
+        assert cache.get_many("model-b", ["text"]) == [None]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    with EmbeddingCache(tmp_path / "embeddings.sqlite3", max_entries=2) as cache:
+        cache.put_many("m", ["a"], [[1.0]])
+        cache.put_many("m", ["b"], [[2.0]])
+        cache.get_many("m", ["a"])
+        cache.put_many("m", ["c"], [[3.0]])
+
+        assert len(cache) == 2
+        assert cache.get_many("m", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+
+
+def test_entry_count_tracks_inserts_and_replacements(tmp_path):
+    path = tmp_path / "embeddings.sqlite3"
+    with EmbeddingCache(path, max_entries=3) as cache:
+        cache.put_many("m", ["a", "b"], [[1.0], [2.0]])
+        cache.put_many("m", ["b", "c"], [[4.0], [3.0]])
+        assert len(cache) == 3
+        assert cache.get_many("m", ["b"]) == [[4.0]]
+
+    with EmbeddingCache(path, max_entries=3) as cache:
+        assert len(cache) == 3
+        cache.put_many("m", ["d"], [[5.0]])
+        assert len(cache) == 3
+
+
+class PreciseEmbeddings(CountingEmbeddings):
+    """Fake model whose vectors are not representable in float32."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [
+            [vector[0] + 0.1, vector[1] / 3]
+            for vector in super().embed_documents(texts)
+        ]
+
+
+def test_misses_and_hits_return_the_same_vectors(cache):
+    embedding = CachedEmbeddings(PreciseEmbeddings(), cache)
+
+    miss = embedding.embed_documents(["alpha beta"])
+    hit = embedding.embed_documents(["alpha beta"])
+    query_miss = embedding.embed_query("gamma")
+
+    assert embedding.hits == 1
+    assert miss == hit
+    assert query_miss == embedding.embed_query("gamma")
+
+
+def test_put_many_only_updates_cached_texts(cache):
+    cache.put_many("m", ["a"], [[1.0]])
+    statements = []
+    cache._connection.set_trace_callback(statements.append)
+
+    cache.put_many("m", ["a", "b", "c"], [[4.0], [2.0], [3.0]])
+
+    assert sum(s.startswith("UPDATE") for s in statements) == 1
+    assert cache.get_many("m", ["a", "b", "c"]) == [[4.0], [2.0], [3.0]]
+    assert len(cache) == 3
+
+
+def test_queries_are_cached_separately(cache):
+    model = CountingEmbeddings()
+    embedding = CachedEmbeddings(model, cache)
+
+    vector = embedding.embed_query("question")
+    assert embedding.embed_query("question") == pytest.approx(vector)
+    assert model.calls == ["question"]
+    assert cache.get_many("fake-embedding", ["question"]) == [None]
@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from woodshed.modules.langchain.embedding_cache import EmbeddingCache
+from woodshed.modules.langchain.embedding_executor import (
+    EmbeddingExecutor,
+    EmbeddingRequestError,
+    ExecutorEmbeddings,
+    HttpEmbeddingClient,
+    StoreSink,
+    TokenBucket,
+    embed_into_store,
+    make_batches,
+    parse_retry_after,
+)
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """OpenAI-compatible embedding endpoint that records how it was called."""
+
+    def __init__(self, failures=(), delay=0.02):
+        super().__init__(("127.0.0.1", 0), FakeEmbeddingHandler)
+        self.failures = list(failures)  # HTTP statuses returned by the first requests
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.batch_sizes = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            status = server.failures.pop(0) if server.failures else 200
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        if status != 200:
+            self.send_response(status)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        with server.lock:
+            server.batch_sizes.append(len(body["input"]))
+        # Answer out of order to check that results are sorted by index
+        data = [
+            {"index": i, "embedding": [float(len(text)), float(i)]}
+            for i, text in enumerate(body["input"])
+        ]
+        payload = json.dumps({"data": data[::-1]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+
+    def start(**kwargs):
+        server = FakeEmbeddingServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_make_batches_respects_budgets():
+    assert make_batches([3, 3, 3, 10, 1], max_batch_tokens=6, max_batch_size=10) == [
+        [0, 1],
+        [2],
+        [3],
+        [4],
+    ]
+    assert make_batches([1] * 5, max_batch_tokens=100, max_batch_size=2) == [
+        [0, 1],
+        [2, 3],
+        [4],
+    ]
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    delay = parse_retry_after(formatdate(time.time() + 120, usegmt=True))
+    assert 110 < delay <= 120
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+
+class LengthClient:
+    """Embedding client that answers at once with each text's length."""
+
+    async def embed(self, texts):
+        return [[float(len(text))] for text in texts]
+
+
+def test_rate_limit_is_shared_across_calls():
+    executor = EmbeddingExecutor(
+        LengthClient(), requests_per_minute=120, max_batch_size=1
+    )
+    executor.embed(["a"] * 120)  # Spends the whole budget
+
+    start = time.monotonic()
+    assert executor.embed(["abc"]) == [[3.0]]
+    assert time.monotonic() - start >= 0.4  # One request refills in 0.5s
+
+
+def test_batches_run_concurrently_and_stream_to_sink(make_server):
+    server = make_server()
+    executor = EmbeddingExecutor(
+        HttpEmbeddingClient(server.base_url, api_key="test", model="fake"),
+        max_concurrency=3,
+        max_batch_size=4,
+    )
+    texts = [f"text number {i}" + "!" * i for i in range(20)]
+    received = []
+
+    vectors = executor.embed(
+        texts, sink=lambda indices, batch: received.extend(indices)
+    )
+
+    assert [vector[0] for vector in vectors] == [float(len(text)) for text in texts]
+    assert sorted(received) == list(range(20))
+    assert max(server.batch_sizes) == 4
+    assert 1 < server.max_in_flight <= 3
+
+
+def test_retryable_errors_are_retried(make_server):
+    server = make_server(failures=[429, 503])
+    executor = EmbeddingExecutor(
+        HttpEmbeddingClient(server.base_url, api_key="test"),
+        max_concurrency=1,
+        base_delay=0.01,
+    )
+
+    assert executor.embed(["a", "bb"]) == [[1.0, 0.0], [2.0, 1.0]]
+
+
+def test_permanent_errors_are_raised(make_server):
+    server = make_server(failures=[400])
+    executor = EmbeddingExecutor(HttpEmbeddingClient(server.base_url, api_key="test"))
+
+    with pytest.raises(EmbeddingRequestError) as error:
+        executor.embed(["a"])
+    assert error.value.status == 400
+
+
+def test_executor_embeddings_adapter(make_server):
+    server = make_server()
+    embedding = ExecutorEmbeddings(
+        EmbeddingExecutor(HttpEmbeddingClient(server.base_url, api_key="test"))
+    )
+
+    assert embedding.embed_documents(["abc", "de"]) == [[3.0, 0.0], [2.0, 1.0]]
+    assert embedding.embed_query("abcd") == [4.0, 0.0]
+
+
+class FakeFaiss:
+    """Store that, like FAISS, is created from its first vectors."""
+
+    def __init__(self, text_embeddings, metadatas=None):
+        self.writes = []
+        self.add_embeddings(text_embeddings, metadatas)
+
+    def add_embeddings(self, text_embeddings, metadatas=None):
+        self.writes.append((list(text_embeddings), metadatas))
+
+
+class FakeCollection:
+    def __init__(self):
+        self.upserts = []
+
+    def upsert(self, ids, embeddings, documents, metadatas=None):
+        self.upserts.append((documents, embeddings, metadatas))
+
+
+class FakeChroma:
+    def __init__(self):
+        self._collection = FakeCollection()
+
+
+def test_store_sink_writes_every_batch_as_it_arrives(make_server):
+    server = make_server()
+    executor = EmbeddingExecutor(
+        HttpEmbeddingClient(server.base_url, api_key="test"),
+        max_concurrency=2,
+        max_batch_size=3,
+    )
+    texts = [f"chunk {i}" for i in range(10)]
+    sink = StoreSink(texts, create_store=FakeFaiss)
+
+    store = embed_into_store(executor, sink)
+
+    assert len(store.writes) == len(server.batch_sizes) == 4
+    written = dict(pair for pairs, _ in store.writes for pair in pairs)
+    assert written == {
+        text: [float(len(text)), float(i % 3)] for i, text in enumerate(texts)
+    }
+
+
+def test_store_sink_writes_chroma_through_its_collection():
+    store = FakeChroma()
+    sink = StoreSink(["a", "bb"], [{"source": "x.txt"}, {}], store=store)
+
+    sink.write([0, 1], [[1.0], [2.0]])
+
+    assert store._collection.upserts == [
+        (["a"], [[1.0]], [{"source": "x.txt"}]),
+        (["bb"], [[2.0]], None),
+    ]
+
+
+def test_embed_into_store_writes_cached_vectors_without_calls(make_server, tmp_path):
+    server = make_server()
+    executor = EmbeddingExecutor(HttpEmbeddingClient(server.base_url, api_key="test"))
+    texts = ["abc", "de"]
+    with EmbeddingCache(tmp_path / "embeddings.sqlite3") as cache:
+        embed_into_store(executor, StoreSink(texts, create_store=FakeFaiss), cache)
+        calls = len(server.batch_sizes)
+
+        store = embed_into_store(
+            executor, StoreSink(texts, create_store=FakeFaiss), cache
+        )
+
+    assert len(server.batch_sizes) == calls
+    assert store.writes == [([("abc", [3.0, 0.0]), ("de", [2.0, 1.0])], None)]
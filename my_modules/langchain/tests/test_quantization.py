@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from woodshed.modules.langchain.quantization import (
+    ProductQuantizer,
+    ScalarQuantizer,
+    make_quantizer,
+)
+from woodshed.modules.langchain.vector_index import (
+    QuantizedIndex,
+    build_index,
+    load_index,
+)
+
+
+def clustered_vectors(count=2000, dim=32, clusters=20, seed=0):
+    generator = np.random.default_rng(seed)
+    centers = generator.normal(size=(clusters, dim))
+    labels = generator.integers(0, clusters, size=count)
+    return (centers[labels] + 0.3 * generator.normal(size=(count, dim))).astype(
+        np.float32
+    )
+
+
+def recall(ids, expected):
+    return np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(ids, expected)])
+
+
+def test_scalar_quantizer_scores_match_decoded_vectors():
+    vectors = clustered_vectors(count=200)
+    quantizer = ScalarQuantizer(32)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+
+    assert codes.dtype == np.int8
+    np.testing.assert_allclose(quantizer.decode(codes), vectors, atol=0.1)
+    queries = vectors[:3]
+    np.testing.assert_allclose(
+        quantizer.scores(queries, codes),
+        queries @ quantizer.decode(codes).T,
+        rtol=1e-4,
+        atol=1e-3,
+    )
+
+
+def test_product_quantizer_scores_match_decoded_vectors():
+    vectors = clustered_vectors(count=500)
+    quantizer = ProductQuantizer(32, m=4)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+
+    assert codes.shape == (500, 4)
+    queries = vectors[:3]
+    np.testing.assert_allclose(
+        quantizer.scores(queries, codes),
+        queries @ quantizer.decode(codes).T,
+        rtol=1e-4,
+        atol=1e-3,
+    )
+
+
+def test_product_quantizer_rejects_uneven_split():
+    with pytest.raises(ValueError):
+        make_quantizer("pq", 30, m=4)
+    with pytest.raises(ValueError):
+        make_quantizer("float16", 32)
+
+
+@pytest.mark.parametrize(
+    "settings, minimum_recall",
+    [
+        ({"method": "int8", "rerank": 0}, 0.9),
+        ({"method": "pq", "m": 8, "rerank": 0}, 0.4),
+        ({"method": "pq", "m": 8, "rerank": 10}, 0.95),
+    ],
+)
+def test_quantized_index_recall(settings, minimum_recall):
+    vectors = clustered_vectors()
+    queries = clustered_vectors(count=50, seed=1)
+    _, expected = build_index(vectors, "flat").search(queries, k=10)
+
+    index = build_index(vectors, "quantized", **settings)
+    scores, ids = index.search(queries, k=10)
+
+    assert recall(ids, expected) >= minimum_recall
+    assert (np.diff(scores, axis=1) <= 1e-6).all()
+
+
+def test_rerank_returns_exact_scores():
+    vectors = clustered_vectors()
+    index = build_index(vectors, "quantized", method="pq", m=8, rerank=4)
+    flat = build_index(vectors, "flat")
+
+    scores, ids = index.search(vectors[:5], k=3)
+
+    assert (ids[:, 0] == np.arange(5)).all()
+    np.testing.assert_allclose(
+        scores,
+        np.take_along_axis(
+            vectors[:5] @ flat.vectors.T / np.linalg.norm(vectors[:5], axis=1)[:, None],
+            ids,
+            axis=1,
+        ),
+        rtol=1e-5,
+    )
+
+
+@pytest.mark.parametrize("settings", [{"method": "int8"}, {"method": "pq", "m": 8}])
+def test_save_and_load_keeps_codes_in_memory(tmp_path, settings):
+    vectors = clustered_vectors(count=500)
+    index = build_index(vectors, "quantized", **settings)
+    index.save(tmp_path)
+
+    loaded = load_index(tmp_path)
+
+    assert isinstance(loaded, QuantizedIndex)
+    assert isinstance(loaded.vectors, np.memmap)
+    assert not isinstance(loaded.codes, np.memmap)
+    assert loaded.nbytes < vectors.nbytes
+    for a, b in zip(loaded.search(vectors[:5], 3), index.search(vectors[:5], 3)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_index_without_vectors_skips_rerank(tmp_path):
+    vectors = clustered_vectors(count=300)
+    index = QuantizedIndex(32, method="int8", keep_vectors=False)
+    with pytest.raises(RuntimeError):
+        index.add(vectors)
+    index.train(vectors)
+    index.add(vectors)
+    index.save(tmp_path)
+
+    loaded = load_index(tmp_path)
+
+    assert len(loaded.vectors) == 0
+    assert loaded.nbytes == loaded.codes.nbytes + loaded.quantizer.nbytes
+    assert loaded.search(vectors[:2], 1)[1][:, 0].tolist() == [0, 1]
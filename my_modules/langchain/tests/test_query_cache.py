@@ -0,0 +1,143 @@
+import asyncio
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from woodshed.modules.langchain.query_cache import QueryCache, TTLCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Embed texts by counting a few keywords and record every query call."""
+
+    KEYWORDS = ["cat", "dog", "fish"]
+
+    def __init__(self):
+        self.query_calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.query_calls += 1
+        return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
+        words = text.lower().split()
+        return [float(words.count(keyword)) + 0.01 for keyword in self.KEYWORDS]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_store():
+    embedding = CountingEmbeddings()
+    store = InMemoryVectorStore(embedding)
+    store.add_texts(["the cat sat", "a dog barked"])
+    return store, embedding
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # Evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    clock.now = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_repeated_query_is_served_from_cache():
+    store, embedding = make_store()
+    cache = QueryCache()
+
+    first = cache.similarity_search(store, "Where is the cat?", k=1)
+    again = cache.similarity_search(store, "  where is the CAT? ", k=1)
+
+    assert first[0].page_content == "the cat sat"
+    assert [doc.page_content for doc in again] == ["the cat sat"]
+    assert embedding.query_calls == 1
+    assert cache.results.hits == 1
+    # A different k reuses the embedding but searches again
+    assert len(cache.similarity_search(store, "where is the cat?", k=2)) == 2
+    assert embedding.query_calls == 1
+    assert cache.results.misses == 2
+
+
+def test_invalidate_after_index_changes():
+    store, embedding = make_store()
+    cache = QueryCache()
+    cache.similarity_search(store, "fish", k=1)
+
+    store.add_texts(["fish fish fish"])
+    cache.invalidate(store)
+
+    assert (
+        cache.similarity_search(store, "fish", k=1)[0].page_content == "fish fish fish"
+    )
+    assert embedding.query_calls == 1
+
+
+def test_store_writes_invalidate_results():
+    store, _ = make_store()
+    cache = QueryCache()
+    cache.similarity_search(store, "fish", k=1)
+
+    ids = store.add_texts(["fish fish fish"])
+    assert cache.similarity_search(store, "fish", k=1)[0].page_content == (
+        "fish fish fish"
+    )
+
+    store.delete(ids)
+    assert cache.similarity_search(store, "fish", k=1)[0].page_content != (
+        "fish fish fish"
+    )
+
+    asyncio.run(store.aadd_texts(["fish fish fish fish"]))
+    assert cache.similarity_search(store, "fish", k=1)[0].page_content == (
+        "fish fish fish fish"
+    )
+
+
+def test_cached_documents_are_copies():
+    store, _ = make_store()
+    cache = QueryCache()
+
+    first = cache.similarity_search(store, "cat", k=1)
+    first[0].metadata["note"] = "changed by the caller"
+    again = cache.similarity_search(store, "cat", k=1)
+    again[0].metadata["note"] = "changed again"
+
+    assert "note" not in cache.similarity_search(store, "cat", k=1)[0].metadata
+
+
+def test_stores_do_not_share_results():
+    cache = QueryCache()
+    first, _ = make_store()
+    second = InMemoryVectorStore(CountingEmbeddings())
+    second.add_texts(["cat food"])
+
+    cache.similarity_search(first, "cat", k=1)
+
+    assert cache.similarity_search(second, "cat", k=1)[0].page_content == "cat food"
+
+
+def test_retriever_uses_cache():
+    store, embedding = make_store()
+    retriever = QueryCache().as_retriever(store, k=1)
+
+    retriever.invoke("dog")
+    result = retriever.invoke("dog")
+
+    assert result[0].page_content == "a dog barked"
+    assert embedding.query_calls == 1
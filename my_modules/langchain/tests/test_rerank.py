@@ -0,0 +1,82 @@
+from typing import List, Sequence
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from woodshed.modules.langchain.rerank import (
+    LexicalScorer,
+    Reranker,
+    RerankingRetriever,
+)
+
+CANDIDATES = [
+    Document(page_content="Microsoft released a new laptop", metadata={"source": "a"}),
+    Document(
+        page_content="The startup raised money from investors", metadata={"source": "b"}
+    ),
+    Document(
+        page_content="How much money did Microsoft raise? Microsoft raised money "
+        "through a bond sale.",
+        metadata={"source": "c"},
+    ),
+]
+
+
+class CountingScorer:
+    """Scores by text length and records every batch it is asked for."""
+
+    name = "counting"
+
+    def __init__(self):
+        self.batches = []
+
+    def score_batch(self, query: str, texts: Sequence[str]) -> List[float]:
+        self.batches.append(len(texts))
+        return [float(len(text)) for text in texts]
+
+
+class FixedRetriever(BaseRetriever):
+    documents: List[Document]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.documents
+
+
+def test_lexical_scorer_prefers_query_coverage():
+    scores = LexicalScorer().score_batch(
+        "How much money did Microsoft raise?",
+        [doc.page_content for doc in CANDIDATES],
+    )
+
+    assert scores[2] > scores[0] > 0
+    assert scores[2] > scores[1] > 0
+
+
+def test_scores_are_batched_and_cached():
+    scorer = CountingScorer()
+    reranker = Reranker(scorer, batch_size=2)
+    texts = [f"text {'x' * i}" for i in range(5)]
+
+    reranker.score("query", texts)
+    reranker.score("  QUERY ", texts + ["one more"])
+
+    assert scorer.batches == [2, 2, 1, 1]
+
+
+def test_rerank_keeps_the_best_with_scores():
+    best = Reranker().rerank("How much money did Microsoft raise?", CANDIDATES, 2)
+
+    assert [doc.metadata["source"] for doc in best][0] == "c"
+    assert len(best) == 2
+    assert best[0].metadata["rerank_score"] >= best[1].metadata["rerank_score"]
+
+
+def test_reranking_retriever_over_fetches_and_trims():
+    retriever = RerankingRetriever(retriever=FixedRetriever(documents=CANDIDATES), k=1)
+
+    results = retriever.invoke("Microsoft raise money")
+
+    assert [doc.metadata["source"] for doc in results] == ["c"]
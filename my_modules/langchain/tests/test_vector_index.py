@@ -0,0 +1,117 @@
+from typing import List
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from woodshed.modules.langchain.retrievers import VectorIndexRetriever
+from woodshed.modules.langchain.vector_index import (
+    FlatIndex,
+    IVFIndex,
+    build_index,
+    load_index,
+)
+
+
+def clustered_vectors(count=2000, dim=32, clusters=20, seed=0):
+    generator = np.random.default_rng(seed)
+    centers = generator.normal(size=(clusters, dim))
+    labels = generator.integers(0, clusters, size=count)
+    return (centers[labels] + 0.1 * generator.normal(size=(count, dim))).astype(
+        np.float32
+    )
+
+
+def exact_top_k(vectors, queries, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+
+
+def test_flat_index_is_exact():
+    vectors = clustered_vectors()
+    queries = vectors[:10] + 0.05
+
+    scores, ids = build_index(vectors, "flat").search(queries, k=5)
+
+    assert ids.shape == (10, 5)
+    assert (ids == exact_top_k(vectors, queries, 5)).all()
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+def test_ivf_index_recall():
+    vectors = clustered_vectors()
+    queries = clustered_vectors(count=50, seed=1)
+    expected = exact_top_k(vectors, queries, 10)
+
+    index = build_index(vectors, "ivf", nlist=32, nprobe=8)
+    _, ids = index.search(queries, k=10)
+
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(ids, expected)])
+    assert recall >= 0.9
+    # Scanning every cluster is exact
+    _, all_ids = index.search(queries, k=10, nprobe=32)
+    assert (all_ids == expected).all()
+
+
+def test_incremental_adds_keep_ids():
+    vectors = clustered_vectors(count=300)
+    index = IVFIndex(32, nlist=8, nprobe=8)
+    index.train(vectors)
+    index.add(vectors[:100])
+    index.add(vectors[100:])
+
+    _, ids = index.search(vectors[[5, 250]], k=1)
+
+    assert ids[:, 0].tolist() == [5, 250]
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf"])
+def test_save_and_memory_mapped_load(tmp_path, kind):
+    vectors = clustered_vectors(count=500)
+    index = build_index(vectors, kind, **({"nlist": 16} if kind == "ivf" else {}))
+    index.save(tmp_path)
+
+    loaded = load_index(tmp_path)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert type(loaded) is type(index)
+    for a, b in zip(loaded.search(vectors[:5], 3), index.search(vectors[:5], 3)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_flat_index_rejects_wrong_dimension():
+    with pytest.raises(ValueError):
+        FlatIndex(4).add(np.ones((2, 3)))
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embed texts by counting a few keywords."""
+
+    KEYWORDS = ["cat", "dog", "fish", "bird"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        words = text.lower().split()
+        return [float(words.count(keyword)) + 0.01 for keyword in self.KEYWORDS]
+
+
+def test_retriever_round_trip(tmp_path):
+    documents = [
+        Document(page_content="the cat sat with another cat", metadata={"source": "a"}),
+        Document(page_content="a dog barked at the dog", metadata={"source": "b"}),
+        Document(page_content="fish swim and fish eat", metadata={"source": "c"}),
+    ]
+    retriever = VectorIndexRetriever.from_documents(documents, KeywordEmbeddings(), k=1)
+
+    assert retriever.invoke("dog")[0].metadata["source"] == "b"
+
+    retriever.save(tmp_path)
+    loaded = VectorIndexRetriever.load(tmp_path, KeywordEmbeddings(), k=2)
+    results = loaded.invoke("fish")
+    assert [doc.metadata["source"] for doc in results][0] == "c"
+    assert len(results) == 2
+    assert results[0].metadata["score"] > results[1].metadata["score"]
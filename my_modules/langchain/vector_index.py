@@ -0,0 +1,517 @@
+"""
+Project-owned vector indexes on NumPy.
+
+FlatIndex keeps all vectors in one normalized float32 matrix and answers a
+query with a single matrix product and an argpartition top-k, which is exact
+and fast enough for tens of thousands of chunks. IVFIndex clusters the
+vectors with k-means and only scans the ``nprobe`` clusters nearest to the
+query, trading a little recall for much less work on larger corpora.
+QuantizedIndex keeps only int8 or product-quantization codes in memory and
+re-ranks its best candidates against full vectors that stay on disk.
+
+All of them score by cosine similarity and save to a directory of raw
+arrays that load back through ``np.memmap``, so opening an index costs no
+parsing and only the pages a search touches are read.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from woodshed.modules.langchain.quantization import make_quantizer
+
+INDEX_VERSION = 1
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 copies of the rows scaled to unit length; zero rows stay zero."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k best scores of every row without sorting whole rows.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Scores and column positions, best first.
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.float32), empty.astype(np.int64)
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best_scores, order, axis=1),
+        np.take_along_axis(best, order, axis=1),
+    )
+
+
+def _write_array(path: Path, array: np.ndarray) -> None:
+    """Write an array as raw bytes through a memory map."""
+    if array.size == 0:
+        path.write_bytes(b"")
+        return
+    target = np.memmap(path, dtype=array.dtype, mode="w+", shape=array.shape)
+    target[:] = array
+    target.flush()
+    del target
+
+
+def _read_array(path: Path, dtype, shape: Tuple[int, ...], mmap: bool) -> np.ndarray:
+    """Open a raw array written by _write_array, memory-mapped unless mmap is False."""
+    if 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+    return np.fromfile(path, dtype=dtype).reshape(shape)
+
+
+def _write_meta(directory: Path, meta: dict) -> None:
+    with open(directory / "index.json", "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, **meta}, f, indent=2)
+
+
+def _read_meta(directory: Path) -> dict:
+    with open(directory / "index.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported vector index version in {directory}")
+    return meta
+
+
+class FlatIndex:
+    """
+    Exact cosine-similarity search over a single float32 matrix.
+
+    Example:
+        index = FlatIndex(1536)
+        index.add(vectors)
+        scores, ids = index.search(query_vectors, k=4)
+    """
+
+    kind = "flat"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the stored vectors."""
+        return self.vectors.nbytes
+
+    def add(self, vectors: np.ndarray) -> None:
+        """
+        Append vectors; their ids continue from the current size of the index.
+
+        Raises:
+            ValueError: If the vectors do not have the index dimension.
+        """
+        vectors = normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}")
+        self.vectors = np.concatenate([self.vectors, vectors])
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar stored vectors for each query.
+
+        Args:
+            queries (np.ndarray): One query vector or a matrix of them.
+            k (int): Number of results per query.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Cosine similarities and ids, shape (queries, k), best first.
+        """
+        return top_k(normalize(queries) @ self.vectors.T, k)
+
+    def save(self, directory: Path) -> None:
+        """Write the index to a directory."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_array(directory / "vectors.f32", self.vectors)
+        _write_meta(directory, {"kind": self.kind, "dim": self.dim, "count": len(self)})
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "FlatIndex":
+        """Open an index written by save, memory-mapping its vectors by default."""
+        directory = Path(directory)
+        meta = _read_meta(directory)
+        index = cls(meta["dim"])
+        index.vectors = _read_array(
+            directory / "vectors.f32", np.float32, (meta["count"], meta["dim"]), mmap
+        )
+        return index
+
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors grouped by their nearest k-means centroid.
+
+    Vectors are stored sorted by cluster so each cluster is one contiguous
+    slice. A search scores the centroids, then only the vectors of the
+    ``nprobe`` best clusters.
+
+    Example:
+        index = IVFIndex(1536, nlist=256, nprobe=16)
+        index.train(vectors)
+        index.add(vectors)
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dim: int, nlist: int = 100, nprobe: int = 8, seed: int = 0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)  # Original id of each stored vector
+        self.offsets = np.zeros(nlist + 1, dtype=np.int64)  # Start of each cluster
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the stored vectors, ids and centroids."""
+        centroids = 0 if self.centroids is None else self.centroids.nbytes
+        return self.vectors.nbytes + self.ids.nbytes + centroids
+
+    def train(self, vectors: np.ndarray, iterations: int = 20) -> None:
+        """
+        Learn the cluster centroids with spherical k-means.
+
+        Args:
+            vectors (np.ndarray): A representative sample of the vectors to index.
+            iterations (int): Number of k-means iterations.
+        """
+        vectors = normalize(vectors)
+        nlist = min(self.nlist, len(vectors))
+        generator = np.random.default_rng(self.seed)
+        centroids = vectors[generator.choice(len(vectors), nlist, replace=False)]
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            empty = np.bincount(assignments, minlength=nlist) == 0
+            # Reseed empty clusters with random vectors
+            sums[empty] = vectors[generator.choice(len(vectors), empty.sum())]
+            centroids = normalize(sums)
+        self.centroids = centroids
+        self.nlist = nlist
+        self.offsets = np.zeros(nlist + 1, dtype=np.int64)
+
+    def add(self, vectors: np.ndarray) -> None:
+        """
+        Assign vectors to their clusters; their ids continue from the current size.
+
+        Raises:
+            RuntimeError: If the index has not been trained.
+            ValueError: If the vectors do not have the index dimension.
+        """
+        if self.centroids is None:
+            raise RuntimeError("IVFIndex must be trained before vectors are added")
+        vectors = normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}")
+
+        new_ids = np.arange(len(self), len(self) + len(vectors), dtype=np.int64)
+        clusters = np.concatenate(
+            [
+                np.repeat(np.arange(self.nlist), np.diff(self.offsets)),
+                np.argmax(vectors @ self.centroids.T, axis=1),
+            ]
+        )
+        order = np.argsort(clusters, kind="stable")
+        self.vectors = np.concatenate([self.vectors, vectors])[order]
+        self.ids = np.concatenate([self.ids, new_ids])[order]
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(clusters, minlength=self.nlist))]
+        ).astype(np.int64)
+
+    def search(
+        self, queries: np.ndarray, k: int, nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the k most similar stored vectors for each query.
+
+        Args:
+            queries (np.ndarray): One query vector or a matrix of them.
+            k (int): Number of results per query.
+            nprobe (int, optional): Clusters to scan; defaults to the index setting.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Cosine similarities and ids, shape
+            (queries, k), best first. Missing results have id -1.
+        """
+        queries = normalize(queries)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if self.centroids is None or len(self) == 0:
+            return all_scores, all_ids
+
+        _, probes = top_k(queries @ self.centroids.T, nprobe)
+        for row, (query, clusters) in enumerate(zip(queries, probes)):
+            positions = np.concatenate(
+                [np.arange(self.offsets[c], self.offsets[c + 1]) for c in clusters]
+            )
+            if len(positions) == 0:
+                continue
+            scores, best = top_k((self.vectors[positions] @ query)[np.newaxis, :], k)
+            found = scores.shape[1]
+            all_scores[row, :found] = scores[0]
+            all_ids[row, :found] = self.ids[positions[best[0]]]
+        return all_scores, all_ids
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the index to a directory.
+
+        Raises:
+            RuntimeError: If the index has not been trained.
+        """
+        if self.centroids is None:
+            raise RuntimeError("IVFIndex must be trained before it is saved")
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_array(directory / "centroids.f32", self.centroids)
+        _write_array(directory / "vectors.f32", self.vectors)
+        _write_array(directory / "ids.i64", self.ids)
+        _write_array(directory / "offsets.i64", self.offsets)
+        _write_meta(
+            directory,
+            {
+                "kind": self.kind,
+                "dim": self.dim,
+                "count": len(self),
+                "nlist": self.nlist,
+                "nprobe": self.nprobe,
+                "seed": self.seed,
+            },
+        )
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "IVFIndex":
+        """Open an index written by save, memory-mapping its vectors by default."""
+        directory = Path(directory)
+        meta = _read_meta(directory)
+        dim, count, nlist = meta["dim"], meta["count"], meta["nlist"]
+        index = cls(dim, nlist, meta["nprobe"], meta["seed"])
+        index.centroids = np.fromfile(directory / "centroids.f32", np.float32).reshape(
+            nlist, dim
+        )
+        index.vectors = _read_array(
+            directory / "vectors.f32", np.float32, (count, dim), mmap
+        )
+        index.ids = _read_array(directory / "ids.i64", np.int64, (count,), mmap)
+        index.offsets = np.fromfile(directory / "offsets.i64", np.int64)
+        return index
+
+
+class QuantizedIndex:
+    """
+    Exhaustive search over compressed vectors with an exact re-rank.
+
+    Vectors are stored as int8 or product-quantization codes (see
+    quantization) and every query is scored against all codes. The
+    ``rerank`` x k best candidates are then scored again with the
+    full-precision vectors, which a loaded index reads through a memory map,
+    so only the codes need to fit in RAM.
+
+    Example:
+        index = QuantizedIndex(1536, method="pq", m=96, rerank=8)
+        index.train(vectors)
+        index.add(vectors)
+    """
+
+    kind = "quantized"
+
+    def __init__(
+        self,
+        dim: int,
+        method: str = "int8",
+        rerank: int = 4,
+        keep_vectors: bool = True,
+        **quantizer_kwargs,
+    ):
+        self.dim = dim
+        self.rerank = rerank
+        self.keep_vectors = keep_vectors
+        self.quantizer = make_quantizer(method, dim, **quantizer_kwargs)
+        self.codes = np.empty(
+            (0, self.quantizer.code_size()), dtype=self.quantizer.code_dtype
+        )
+        # Full-precision vectors for the re-rank; memory-mapped once loaded
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory by the codes and quantizer, excluding mapped vectors."""
+        vectors = 0 if isinstance(self.vectors, np.memmap) else self.vectors.nbytes
+        return self.codes.nbytes + self.quantizer.nbytes + vectors
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Fit the quantizer to a representative sample of the vectors to index."""
+        self.quantizer.train(normalize(vectors))
+
+    def add(self, vectors: np.ndarray) -> None:
+        """
+        Encode and append vectors; their ids continue from the current size.
+
+        Raises:
+            RuntimeError: If the index has not been trained.
+            ValueError: If the vectors do not have the index dimension.
+        """
+        if not self.quantizer.trained:
+            raise RuntimeError(
+                "QuantizedIndex must be trained before vectors are added"
+            )
+        vectors = normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}")
+        self.codes = np.concatenate([self.codes, self.quantizer.encode(vectors)])
+        if self.keep_vectors:
+            self.vectors = np.concatenate([self.vectors, vectors])
+
+    def search(
+        self, queries: np.ndarray, k: int, rerank: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the k most similar stored vectors for each query.
+
+        Args:
+            queries (np.ndarray): One query vector or a matrix of them.
+            k (int): Number of results per query.
+            rerank (int, optional): Candidates re-scored exactly, as a multiple
+                of k; 0 returns the approximate scores. Defaults to the index
+                setting.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Cosine similarities and ids, shape
+            (queries, k), best first.
+        """
+        queries = normalize(queries)
+        rerank = self.rerank if rerank is None else rerank
+        scores = self.quantizer.scores(queries, self.codes)
+        if not rerank or len(self.vectors) == 0:
+            return top_k(scores, k)
+
+        _, candidates = top_k(scores, k * rerank)
+        exact = np.empty(candidates.shape, dtype=np.float32)
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            # Read the candidates in file order so a memory map is walked forwards
+            order = np.argsort(ids)
+            exact[row, order] = self.vectors[ids[order]] @ query
+        best_scores, best = top_k(exact, k)
+        return best_scores, np.take_along_axis(candidates, best, axis=1)
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the index to a directory.
+
+        Raises:
+            RuntimeError: If the index has not been trained.
+        """
+        if not self.quantizer.trained:
+            raise RuntimeError("QuantizedIndex must be trained before it is saved")
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in self.quantizer.arrays().items():
+            _write_array(directory / name, array)
+        _write_array(directory / "codes.bin", self.codes)
+        _write_array(directory / "vectors.f32", self.vectors)
+        _write_meta(
+            directory,
+            {
+                "kind": self.kind,
+                "dim": self.dim,
+                "count": len(self),
+                "method": self.quantizer.method,
+                "rerank": self.rerank,
+                "keep_vectors": self.keep_vectors,
+                **self.quantizer.settings(),
+            },
+        )
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "QuantizedIndex":
+        """
+        Open an index written by save.
+
+        The codes are always read into memory; the full-precision vectors are
+        memory-mapped by default.
+        """
+        directory = Path(directory)
+        meta = _read_meta(directory)
+        dim, count = meta["dim"], meta["count"]
+        settings = {"m": meta["m"], "seed": meta["seed"]} if "m" in meta else {}
+        index = cls(
+            dim, meta["method"], meta["rerank"], meta["keep_vectors"], **settings
+        )
+        index.quantizer.load_arrays(directory, meta)
+        index.codes = _read_array(
+            directory / "codes.bin",
+            index.quantizer.code_dtype,
+            (count, index.quantizer.code_size()),
+            mmap=False,
+        )
+        stored = count if meta["keep_vectors"] else 0
+        index.vectors = _read_array(
+            directory / "vectors.f32", np.float32, (stored, dim), mmap
+        )
+        return index
+
+
+VectorIndex = Union[FlatIndex, IVFIndex, QuantizedIndex]
+INDEX_TYPES = {
+    FlatIndex.kind: FlatIndex,
+    IVFIndex.kind: IVFIndex,
+    QuantizedIndex.kind: QuantizedIndex,
+}
+
+
+def build_index(vectors: np.ndarray, kind: str = "flat", **kwargs) -> VectorIndex:
+    """
+    Create and fill an index of the given kind.
+
+    Args:
+        vectors (np.ndarray): The vectors to index, one per row.
+        kind (str): "flat" for exact search, "ivf" for clustered search or
+            "quantized" for compressed storage.
+        **kwargs: Extra settings for the index, such as nlist and nprobe or
+            method and rerank.
+
+    Returns:
+        VectorIndex: The filled index.
+
+    Raises:
+        ValueError: If the kind is unknown.
+    """
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index kind: {kind}")
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    index = INDEX_TYPES[kind](vectors.shape[1], **kwargs)
+    if isinstance(index, (IVFIndex, QuantizedIndex)):
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def load_index(directory: Path, mmap: bool = True) -> VectorIndex:
+    """Open a saved index of any kind."""
+    return INDEX_TYPES[_read_meta(Path(directory))["kind"]].load(directory, mmap)
@@ -42,6 +42,15 @@ from langchain_community.llms import OpenAI
 from langchain_community.vectorstores import FAISS
 from pypdf import PdfReader
 
+from woodshed.modules.langchain.context_packing import pack_documents
+from woodshed.modules.langchain.embedding_executor import (
+    EmbeddingExecutor,
+    ExecutorEmbeddings,
+    StoreSink,
+    embed_into_store,
+)
+from woodshed.modules.langchain.query_cache import QueryCache
+
 from .warning_logger import log_warnings
 
 # Constants
@@ -81,12 +90,17 @@ def create_text_splitter() -> CharacterTextSplitter:
 
 
 @log_warnings(logger_name=LOGGER_NAME, log_file=LOG_FILE)
-def process_text(text: str) -> Optional[FAISS]:
+def process_text(
+    text: str, embedding_executor: Optional[EmbeddingExecutor] = None
+) -> Optional[FAISS]:
     """
     Process the input text by splitting it into chunks and creating a FAISS index.
 
     Args:
         text (str): The input text to process.
+        embedding_executor (EmbeddingExecutor, optional): Embeds the chunks in
+            concurrent, rate limited batches, adding each batch to the index as
+            soon as it arrives.
 
     Returns:
         Optional[FAISS]: A FAISS index of the processed text, or None if processing fails.
@@ -100,6 +114,16 @@ def process_text(text: str) -> Optional[FAISS]:
     if not chunks:
         return None
 
+    if embedding_executor is not None:
+        embeddings = ExecutorEmbeddings(embedding_executor)
+        sink = StoreSink(
+            chunks,
+            create_store=lambda text_embeddings, metadatas: FAISS.from_embeddings(
+                text_embeddings, embeddings, metadatas=metadatas
+            ),
+        )
+        return embed_into_store(embedding_executor, sink)
+
     embeddings = OpenAIEmbeddings(openai_api_key=get_openai_api_key())
     return FAISS.from_texts(chunks, embeddings)
 
@@ -140,12 +164,16 @@ def open_pdf_file(pdf_file: Union[str, bytes]):
         pass
 
 
-def process_pdf(pdf_file: Union[str, bytes]) -> Optional[FAISS]:
+def process_pdf(
+    pdf_file: Union[str, bytes], embedding_executor: Optional[EmbeddingExecutor] = None
+) -> Optional[FAISS]:
     """
     Process a PDF file by extracting its text and creating a FAISS index.
 
     Args:
         pdf_file (Union[str, bytes]): Either a file path (str) or file content (bytes) of the PDF.
+        embedding_executor (EmbeddingExecutor, optional): Embeds the chunks in
+            concurrent, rate limited batches instead of one blocking call.
 
     Returns:
         Optional[FAISS]: A FAISS index of the processed PDF content, or None if processing fails.
@@ -154,24 +182,39 @@ def process_pdf(pdf_file: Union[str, bytes]) -> Optional[FAISS]:
         # Use the context manager to handle the opening of the PDF file
         with open_pdf_file(pdf_file) as pdf_reader:
             text = extract_text_from_pdf(pdf_reader)  # Extract text from the opened PDF
-            return process_text(text)  # Process the extracted text into a FAISS index
+            # Process the extracted text into a FAISS index
+            return process_text(text, embedding_executor)
     except Exception as e:
         log_warnings(f"Error processing PDF: {e}")  # Log the error instead of printing
         return None  # Return None if processing fails
 
 
-def answer_question(knowledge_base: FAISS, query: str) -> Tuple[str, dict]:
+def answer_question(
+    knowledge_base: FAISS,
+    query: str,
+    cache: Optional[QueryCache] = None,
+    max_context_tokens: Optional[int] = None,
+) -> Tuple[str, dict]:
     """
     Generate an answer to a question based on the provided knowledge base.
 
     Args:
         knowledge_base (FAISS): The FAISS index containing the document embeddings.
         query (str): The question to answer.
+        cache (QueryCache, optional): Cache of query embeddings and search results,
+            so repeated questions skip the embedding call and the search.
+        max_context_tokens (int, optional): Token budget for the retrieved chunks;
+            overlapping chunks are merged and the rest trimmed to fit it.
 
     Returns:
         Tuple[str, dict]: A tuple containing the generated answer and the OpenAI API usage information.
     """
-    docs = knowledge_base.similarity_search(query)
+    if cache is not None:
+        docs = cache.similarity_search(knowledge_base, query)
+    else:
+        docs = knowledge_base.similarity_search(query)
+    if max_context_tokens is not None:
+        docs = pack_documents(docs, max_context_tokens)
     llm = OpenAI(openai_api_key=get_openai_api_key())
     chain = load_qa_chain(llm, chain_type="stuff")
 
@@ -0,0 +1,371 @@
+"""
+Persistent answer cache for the question answering pipelines.
+
+Related-question expansion asks near-identical questions again and again, and
+every one of them costs an API call. AnswerCache stores answers in a local
+SQLite database keyed by (model, expert type, system prompt hash, normalized
+question), so a repeated question is answered without calling the API.
+
+Recently used answers are also held in memory, so repeated hits within a run
+return in microseconds. Entries expire after a time-to-live and the least
+recently used ones are evicted once the cache grows past ``max_entries``.
+
+With ``semantic=True`` a question that misses the exact lookup is compared
+with the cached questions of the same model, expert type and prompt, and the
+answer of the most similar one is returned if its cosine similarity reaches
+``similarity_threshold``. Embeddings are computed locally by HashingEmbedder
+unless another embedder, such as a sentence-transformers model's ``encode``,
+is given.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL = 24 * 3600.0  # Online models' answers go stale
+DEFAULT_FRONT_ENTRIES = 1024
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+HASHING_DIM = 1024
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_question(question: str) -> str:
+    """Casefold a question, collapse its whitespace and drop trailing punctuation."""
+    return " ".join(question.split()).casefold().rstrip("?!. ")
+
+
+def _sha256(*parts: str) -> bytes:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class CacheStats(NamedTuple):
+    """Counters of an AnswerCache since it was opened."""
+
+    hits: int
+    semantic_hits: int
+    misses: int
+    entries: int
+
+
+class HashingEmbedder:
+    """
+    Embed text locally as hashed counts of its words, word pairs and character trigrams.
+
+    The vectors are L2-normalized, so their dot product is the cosine similarity.
+
+    Example:
+        embed = HashingEmbedder()
+        similarity = float(embed("What is APR?") @ embed("what's an APR"))
+    """
+
+    def __init__(self, dim: int = HASHING_DIM):
+        self.dim = dim
+
+    def features(self, text: str) -> List[str]:
+        words = WORD_PATTERN.findall(normalize_question(text))
+        features = list(words)
+        features.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"#{word}#"
+            features.extend(padded[i : i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def __call__(self, text: str) -> np.ndarray:
+        buckets = [
+            int.from_bytes(
+                hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(),
+                "little",
+            )
+            % self.dim
+            for feature in self.features(text)
+        ]
+        vector = np.bincount(buckets, minlength=self.dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """
+    SQLite store of answers with an in-memory front cache and optional semantic lookup.
+
+    Example:
+        with AnswerCache(Path("data/cache/answers.sqlite3")) as cache:
+            answer = cache.get(model, expert_type, system_prompt, question)
+            if answer is None:
+                answer = ask_the_api(question)
+                cache.put(model, expert_type, system_prompt, question, answer)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: Optional[float] = DEFAULT_TTL,
+        semantic: bool = False,
+        embedder: Optional[Callable[[str], np.ndarray]] = None,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        front_entries: int = DEFAULT_FRONT_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic = semantic
+        self.embedder = embedder or HashingEmbedder()
+        self.similarity_threshold = similarity_threshold
+        self.front_entries = front_entries
+        self.clock = clock
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        # Answers recently read or written, by key: (answer, created)
+        self._front: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        # Last use of answers served from memory, written to the database lazily
+        self._used: Dict[bytes, float] = {}
+        # Embedded questions of every scope searched so far: (keys, created, vectors)
+        self._vectors: Dict[bytes, Tuple[List[bytes], List[float], np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " key BLOB PRIMARY KEY,"
+            " scope BLOB NOT NULL,"
+            " question TEXT NOT NULL,"
+            " answer TEXT NOT NULL,"
+            " embedding BLOB,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS answers_scope ON answers (scope)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS answers_created ON answers (created)"
+        )
+        self._connection.commit()
+        # Kept up to date on every write so eviction needs no COUNT(*) scan
+        self._count = self._connection.execute(
+            "SELECT COUNT(*) FROM answers"
+        ).fetchone()[0]
+
+    @staticmethod
+    def scope(model: str, expert_type: str, system_prompt: str) -> bytes:
+        """Identify the answers that are interchangeable: same model, expert and prompt."""
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        return _sha256(model, expert_type.casefold(), prompt_hash)
+
+    @staticmethod
+    def key(scope: bytes, question: str) -> bytes:
+        return hashlib.sha256(scope + normalize_question(question).encode()).digest()
+
+    def _is_live(self, created: float, now: float) -> bool:
+        return self.ttl is None or created + self.ttl > now
+
+    def get(
+        self, model: str, expert_type: str, system_prompt: str, question: str
+    ) -> Optional[str]:
+        """
+        Look up the answer to a question.
+
+        Args:
+            model (str): Name of the model that answers.
+            expert_type (str): The expert the model plays.
+            system_prompt (str): The system prompt sent with the question.
+            question (str): The question.
+
+        Returns:
+            Optional[str]: The cached answer, or None when there is none.
+        """
+        scope = self.scope(model, expert_type, system_prompt)
+        key = self.key(scope, question)
+        now = self.clock()
+        with self._lock:
+            entry = self._front.get(key)
+            if entry is not None and self._is_live(entry[1], now):
+                self._front.move_to_end(key)
+                self._used[key] = now
+                self.hits += 1
+                return entry[0]
+
+            row = self._connection.execute(
+                "SELECT answer, created FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._is_live(row[1], now):
+                self._touch(key, now)
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                return row[0]
+
+            if self.semantic:
+                match = self._nearest(scope, question, now)
+                if match is not None:
+                    self.semantic_hits += 1
+                    return match
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        model: str,
+        expert_type: str,
+        system_prompt: str,
+        question: str,
+        answer: str,
+    ) -> None:
+        """
+        Store the answer to a question, evicting old entries if the cache is full.
+
+        Args:
+            model (str): Name of the model that answered.
+            expert_type (str): The expert the model played.
+            system_prompt (str): The system prompt sent with the question.
+            question (str): The question.
+            answer (str): The answer.
+        """
+        scope = self.scope(model, expert_type, system_prompt)
+        key = self.key(scope, question)
+        vector = self.embedder(question) if self.semantic else None
+        now = self.clock()
+        embedding = None if vector is None else vector.astype(np.float32).tobytes()
+        with self._lock:
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, normalize_question(question), answer, embedding, now, now),
+            ).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                self._connection.execute(
+                    "UPDATE answers SET answer = ?, embedding = ?, created = ?,"
+                    " last_used = ? WHERE key = ?",
+                    (answer, embedding, now, now, key),
+                )
+            self._flush_used()
+            evicted = self._evict(now)
+            self._connection.commit()
+            if evicted:
+                self._front.clear()
+                self._vectors.clear()
+            self._remember(key, answer, now)
+            if not evicted and vector is not None and scope in self._vectors:
+                keys, created, vectors = self._vectors[scope]
+                if keys:
+                    vectors = np.vstack([vectors, vector[None, :]])
+                else:
+                    # Searched before anything was cached: no width to stack onto
+                    vectors = vector[None, :].astype(np.float32)
+                self._vectors[scope] = (keys + [key], created + [now], vectors)
+
+    def _touch(self, key: bytes, now: float) -> None:
+        self._connection.execute(
+            "UPDATE answers SET last_used = ? WHERE key = ?", (now, key)
+        )
+        self._connection.commit()
+
+    def _flush_used(self) -> None:
+        """Record the last use of answers served from memory."""
+        if self._used:
+            self._connection.executemany(
+                "UPDATE answers SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._used.items()],
+            )
+            self._used.clear()
+
+    def _remember(self, key: bytes, answer: str, created: float) -> None:
+        self._front[key] = (answer, created)
+        self._front.move_to_end(key)
+        while len(self._front) > self.front_entries:
+            self._front.popitem(last=False)
+
+    def _nearest(self, scope: bytes, question: str, now: float) -> Optional[str]:
+        """Answer of the most similar live question in a scope, if similar enough."""
+        if scope not in self._vectors:
+            rows = self._connection.execute(
+                "SELECT key, created, embedding FROM answers"
+                " WHERE scope = ? AND embedding IS NOT NULL",
+                (scope,),
+            ).fetchall()
+            vectors = [np.frombuffer(row[2], dtype=np.float32) for row in rows]
+            self._vectors[scope] = (
+                [row[0] for row in rows],
+                [row[1] for row in rows],
+                np.vstack(vectors) if vectors else np.empty((0, 0), np.float32),
+            )
+        keys, created, vectors = self._vectors[scope]
+        if not keys:
+            return None
+
+        query = self.embedder(question)
+        if query.shape[0] != vectors.shape[1]:
+            return None  # Stored with a different embedder
+        similarities = vectors @ query
+        if self.ttl is not None:
+            similarities[np.asarray(created) + self.ttl <= now] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        row = self._connection.execute(
+            "SELECT answer, created FROM answers WHERE key = ?", (keys[best],)
+        ).fetchone()
+        if row is None:
+            return None
+        self._touch(keys[best], now)
+        return row[0]
+
+    def _evict(self, now: float) -> bool:
+        """Delete expired entries and the least recently used ones beyond max_entries."""
+        evicted = 0
+        if self.ttl is not None:
+            evicted += self._connection.execute(
+                "DELETE FROM answers WHERE created <= ?", (now - self.ttl,)
+            ).rowcount
+        excess = self._count - evicted - self.max_entries
+        if excess > 0:
+            evicted += self._connection.execute(
+                "DELETE FROM answers WHERE key IN"
+                " (SELECT key FROM answers ORDER BY last_used LIMIT ?)",
+                (excess,),
+            ).rowcount
+        self._count -= evicted
+        return evicted > 0
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.semantic_hits, self.misses, len(self))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._flush_used()
+            self._connection.commit()
+        self._connection.close()
+
+    def __enter__(self) -> "AnswerCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
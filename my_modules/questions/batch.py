@@ -0,0 +1,328 @@
+"""
+Batch Q&A Processing
+
+Answers a file of questions without prompting, for long unattended runs. Each
+row of a CSV or JSONL file holds a question and optionally an expert type;
+every question is answered together with its related questions, exactly as
+in the interactive application.
+
+All questions share one limit on API requests in flight and one limit on
+requests per minute. Every finished question is appended to a JSONL
+checkpoint, so rerunning an interrupted batch skips the questions already
+answered. When the batch is done, all answers are written to one
+consolidated JSON file.
+
+Usage:
+    python -m woodshed.modules.questions.batch questions.csv \\
+        --expert-type "financial advisor" --requests-per-minute 50
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from .answer_cache import AnswerCache
+from .config import ConfigTuple
+from .main import (
+    QuestionProcessingContext,
+    answer_with_related,
+    create_answer_cache,
+    create_openai_client,
+    get_config,
+)
+from .prompt_utils import get_prompt
+from .rate_limit import SlidingWindowLimiter
+
+
+class BatchItem(NamedTuple):
+    """One question of a batch."""
+
+    id: str
+    question: str
+    expert_type: str
+
+
+def item_id(question: str, expert_type: str) -> str:
+    """Stable identifier of a question and expert type, used by the checkpoint."""
+    text = f"{expert_type.casefold()}\0{' '.join(question.split())}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def load_batch(
+    path: Path, default_expert_type: Optional[str] = None
+) -> List[BatchItem]:
+    """
+    Read the questions of a batch from a CSV or JSONL file.
+
+    CSV files need a ``question`` column; JSONL lines need a ``question`` key.
+    Both may give an ``expert_type`` and an ``id`` per question. Repeated
+    questions are only kept once.
+
+    Args:
+        path (Path): The .csv or .jsonl file
+        default_expert_type (str, optional): Expert type of rows that give none
+
+    Returns:
+        List[BatchItem]: The questions, in file order
+
+    Raises:
+        ValueError: If the file type is unsupported or a row lacks a question
+            or an expert type
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    elif path.suffix.lower() in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        raise ValueError(f"Unsupported batch file type: {path.suffix}")
+
+    items = []
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        question = (row.get("question") or "").strip()
+        expert_type = (row.get("expert_type") or default_expert_type or "").strip()
+        if not question:
+            raise ValueError(f"Row {number} of {path} has no question")
+        if not expert_type:
+            raise ValueError(f"Row {number} of {path} has no expert type")
+        identifier = str(row.get("id") or item_id(question, expert_type))
+        if identifier in seen:
+            logging.info(f"Skipping repeated question in row {number}")
+            continue
+        seen.add(identifier)
+        items.append(BatchItem(identifier, question, expert_type))
+    return items
+
+
+def load_checkpoint(path: Path) -> Dict[str, Dict]:
+    """
+    Read the answered questions of an earlier run.
+
+    A line cut short by an interruption is ignored, as is any line that is
+    not a record with an ``id``.
+
+    Args:
+        path (Path): The JSONL checkpoint file
+
+    Returns:
+        Dict[str, Dict]: The checkpoint record of every answered question, by id
+    """
+    records = {}
+    if not Path(path).exists():
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "id" in record:
+                records[str(record["id"])] = record
+    return records
+
+
+def truncate_partial_line(path: Path, block_size: int = 1 << 16) -> None:
+    """
+    Cut a checkpoint back to its last complete line.
+
+    A record appended after a line cut short by an interruption would join
+    that line and be lost, so the partial line is removed before appending.
+
+    Args:
+        path (Path): The JSONL checkpoint file
+        block_size (int): Number of bytes read at a time from the end
+    """
+    if not Path(path).exists():
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, 2)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            logging.info(f"Dropping a partial line at the end of {path}")
+            f.truncate(position)
+
+
+def save_batch_output(
+    path: Path, items: List[BatchItem], records: Dict[str, Dict]
+) -> Dict:
+    """
+    Write the answers of a batch to one JSON file, in input order.
+
+    Args:
+        path (Path): The output file
+        items (List[BatchItem]): The questions of the batch
+        records (Dict[str, Dict]): Checkpoint records by question id
+
+    Returns:
+        Dict: The written output
+    """
+    output = {
+        "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+        "total": len(items),
+        "answered": sum(item.id in records for item in items),
+        "failed": [item.id for item in items if item.id not in records],
+        "items": [records[item.id] for item in items if item.id in records],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    return output
+
+
+async def run_batch(
+    items: List[BatchItem],
+    config: ConfigTuple,
+    checkpoint_path: Path,
+    output_path: Path,
+    client=None,
+    cache: Optional[AnswerCache] = None,
+    prompt_getter: Callable[[str], str] = get_prompt,
+) -> Dict:
+    """
+    Answer every question of a batch that the checkpoint does not hold yet.
+
+    At most config.max_concurrency questions are worked on at once, and all
+    of their API requests share the config.max_concurrency and
+    config.requests_per_minute limits. A question that fails is logged and
+    left for the next run.
+
+    Args:
+        items (List[BatchItem]): The questions
+        config (ConfigTuple): The configuration object
+        checkpoint_path (Path): JSONL file recording every answered question
+        output_path (Path): The consolidated JSON output file
+        client (AsyncOpenAI, optional): The API client; created from the config if None
+        cache (AnswerCache, optional): Cache of answers to questions asked before
+        prompt_getter (Callable[[str], str]): Function to get the expert prompt
+
+    Returns:
+        Dict: The consolidated output
+    """
+    client = client or create_openai_client(config)
+    records = load_checkpoint(checkpoint_path)
+    pending = [item for item in items if item.id not in records]
+    logging.info(
+        f"{len(items) - len(pending)} of {len(items)} questions already answered"
+    )
+
+    requests = asyncio.Semaphore(config.max_concurrency)
+    questions = asyncio.Semaphore(config.max_concurrency)
+    rate_limiter = (
+        SlidingWindowLimiter(config.requests_per_minute)
+        if config.requests_per_minute
+        else None
+    )
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+    truncate_partial_line(checkpoint_path)
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        async def process(item: BatchItem):
+            context = QuestionProcessingContext(
+                client=client,
+                question=item.question,
+                expert_type=item.expert_type,
+                config=config,
+                start_animation=lambda _: None,
+                stop_animation=lambda _, __: None,
+                cache=cache,
+                semaphore=requests,
+                rate_limiter=rate_limiter,
+            )
+            async with questions:
+                try:
+                    results = await answer_with_related(context, prompt_getter)
+                except Exception as e:
+                    logging.error(f"Failed to process '{item.question[:50]}': {e}")
+                    return
+            if not any(r["question"] == item.question for r in results):
+                logging.error(f"No answer to '{item.question[:50]}'; will retry")
+                return
+
+            record = {**item._asdict(), "results": results}
+            checkpoint.write(json.dumps(record) + "\n")
+            checkpoint.flush()
+            records[item.id] = record
+            logging.info(f"[{len(records)}/{len(items)}] {item.question[:50]}")
+
+        await asyncio.gather(*(process(item) for item in pending))
+
+    output = save_batch_output(output_path, items, records)
+    logging.info(
+        f"Answered {output['answered']} of {output['total']} questions; "
+        f"results saved to {output_path}"
+    )
+    return output
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Answer a CSV or JSONL file of questions."
+    )
+    parser.add_argument("input", type=Path, help="CSV or JSONL file of questions")
+    parser.add_argument(
+        "--expert-type", help="Expert type of questions that do not name one"
+    )
+    parser.add_argument("--output", type=Path, help="Consolidated JSON output file")
+    parser.add_argument(
+        "--checkpoint", type=Path, help="JSONL checkpoint file used to resume"
+    )
+    parser.add_argument(
+        "--max-concurrency", type=int, help="API requests in flight at once"
+    )
+    parser.add_argument(
+        "--requests-per-minute", type=int, help="API requests started per minute"
+    )
+    parser.add_argument(
+        "--log-to-file", action="store_true", help="Log output to a file"
+    )
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
+    """
+    Run a batch from the command line.
+
+    Args:
+        argv (List[str], optional): Command line arguments; sys.argv if None
+    """
+    args = parse_args(argv)
+    config = get_config(args.log_to_file)
+    overrides = {
+        "max_concurrency": args.max_concurrency,
+        "requests_per_minute": args.requests_per_minute,
+    }
+    config = config._replace(**{k: v for k, v in overrides.items() if v is not None})
+
+    items = load_batch(args.input, args.expert_type)
+    output_path = args.output or config.output_dir / f"batch_{args.input.stem}.json"
+    checkpoint_path = args.checkpoint or output_path.with_suffix(".checkpoint.jsonl")
+
+    cache = create_answer_cache(config)
+    try:
+        await run_batch(items, config, checkpoint_path, output_path, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main())
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 
 class ConfigTuple(NamedTuple):
@@ -9,3 +9,9 @@ class ConfigTuple(NamedTuple):
     log_to_file: bool
     model_name: str
     base_url: str
+    max_concurrency: int = 5  # API requests in flight at once
+    request_timeout: float = 60.0  # Seconds allowed for each API request
+    requests_per_minute: Optional[int] = None  # API request rate limit; None for none
+    answer_cache_path: Optional[Path] = None  # SQLite answer cache; None disables it
+    answer_cache_ttl: float = 24 * 3600.0  # Seconds a cached answer stays valid
+    semantic_cache: bool = False  # Also reuse answers of near-identical questions
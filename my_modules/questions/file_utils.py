@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
@@ -7,41 +8,75 @@ from typing import Dict, List
 from .config import ConfigTuple
 
 
+class ResultsWriter:
+    """
+    Write results to JSON and Markdown files one at a time, as they arrive.
+
+    The Markdown file is appended to and the JSON file is rewritten with every
+    result, so both always hold the complete results received so far.
+
+    Example:
+        writer = ResultsWriter(config, original_question, timestamp)
+        for result in results:
+            writer.append(result)
+        writer.close()
+    """
+
+    def __init__(self, config: ConfigTuple, original_question: str, timestamp: str):
+        base_name = f"questions_{timestamp}"
+        self.json_path = config.output_dir / f"{base_name}.json"
+        self.md_path = config.output_dir / f"{base_name}.md"
+        self.original_question = original_question
+        self.timestamp = timestamp
+        self.results: List[Dict] = []
+
+        # Ensure output directory exists
+        config.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self._write_json()
+        with open(self.md_path, "w") as f:
+            f.write(f"# Q&A Results\n\n")
+            f.write(
+                f"*Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n"
+            )
+            f.write(f"## Original Question\n\n{original_question}\n\n")
+            f.write("## Detailed Analysis\n\n")
+
+    def _write_json(self):
+        output = {
+            "original_question": self.original_question,
+            "timestamp": self.timestamp,
+            "results": self.results,
+        }
+        # Replace the file in one step so readers never see half of it
+        tmp_path = self.json_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(output, f, indent=2)
+        os.replace(tmp_path, self.json_path)
+
+    def append(self, result: Dict):
+        """Add a result to both files."""
+        self.results.append(result)
+        self._write_json()
+        with open(self.md_path, "a") as f:
+            if len(self.results) > 1:
+                f.write("---\n\n")
+            f.write(f"### Question {len(self.results)}\n\n")
+            f.write(f"**Q:** {result['question']}\n\n")
+            f.write(f"**A:** {result['answer']}\n\n")
+
+    def close(self):
+        """Log where the results were saved."""
+        logging.info(f"\nResults saved to:")
+        logging.info(f"- JSON: {self.json_path}")
+        logging.info(f"- Markdown: {self.md_path}")
+
+
 def save_results(
     config: ConfigTuple, original_question: str, results: List[Dict], timestamp: str
 ):
     """Save results to both JSON and Markdown files."""
-    base_name = f"questions_{timestamp}"
-    json_path = config.output_dir / f"{base_name}.json"
-    md_path = config.output_dir / f"{base_name}.md"
-
-    output = {
-        "original_question": original_question,
-        "timestamp": timestamp,
-        "results": results,
-    }
-
-    # Ensure output directory exists
-    config.output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Save JSON
-    with open(json_path, "w") as f:
-        json.dump(output, f, indent=2)
-
-    # Save Markdown
-    with open(md_path, "w") as f:
-        f.write(f"# Q&A Results\n\n")
-        f.write(f"*Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
-        f.write(f"## Original Question\n\n{original_question}\n\n")
-        f.write("## Detailed Analysis\n\n")
-
-        for i, result in enumerate(results, 1):
-            f.write(f"### Question {i}\n\n")
-            f.write(f"**Q:** {result['question']}\n\n")
-            f.write(f"**A:** {result['answer']}\n\n")
-            if i < len(results):
-                f.write("---\n\n")
-
-    logging.info(f"\nResults saved to:")
-    logging.info(f"- JSON: {json_path}")
-    logging.info(f"- Markdown: {md_path}")
+    writer = ResultsWriter(config, original_question, timestamp)
+    for result in results:
+        writer.append(result)
+    writer.close()
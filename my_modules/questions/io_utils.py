@@ -46,7 +46,18 @@ def display_results(results: List[Dict]):
     logging.info("\nResults:")
     logging.info("=" * 80)
     for i, result in enumerate(results, 1):
-        logging.info(f"\nQuestion {i}: {result['question']}")
-        logging.info("-" * 40)
-        logging.info(f"Answer: {result['answer']}")
-        logging.info("=" * 80)
+        display_result(i, result)
+
+
+def display_result(index: int, result: Dict):
+    """
+    Display a single Q&A result.
+
+    Args:
+        index (int): The position of the result, starting at 1.
+        result (Dict): The result containing a question and its answer.
+    """
+    logging.info(f"\nQuestion {index}: {result['question']}")
+    logging.info("-" * 40)
+    logging.info(f"Answer: {result['answer']}")
+    logging.info("=" * 80)
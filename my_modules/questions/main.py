@@ -12,25 +12,28 @@ import logging
 import os
 import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from functools import lru_cache
 from pathlib import Path
-from typing import Callable, Dict, List, NamedTuple, Tuple
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from .animation_utils import create_progress_animation
+from .answer_cache import AnswerCache
 from .config import ConfigTuple
-from .file_utils import save_results
+from .file_utils import ResultsWriter, save_results
 from .io_utils import (
+    display_result,
     display_results,
     get_expert_type,
     get_user_choice,
     get_user_question,
 )
 from .prompt_utils import get_prompt
+from .rate_limit import SlidingWindowLimiter
 
 
 @dataclass
@@ -65,12 +68,21 @@ class QuestionProcessingContext:
        - Consolidates type hints and documentation
 
     Attributes:
-        client (OpenAI): The OpenAI client instance for making API calls
+        client (AsyncOpenAI): The async OpenAI client instance for making API calls
         question (str): The user's input question to be processed
         expert_type (str): The type of expert providing the answer (e.g., "financial advisor")
         config (ConfigTuple): Configuration settings for the application
         start_animation (Callable): Function to start the progress animation
         stop_animation (Callable): Function to stop the progress animation
+        stream (bool): Show and save each answer as soon as it arrives instead of
+            waiting for all of them
+        cache (AnswerCache, optional): Answers questions asked before without
+            calling the API
+        semaphore (asyncio.Semaphore, optional): Limits API requests in flight;
+            created from config.max_concurrency if None. Contexts sharing one
+            semaphore share the limit
+        rate_limiter (SlidingWindowLimiter, optional): Limits API requests per minute;
+            created from config.requests_per_minute if None
 
     Example:
         context = QuestionProcessingContext(
@@ -84,12 +96,22 @@ class QuestionProcessingContext:
         await process_single_question(context)
     """
 
-    client: OpenAI
+    client: AsyncOpenAI
     question: str
     expert_type: str
     config: ConfigTuple
     start_animation: Callable
     stop_animation: Callable
+    stream: bool = False
+    cache: Optional[AnswerCache] = None
+    semaphore: Optional[asyncio.Semaphore] = field(default=None, repr=False)
+    rate_limiter: Optional[SlidingWindowLimiter] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        if self.rate_limiter is None and self.config.requests_per_minute:
+            self.rate_limiter = SlidingWindowLimiter(self.config.requests_per_minute)
 
 
 def load_env_vars() -> str:
@@ -127,20 +149,128 @@ def get_config(log_to_file: bool = False) -> ConfigTuple:
         log_to_file=log_to_file,
         model_name="llama-3.1-sonar-large-128k-online",
         base_url="https://api.perplexity.ai",
+        answer_cache_path=Path("data/cache/answers.sqlite3"),
     )
 
 
-def create_openai_client(config: ConfigTuple) -> OpenAI:
+def create_openai_client(config: ConfigTuple) -> AsyncOpenAI:
     """
-    Create an OpenAI client with the provided configuration.
+    Create an async OpenAI client with the provided configuration.
 
     Args:
         config (ConfigTuple): The configuration object containing API settings.
 
     Returns:
-        OpenAI: An instance of the OpenAI client.
+        AsyncOpenAI: An instance of the async OpenAI client.
+    """
+    return AsyncOpenAI(api_key=config.perplexity_api_key, base_url=config.base_url)
+
+
+def create_answer_cache(config: ConfigTuple) -> Optional[AnswerCache]:
+    """
+    Open the answer cache described by the configuration.
+
+    Args:
+        config (ConfigTuple): The configuration object containing cache settings.
+
+    Returns:
+        Optional[AnswerCache]: The cache, or None if config.answer_cache_path is None.
+    """
+    if config.answer_cache_path is None:
+        return None
+    return AnswerCache(
+        config.answer_cache_path,
+        ttl=config.answer_cache_ttl,
+        semantic=config.semantic_cache,
+    )
+
+
+async def _request_completion(
+    context: QuestionProcessingContext,
+    messages: List[Dict],
+    on_token: Optional[Callable[[str], None]],
+) -> str:
+    """Send one chat completion request, streaming it if on_token is given."""
+    if on_token is None:
+        response = await context.client.chat.completions.create(
+            model=context.config.model_name,
+            messages=messages,
+        )
+        return response.choices[0].message.content
+
+    stream = await context.client.chat.completions.create(
+        model=context.config.model_name,
+        messages=messages,
+        stream=True,
+    )
+    tokens = []
+    async for chunk in stream:
+        token = chunk.choices[0].delta.content if chunk.choices else None
+        if token:
+            tokens.append(token)
+            on_token(token)
+    return "".join(tokens)
+
+
+async def create_completion(
+    context: QuestionProcessingContext,
+    messages: List[Dict],
+    on_token: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Request a chat completion without blocking the event loop.
+
+    At most config.max_concurrency requests run at once, and at most
+    config.requests_per_minute start in any minute; the others wait before
+    their timeout starts.
+
+    Args:
+        context (QuestionProcessingContext): The context object containing all necessary parameters
+        messages (List[Dict]): The chat messages to send
+        on_token (Callable[[str], None], optional): Called with each piece of
+            the reply as the model streams it; the reply is not streamed if None
+
+    Returns:
+        str: The content of the reply
+
+    Raises:
+        asyncio.TimeoutError: If the request, including any streaming, takes
+            longer than config.request_timeout
     """
-    return OpenAI(api_key=config.perplexity_api_key, base_url=config.base_url)
+    async with context.semaphore:
+        if context.rate_limiter is not None:
+            await context.rate_limiter.acquire()
+        return await asyncio.wait_for(
+            _request_completion(context, messages, on_token),
+            timeout=context.config.request_timeout,
+        )
+
+
+def parse_related_question(line: str) -> Optional[str]:
+    """
+    Extract a related question from one line of the model's reply.
+
+    Args:
+        line (str): A line of the reply
+
+    Returns:
+        Optional[str]: The question if the line is one of the numbered items 1-5,
+            otherwise None
+    """
+    line = line.strip()
+    if line and any(line.startswith(str(i)) for i in range(1, 6)):
+        return line
+    return None
+
+
+def related_questions_messages(
+    context: QuestionProcessingContext, prompt_getter: Callable[[str], str]
+) -> List[Dict]:
+    """Build the chat messages that ask for related questions."""
+    return [
+        {"role": "system", "content": prompt_getter(context.expert_type)},
+        {"role": "user", "content": context.question},
+    ]
 
 
 async def generate_related_questions(
@@ -157,70 +287,305 @@ async def generate_related_questions(
     Returns:
         List[str]: A list of related questions generated by the model
     """
-    expert_prompt = prompt_getter(context.expert_type)
+    messages = related_questions_messages(context, prompt_getter)
+    content = await create_completion(context, messages)
 
-    messages = [
-        {"role": "system", "content": expert_prompt},
-        {"role": "user", "content": context.question},
-    ]
+    questions = [parse_related_question(line) for line in content.split("\n")]
+    return [q for q in questions if q]
 
-    response = context.client.chat.completions.create(
-        model=context.config.model_name,
-        messages=messages,
+
+async def stream_related_questions(
+    context: QuestionProcessingContext,
+    prompt_getter: Callable[[str], str] = get_prompt,
+) -> AsyncIterator[str]:
+    """
+    Generate related questions, yielding each one as soon as its line is complete.
+
+    Args:
+        context (QuestionProcessingContext): The context object containing all necessary parameters
+        prompt_getter (Callable[[str], str]): Function to get the expert prompt
+
+    Yields:
+        str: The related questions, in the order the model writes them
+
+    Raises:
+        asyncio.TimeoutError: If the request takes longer than config.request_timeout
+    """
+    messages = related_questions_messages(context, prompt_getter)
+    tokens: asyncio.Queue = asyncio.Queue()
+    request = asyncio.ensure_future(
+        create_completion(context, messages, tokens.put_nowait)
     )
+    # Every token is queued before the request completes
+    request.add_done_callback(tokens.put_nowait)
 
-    return [
-        q.strip()
-        for q in response.choices[0].message.content.split("\n")
-        if q.strip() and any(q.strip().startswith(str(i)) for i in range(1, 6))
-    ]
+    buffer = ""
+    try:
+        while (token := await tokens.get()) is not request:
+            buffer += token
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                question = parse_related_question(line)
+                if question:
+                    yield question
+        request.result()
+        question = parse_related_question(buffer)
+        if question:
+            yield question
+    finally:
+        request.cancel()
 
 
-async def get_answer(context: QuestionProcessingContext, question: str) -> Dict:
+async def get_answer(
+    context: QuestionProcessingContext,
+    question: str,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> Dict:
     """
     Get an answer for a specific question using the Perplexity API.
 
+    A question found in context.cache is answered from the cache, without
+    calling the API; on_token then receives the whole answer at once.
+
     Args:
         context (QuestionProcessingContext): The context object containing all necessary parameters
         question (str): The specific question to answer
+        on_token (Callable[[str], None], optional): Called with each piece of
+            the answer as the model streams it
 
     Returns:
         Dict: A dictionary containing the question and its answer
     """
+    system_prompt = (
+        f"You are a {context.expert_type}. Provide a clear, concise, and accurate "
+        "answer to the following question."
+    )
+    cache_key = (context.config.model_name, context.expert_type, system_prompt)
+
+    if context.cache is not None:
+        answer = context.cache.get(*cache_key, question)
+        if answer is not None:
+            if on_token is not None:
+                on_token(answer)
+            return {"question": question, "answer": answer}
+
     messages = [
-        {
-            "role": "system",
-            "content": (
-                f"You are a {context.expert_type}. Provide a clear, concise, and accurate "
-                "answer to the following question."
-            ),
-        },
+        {"role": "system", "content": system_prompt},
         {"role": "user", "content": question},
     ]
 
-    response = context.client.chat.completions.create(
-        model=context.config.model_name,
-        messages=messages,
-    )
+    answer = await create_completion(context, messages, on_token)
+
+    if context.cache is not None:
+        context.cache.put(*cache_key, question, answer)
+    return {"question": question, "answer": answer}
 
-    return {"question": question, "answer": response.choices[0].message.content}
+
+def failure_reason(context: QuestionProcessingContext, error: BaseException) -> str:
+    """Describe why an API request failed."""
+    if isinstance(error, asyncio.TimeoutError):
+        return f"timed out after {context.config.request_timeout}s"
+    return str(error)
+
+
+def log_failure(
+    context: QuestionProcessingContext, question: str, error: BaseException
+):
+    """Log a question whose answer could not be fetched."""
+    logging.error(
+        f"Failed to answer '{question[:50]}': {failure_reason(context, error)}"
+    )
 
 
 async def process_questions(
     context: QuestionProcessingContext, questions: List[str]
 ) -> List[Dict]:
     """
-    Process multiple questions in parallel.
+    Process multiple questions concurrently.
+
+    All requests are started together and bounded by config.max_concurrency,
+    so the wall time is close to that of the slowest answer. A question whose
+    request fails or times out is logged and left out of the results.
 
     Args:
         context (QuestionProcessingContext): The context object containing all necessary parameters
         questions (List[str]): A list of questions to process
 
     Returns:
-        List[Dict]: A list of dictionaries containing questions and their answers
+        List[Dict]: A list of dictionaries containing questions and their answers,
+            in the order of the questions
     """
     tasks = [get_answer(context, question) for question in questions]
-    return await asyncio.gather(*tasks)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    answers = []
+    for question, result in zip(questions, results):
+        if isinstance(result, BaseException):
+            log_failure(context, question, result)
+        else:
+            answers.append(result)
+    return answers
+
+
+async def answer_or_none(
+    context: QuestionProcessingContext,
+    question: str,
+    on_token: Optional[Callable[[str, str], None]] = None,
+) -> Optional[Dict]:
+    """Get an answer, logging a failure and returning None instead of raising."""
+    token_callback = (
+        None if on_token is None else (lambda token: on_token(question, token))
+    )
+    try:
+        return await get_answer(context, question, token_callback)
+    except Exception as e:
+        log_failure(context, question, e)
+        return None
+
+
+async def iter_answers(
+    context: QuestionProcessingContext,
+    questions: List[str],
+    on_token: Optional[Callable[[str, str], None]] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Answer questions concurrently and yield each answer as soon as it is complete.
+
+    Args:
+        context (QuestionProcessingContext): The context object containing all necessary parameters
+        questions (List[str]): A list of questions to process
+        on_token (Callable[[str, str], None], optional): Called with the question
+            and each piece of its answer as the model streams it
+
+    Yields:
+        Dict: The question and its answer, in order of completion. Failed
+            questions are logged and skipped.
+    """
+
+    tasks = [
+        asyncio.ensure_future(answer_or_none(context, question, on_token))
+        for question in questions
+    ]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            if result is not None:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def iter_pipeline_answers(
+    context: QuestionProcessingContext,
+    prompt_getter: Callable[[str], str] = get_prompt,
+    on_token: Optional[Callable[[str, str], None]] = None,
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Answer the original question and its related questions as one dependency graph.
+
+    The original question is answered while the related questions are still
+    being generated, and each related question is sent off as soon as its
+    line of the streamed reply is complete. If related question generation
+    fails, the original answer is still yielded.
+
+    Args:
+        context (QuestionProcessingContext): The context object containing all necessary parameters
+        prompt_getter (Callable[[str], str]): Function to get the expert prompt
+        on_token (Callable[[str, str], None], optional): Called with the question
+            and each piece of its answer as the model streams it
+
+    Yields:
+        Tuple[int, Dict]: The position of the question (0 for the original
+            question, then the related questions in the order they were
+            generated) and its answer, in order of completion. Failed
+            questions are logged and skipped.
+    """
+    finished: asyncio.Queue = asyncio.Queue()
+    tasks = []
+
+    def dispatch(question: str):
+        task = asyncio.ensure_future(answer_or_none(context, question, on_token))
+        task.add_done_callback(finished.put_nowait)
+        tasks.append(task)
+
+    async def expand():
+        try:
+            async for question in stream_related_questions(context, prompt_getter):
+                dispatch(question)
+        except Exception as e:
+            reason = failure_reason(context, e)
+            logging.error(f"Failed to generate related questions: {reason}")
+
+    dispatch(context.question)
+    expander = asyncio.ensure_future(expand())
+    expander.add_done_callback(finished.put_nowait)
+
+    expanding = True
+    answered = 0
+    try:
+        while expanding or answered < len(tasks):
+            task = await finished.get()
+            if task is expander:
+                expanding = False
+                continue
+            answered += 1
+            result = task.result()
+            if result is not None:
+                yield tasks.index(task), result
+    finally:
+        expander.cancel()
+        for task in tasks:
+            task.cancel()
+
+
+async def answer_with_related(
+    context: QuestionProcessingContext,
+    prompt_getter: Callable[[str], str] = get_prompt,
+) -> List[Dict]:
+    """
+    Answer the original question and its related questions.
+
+    Args:
+        context (QuestionProcessingContext): The context object containing all necessary parameters
+        prompt_getter (Callable[[str], str]): Function to get the expert prompt
+
+    Returns:
+        List[Dict]: The answers, original question first and then the related
+            questions in the order they were generated
+    """
+    answers = [pair async for pair in iter_pipeline_answers(context, prompt_getter)]
+    return [result for _, result in sorted(answers, key=lambda pair: pair[0])]
+
+
+async def stream_answers(
+    context: QuestionProcessingContext, answers: AsyncIterator[Dict]
+):
+    """
+    Display and save each answer as soon as it arrives.
+
+    The JSON and Markdown files are created up front and grow with every
+    answer, so an interrupted run keeps the answers received so far.
+
+    Args:
+        context (QuestionProcessingContext): The context object containing all necessary parameters
+        answers (AsyncIterator[Dict]): The answers, as they complete
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    writer = ResultsWriter(context.config, context.question, timestamp)
+
+    task = context.start_animation("Fetching answers")
+    try:
+        async for result in answers:
+            if task is not None:
+                context.stop_animation(task, len("Fetching answers"))
+                task = None
+            writer.append(result)
+            display_result(len(writer.results), result)
+    finally:
+        if task is not None:
+            context.stop_animation(task, len("Fetching answers"))
+        writer.close()
 
 
 async def process_single_question(context: QuestionProcessingContext):
@@ -232,15 +597,14 @@ async def process_single_question(context: QuestionProcessingContext):
             for processing the question
     """
     try:
-        # Generate related questions
-        task = context.start_animation("Generating related questions")
-        related_questions = await generate_related_questions(context)
-        context.stop_animation(task, len("Generating related questions"))
+        if context.stream:
+            answers = iter_pipeline_answers(context)
+            await stream_answers(context, (result async for _, result in answers))
+            return
 
-        # Process all questions
+        # Answer the question while its related questions are generated
         task = context.start_animation("Fetching answers")
-        all_questions = [context.question] + related_questions
-        results = await process_questions(context, all_questions)
+        results = await answer_with_related(context)
         context.stop_animation(task, len("Fetching answers"))
 
         # Display and save results
@@ -253,7 +617,9 @@ async def process_single_question(context: QuestionProcessingContext):
         logging.error("Please try again or enter 'quit' to exit.")
 
 
-async def pipeline(question: str, expert_type: str, config: ConfigTuple):
+async def pipeline(
+    question: str, expert_type: str, config: ConfigTuple, stream: bool = False
+):
     """
     Core processing logic for the Q&A application.
 
@@ -261,8 +627,10 @@ async def pipeline(question: str, expert_type: str, config: ConfigTuple):
         question (str): The user's question
         expert_type (str): The type of expert
         config (ConfigTuple): The configuration object
+        stream (bool): Show and save each answer as soon as it arrives
     """
     client = create_openai_client(config)
+    cache = create_answer_cache(config)
     start_animation, stop_animation = create_progress_animation()
 
     logging.info("Welcome to the Q&A Assistant!")
@@ -275,14 +643,29 @@ async def pipeline(question: str, expert_type: str, config: ConfigTuple):
         config=config,
         start_animation=start_animation,
         stop_animation=stop_animation,
+        stream=stream,
+        cache=cache,
     )
 
-    await process_single_question(context)
+    try:
+        await process_single_question(context)
+    finally:
+        if cache is not None:
+            hits, semantic_hits, misses, _ = cache.stats
+            logging.info(
+                f"Answer cache: {hits} hits, {semantic_hits} similar, {misses} misses"
+            )
+            cache.close()
 
     print("\nThank you for using the Q&A Assistant!")
 
 
-async def main(question: str = None, expert_type: str = None, log_to_file: bool = None):
+async def main(
+    question: str = None,
+    expert_type: str = None,
+    log_to_file: bool = None,
+    stream: bool = False,
+):
     """
     Main function to run the Q&A application.
 
@@ -290,6 +673,7 @@ async def main(question: str = None, expert_type: str = None, log_to_file: bool
         question (str, optional): The user's question
         expert_type (str, optional): The type of expert
         log_to_file (bool, optional): Whether to log output to a file
+        stream (bool): Show and save each answer as soon as it arrives
     """
     try:
         if log_to_file is None:
@@ -302,7 +686,7 @@ async def main(question: str = None, expert_type: str = None, log_to_file: bool
         if expert_type is None:
             expert_type = get_expert_type()
 
-        await pipeline(question, expert_type, config)
+        await pipeline(question, expert_type, config, stream)
 
     except KeyboardInterrupt:
         logging.info("\n\nProgram interrupted by user. Exiting...")
@@ -313,4 +697,4 @@ async def main(question: str = None, expert_type: str = None, log_to_file: bool
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(stream="--stream" in sys.argv[1:]))
@@ -0,0 +1,47 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+
+class SlidingWindowLimiter:
+    """
+    Allow at most ``max_calls`` calls in any ``period`` seconds.
+
+    Unlike a token bucket, which refills gradually and lets a full bucket be
+    spent at once, the window is a hard cap on calls started in any rolling
+    period. That is how providers count requests-per-minute quotas, so a
+    batch run never bursts past them.
+
+    Example:
+        limiter = SlidingWindowLimiter(max_calls=50, period=60)
+        await limiter.acquire()  # Waits while 50 calls were made in the last minute
+    """
+
+    def __init__(
+        self,
+        max_calls: int,
+        period: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        if max_calls < 1:
+            raise ValueError("max_calls must be at least 1")
+        self.max_calls = max_calls
+        self.period = period
+        self.clock = clock
+        self.sleep = sleep
+        self._calls = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until another call fits in the window, then record it."""
+        async with self._lock:
+            while True:
+                now = self.clock()
+                while self._calls and self._calls[0] <= now - self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                await self.sleep(self._calls[0] + self.period - now)
@@ -0,0 +1,159 @@
+import time
+
+import numpy as np
+import pytest
+
+from .answer_cache import AnswerCache, HashingEmbedder, normalize_question
+
+MODEL = "test-model"
+EXPERT = "tax expert"
+PROMPT = "You are a tax expert."
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    with AnswerCache(tmp_path / "answers.sqlite3", clock=clock) as cache:
+        yield cache
+
+
+def test_normalize_question():
+    assert normalize_question("  What is  APR? ") == "what is apr"
+
+
+def test_repeated_question_is_a_hit(cache):
+    assert cache.get(MODEL, EXPERT, PROMPT, "What is APR?") is None
+    cache.put(MODEL, EXPERT, PROMPT, "What is APR?", "An annual rate.")
+
+    assert cache.get(MODEL, EXPERT, PROMPT, "what is  APR") == "An annual rate."
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.entries == 1
+
+
+def test_answers_are_keyed_by_model_expert_and_prompt(cache):
+    cache.put(MODEL, EXPERT, PROMPT, "What is APR?", "An annual rate.")
+
+    assert cache.get("other-model", EXPERT, PROMPT, "What is APR?") is None
+    assert cache.get(MODEL, "financial advisor", PROMPT, "What is APR?") is None
+    assert cache.get(MODEL, EXPERT, "Be brief.", "What is APR?") is None
+
+
+def test_answers_expire_after_ttl(tmp_path, clock):
+    with AnswerCache(tmp_path / "answers.sqlite3", ttl=60, clock=clock) as cache:
+        cache.put(MODEL, EXPERT, PROMPT, "What is APR?", "An annual rate.")
+        clock.now += 30
+        assert cache.get(MODEL, EXPERT, PROMPT, "What is APR?") == "An annual rate."
+        clock.now += 31
+        assert cache.get(MODEL, EXPERT, PROMPT, "What is APR?") is None
+
+
+def test_answers_persist_across_instances(tmp_path):
+    path = tmp_path / "answers.sqlite3"
+    with AnswerCache(path) as cache:
+        cache.put(MODEL, EXPERT, PROMPT, "What is APR?", "An annual rate.")
+
+    with AnswerCache(path) as cache:
+        assert cache.get(MODEL, EXPERT, PROMPT, "What is APR?") == "An annual rate."
+
+
+def test_least_recently_used_answers_are_evicted(tmp_path, clock):
+    with AnswerCache(tmp_path / "answers.sqlite3", max_entries=2, clock=clock) as cache:
+        for question in ("a", "b"):
+            cache.put(MODEL, EXPERT, PROMPT, question, question.upper())
+            clock.now += 1
+        cache.get(MODEL, EXPERT, PROMPT, "a")
+        clock.now += 1
+        cache.put(MODEL, EXPERT, PROMPT, "c", "C")
+
+        assert len(cache) == 2
+        assert cache.get(MODEL, EXPERT, PROMPT, "a") == "A"
+        assert cache.get(MODEL, EXPERT, PROMPT, "b") is None
+
+
+def test_answer_stored_by_an_evicting_put_stays_in_memory(tmp_path, clock):
+    with AnswerCache(tmp_path / "answers.sqlite3", max_entries=1, clock=clock) as cache:
+        cache.put(MODEL, EXPERT, PROMPT, "a", "A")
+        clock.now += 1
+        cache.put(MODEL, EXPERT, PROMPT, "b", "B")
+
+        scope = AnswerCache.scope(MODEL, EXPERT, PROMPT)
+        assert list(cache._front) == [AnswerCache.key(scope, "b")]
+        assert cache.get(MODEL, EXPERT, PROMPT, "b") == "B"
+
+
+def test_replacing_an_answer_keeps_the_entry_count(cache):
+    cache.put(MODEL, EXPERT, PROMPT, "What is APR?", "An annual rate.")
+    cache.put(MODEL, EXPERT, PROMPT, "what is APR", "A yearly rate.")
+
+    assert len(cache) == 1
+    assert cache.get(MODEL, EXPERT, PROMPT, "What is APR?") == "A yearly rate."
+
+
+def test_semantic_lookup_finds_near_repeats(tmp_path):
+    with AnswerCache(
+        tmp_path / "answers.sqlite3", semantic=True, similarity_threshold=0.8
+    ) as cache:
+        cache.put(
+            MODEL,
+            EXPERT,
+            PROMPT,
+            "What are the tax implications of remote work?",
+            "It depends on where you live.",
+        )
+
+        answer = cache.get(
+            MODEL, EXPERT, PROMPT, "What are the tax implications for remote work"
+        )
+        assert answer == "It depends on where you live."
+        assert cache.get(MODEL, EXPERT, PROMPT, "How do index funds work?") is None
+        assert cache.stats.semantic_hits == 1
+        assert cache.stats.misses == 1
+
+
+def test_semantic_put_after_a_miss_on_an_empty_cache(tmp_path):
+    with AnswerCache(
+        tmp_path / "answers.sqlite3", semantic=True, similarity_threshold=0.8
+    ) as cache:
+        question = "What are the tax implications of remote work?"
+        assert cache.get(MODEL, EXPERT, PROMPT, question) is None
+        cache.put(MODEL, EXPERT, PROMPT, question, "It depends on where you live.")
+        cache.put(MODEL, EXPERT, PROMPT, "How do bonds work?", "They pay coupons.")
+
+        answer = cache.get(
+            MODEL, EXPERT, PROMPT, "What are the tax implications for remote work"
+        )
+        assert answer == "It depends on where you live."
+        assert cache.stats.semantic_hits == 1
+
+
+def test_hashing_embedder_is_normalized_and_deterministic():
+    embed = HashingEmbedder(dim=256)
+    vector = embed("What is compound interest?")
+
+    assert vector.shape == (256,)
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, HashingEmbedder(dim=256)("what is compound interest"))
+
+
+def test_front_cache_hits_are_fast(cache):
+    cache.put(MODEL, EXPERT, PROMPT, "What is APR?", "An annual rate.")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        cache.get(MODEL, EXPERT, PROMPT, "What is APR?")
+    per_hit = (time.perf_counter() - start) / 1000
+
+    assert per_hit < 1e-4
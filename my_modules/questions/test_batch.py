@@ -0,0 +1,209 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from .batch import (
+    BatchItem,
+    load_batch,
+    load_checkpoint,
+    run_batch,
+    truncate_partial_line,
+)
+from .config import ConfigTuple
+from .rate_limit import SlidingWindowLimiter
+
+RELATED_PROMPT = "Suggest related questions"
+
+
+class FakeCompletions:
+    """Answers every question and suggests one related question per question."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def create(self, model, messages, stream=False):
+        question = messages[-1]["content"]
+        self.calls.append(question)
+        await asyncio.sleep(0.01)
+        if question in self.failing:
+            raise RuntimeError("API unavailable")
+        if messages[0]["content"] == RELATED_PROMPT:
+            content = f"1. More about {question}"
+        else:
+            content = f"Answer to {question}"
+        if stream:
+            return self._stream(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, content):
+        delta = SimpleNamespace(content=content)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def config(tmp_path):
+    return ConfigTuple(
+        perplexity_api_key="test",
+        output_dir=tmp_path,
+        log_file="app.log",
+        log_to_file=False,
+        model_name="test-model",
+        base_url="http://localhost",
+    )
+
+
+def test_load_batch_from_csv(tmp_path):
+    path = tmp_path / "questions.csv"
+    path.write_text(
+        "question,expert_type\n"
+        "What is APR?,tax expert\n"
+        "How do bonds work?,\n"
+        "What is APR?,tax expert\n"
+    )
+
+    items = load_batch(path, default_expert_type="financial advisor")
+
+    assert [(i.question, i.expert_type) for i in items] == [
+        ("What is APR?", "tax expert"),
+        ("How do bonds work?", "financial advisor"),
+    ]
+
+
+def test_load_batch_from_jsonl(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text(
+        json.dumps({"id": "q1", "question": "What is APR?", "expert_type": "tax"})
+        + "\n\n"
+    )
+
+    assert load_batch(path) == [BatchItem("q1", "What is APR?", "tax")]
+
+
+def test_load_batch_requires_an_expert_type(tmp_path):
+    path = tmp_path / "questions.csv"
+    path.write_text("question\nWhat is APR?\n")
+
+    with pytest.raises(ValueError):
+        load_batch(path)
+
+
+def test_load_checkpoint_ignores_a_truncated_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text(json.dumps({"id": "q1", "results": []}) + '\n{"id": "q2", "res')
+
+    assert list(load_checkpoint(path)) == ["q1"]
+
+
+def test_load_checkpoint_ignores_lines_that_are_not_records(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('[1, 2]\n"text"\n{"results": []}\n{"id": "q1"}\n')
+
+    assert list(load_checkpoint(path)) == ["q1"]
+
+
+def test_truncate_partial_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('{"id": "a"}\n{"id": "b", "resu')
+
+    truncate_partial_line(path, block_size=4)
+    with open(path, "a") as f:
+        f.write('{"id": "c"}\n')
+
+    assert list(load_checkpoint(path)) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_resumes_after_failures(tmp_path, config):
+    items = [BatchItem(f"q{i}", f"Question {i}", "tester") for i in range(3)]
+    checkpoint = tmp_path / "batch.checkpoint.jsonl"
+    output_path = tmp_path / "batch.json"
+
+    completions = FakeCompletions(failing={"Question 1"})
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    output = await run_batch(
+        items,
+        config,
+        checkpoint,
+        output_path,
+        client,
+        prompt_getter=lambda _: RELATED_PROMPT,
+    )
+    assert output["answered"] == 2
+    assert output["failed"] == ["q1"]
+
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    output = await run_batch(
+        items,
+        config,
+        checkpoint,
+        output_path,
+        client,
+        prompt_getter=lambda _: RELATED_PROMPT,
+    )
+
+    # Only the failed question is asked again
+    assert set(completions.calls) == {"Question 1", "1. More about Question 1"}
+    with open(output_path) as f:
+        saved = json.load(f)
+    assert saved == output
+    assert [item["id"] for item in saved["items"]] == ["q0", "q1", "q2"]
+    assert [r["question"] for r in saved["items"][1]["results"]] == [
+        "Question 1",
+        "1. More about Question 1",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_resumes_after_a_truncated_checkpoint(tmp_path, config):
+    items = [BatchItem(f"q{i}", f"Question {i}", "tester") for i in range(3)]
+    checkpoint = tmp_path / "batch.checkpoint.jsonl"
+    output_path = tmp_path / "batch.json"
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    await run_batch(
+        items[:1],
+        config,
+        checkpoint,
+        output_path,
+        client,
+        prompt_getter=lambda _: RELATED_PROMPT,
+    )
+    # The run was interrupted while writing the record of q1
+    with open(checkpoint, "a") as f:
+        f.write('{"id": "q1", "question": "Quest')
+
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    output = await run_batch(
+        items,
+        config,
+        checkpoint,
+        output_path,
+        client,
+        prompt_getter=lambda _: RELATED_PROMPT,
+    )
+
+    assert "Question 0" not in completions.calls
+    assert output["answered"] == 3
+    assert set(load_checkpoint(checkpoint)) == {"q0", "q1", "q2"}
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_for_the_window():
+    now = [0.0]
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    limiter = SlidingWindowLimiter(2, period=60, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        await limiter.acquire()
+        now[0] += 1
+
+    assert waits == [58.0]
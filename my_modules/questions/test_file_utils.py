@@ -6,7 +6,7 @@ from pathlib import Path
 import pytest
 
 from .config import ConfigTuple
-from .file_utils import save_results
+from .file_utils import ResultsWriter, save_results
 
 
 @pytest.fixture
@@ -57,3 +57,26 @@ def test_save_results(setup_output_dir):
     # Clean up
     os.remove(json_file)
     os.remove(md_file)
+
+
+def test_results_writer_appends_incrementally(setup_output_dir):
+    """Test that ResultsWriter keeps both files complete after every result."""
+    config = setup_output_dir
+    writer = ResultsWriter(config, "What is the capital of France?", "20240101_000000")
+
+    with open(writer.json_path) as f:
+        assert json.load(f)["results"] == []
+
+    first = {"question": "What is the capital of France?", "answer": "Paris"}
+    writer.append(first)
+    with open(writer.json_path) as f:
+        assert json.load(f)["results"] == [first]
+    assert "### Question 1" in writer.md_path.read_text()
+
+    second = {"question": "What is the largest city in France?", "answer": "Paris"}
+    writer.append(second)
+    with open(writer.json_path) as f:
+        assert json.load(f)["results"] == [first, second]
+    content = writer.md_path.read_text()
+    assert content.count("---") == 1
+    assert "### Question 2" in content
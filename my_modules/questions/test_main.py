@@ -1,9 +1,24 @@
 import asyncio
+import json
 import logging
+import time
+from types import SimpleNamespace
 
 import pytest
 
-from woodshed.modules.questions.main import main
+from woodshed.modules.questions.answer_cache import AnswerCache
+from woodshed.modules.questions.config import ConfigTuple
+from woodshed.modules.questions.main import (
+    QuestionProcessingContext,
+    answer_with_related,
+    get_answer,
+    iter_answers,
+    iter_pipeline_answers,
+    main,
+    process_questions,
+    stream_answers,
+    stream_related_questions,
+)
 
 
 @pytest.mark.asyncio
@@ -28,3 +43,205 @@ async def test_main_integration():
 
     # Example assertion (you may need to adjust based on your actual implementation):
     # assert some_condition_based_on_results
+
+
+class FakeCompletions:
+    """Async stand-in for client.chat.completions that answers after a delay."""
+
+    def __init__(
+        self, delay=0.1, slow_questions=(), delays=None, related=(), token_delay=0
+    ):
+        self.delay = delay
+        self.slow_questions = slow_questions
+        self.delays = delays or {}
+        self.related = related
+        self.token_delay = token_delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    async def create(self, model, messages, stream=False):
+        question = messages[-1]["content"]
+        self.calls.append(question)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay = 10 if question in self.slow_questions else self.delay
+            delay = self.delays.get(messages[0]["content"], delay)
+            await asyncio.sleep(self.delays.get(question, delay))
+        finally:
+            self.in_flight -= 1
+        content = f"Answer to {question}"
+        if messages[0]["content"] == RELATED_PROMPT:
+            content = "Related questions:\n" + "\n".join(self.related)
+        if stream:
+            return self._stream(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, content):
+        for token in content.split(" "):
+            await asyncio.sleep(self.token_delay)
+            delta = SimpleNamespace(content=token + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+RELATED_PROMPT = "Suggest related questions"
+
+
+def make_context(completions, tmp_path, cache=None, **settings):
+    config = ConfigTuple(
+        perplexity_api_key="test",
+        output_dir=tmp_path,
+        log_file="app.log",
+        log_to_file=False,
+        model_name="test-model",
+        base_url="http://localhost",
+        **settings,
+    )
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return QuestionProcessingContext(
+        client=client,
+        question="Q0",
+        expert_type="tester",
+        config=config,
+        start_animation=lambda _: None,
+        stop_animation=lambda _, __: None,
+        cache=cache,
+    )
+
+
+@pytest.mark.asyncio
+async def test_process_questions_runs_concurrently(tmp_path):
+    completions = FakeCompletions(delay=0.2)
+    context = make_context(completions, tmp_path, max_concurrency=10)
+    questions = [f"Q{i}" for i in range(6)]
+
+    start = time.perf_counter()
+    results = await process_questions(context, questions)
+    elapsed = time.perf_counter() - start
+
+    assert [r["question"] for r in results] == questions
+    assert elapsed < 0.2 * 3
+    assert completions.max_in_flight == 6
+
+
+@pytest.mark.asyncio
+async def test_process_questions_respects_concurrency_limit(tmp_path):
+    completions = FakeCompletions(delay=0.05)
+    context = make_context(completions, tmp_path, max_concurrency=2)
+
+    results = await process_questions(context, [f"Q{i}" for i in range(6)])
+
+    assert len(results) == 6
+    assert completions.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_process_questions_drops_timed_out_answers(tmp_path):
+    completions = FakeCompletions(delay=0.01, slow_questions={"Q1"})
+    context = make_context(completions, tmp_path, request_timeout=0.2)
+
+    results = await process_questions(context, ["Q0", "Q1", "Q2"])
+
+    assert [r["question"] for r in results] == ["Q0", "Q2"]
+
+
+@pytest.mark.asyncio
+async def test_iter_answers_yields_in_completion_order(tmp_path):
+    completions = FakeCompletions(delays={"Q0": 0.3, "Q1": 0.1, "Q2": 0.2})
+    context = make_context(completions, tmp_path)
+
+    results = [r async for r in iter_answers(context, ["Q0", "Q1", "Q2"])]
+
+    assert [r["question"] for r in results] == ["Q1", "Q2", "Q0"]
+
+
+@pytest.mark.asyncio
+async def test_iter_answers_streams_tokens(tmp_path):
+    context = make_context(FakeCompletions(delay=0.01), tmp_path)
+    tokens = []
+
+    results = [
+        r
+        async for r in iter_answers(
+            context, ["Q0"], on_token=lambda q, token: tokens.append((q, token))
+        )
+    ]
+
+    assert [q for q, _ in tokens] == ["Q0"] * 3
+    assert "".join(token for _, token in tokens) == results[0]["answer"]
+
+
+@pytest.mark.asyncio
+async def test_stream_answers_saves_each_answer(tmp_path):
+    completions = FakeCompletions(delays={"Q0": 0.2, "Q1": 0.05})
+    context = make_context(completions, tmp_path)
+
+    await stream_answers(context, iter_answers(context, ["Q0", "Q1"]))
+
+    (json_file,) = tmp_path.glob("questions_*.json")
+    with open(json_file) as f:
+        data = json.load(f)
+    assert [r["question"] for r in data["results"]] == ["Q1", "Q0"]
+    assert "### Question 2" in json_file.with_suffix(".md").read_text()
+
+
+def related_prompt(expert_type):
+    return RELATED_PROMPT
+
+
+@pytest.mark.asyncio
+async def test_stream_related_questions_yields_each_line_when_complete(tmp_path):
+    completions = FakeCompletions(
+        delay=0.0, related=["1. First?", "2. Second?"], token_delay=0.05
+    )
+    context = make_context(completions, tmp_path)
+    arrivals = []
+
+    start = time.perf_counter()
+    async for question in stream_related_questions(context, related_prompt):
+        arrivals.append((question, time.perf_counter() - start))
+
+    assert [q for q, _ in arrivals] == ["1. First?", "2. Second?"]
+    # The first question arrives before the reply is finished
+    assert arrivals[0][1] < arrivals[1][1] - 0.05
+
+
+@pytest.mark.asyncio
+async def test_answer_with_related_overlaps_original_answer(tmp_path):
+    completions = FakeCompletions(delay=0.2, related=["1. First?", "2. Second?"])
+    context = make_context(completions, tmp_path)
+
+    start = time.perf_counter()
+    results = await answer_with_related(context, related_prompt)
+    elapsed = time.perf_counter() - start
+
+    assert [r["question"] for r in results] == ["Q0", "1. First?", "2. Second?"]
+    # Generation and the original answer run together: two round trips, not three
+    assert elapsed < 0.2 * 2.5
+
+
+@pytest.mark.asyncio
+async def test_iter_pipeline_answers_keeps_original_answer_on_failure(tmp_path):
+    completions = FakeCompletions(delay=0.01, delays={RELATED_PROMPT: 10})
+    context = make_context(completions, tmp_path, request_timeout=0.2)
+
+    results = [r async for r in iter_pipeline_answers(context, related_prompt)]
+
+    assert [(i, r["question"]) for i, r in results] == [(0, "Q0")]
+
+
+@pytest.mark.asyncio
+async def test_get_answer_reuses_cached_answers(tmp_path):
+    completions = FakeCompletions(delay=0.01)
+    with AnswerCache(tmp_path / "answers.sqlite3") as cache:
+        context = make_context(completions, tmp_path, cache=cache)
+
+        first = await get_answer(context, "What is APR?")
+        second = await get_answer(context, "what is APR")
+
+        assert second["answer"] == first["answer"]
+        assert second["question"] == "what is APR"
+        assert completions.calls == ["What is APR?"]
+        assert cache.stats.hits == 1
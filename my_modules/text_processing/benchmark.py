@@ -0,0 +1,565 @@
+"""
+Chunking benchmark suite.
+
+Measures throughput and memory of the chunkers in this package on the sample
+books in data/test and on synthetic corpora generated from them at any size
+(1 MB to 1 GB and beyond). Every case runs in a fresh process so its peak RSS
+is its own, and results are written as JSON so runs from different commits
+can be compared for regressions.
+
+The same harness reports the recall vs. memory trade-off of the vector
+indexes in langchain.vector_index on synthetic embeddings: recall@k against
+exact search, bytes held in memory and queries per second for every case in
+VECTOR_CASES.
+
+Usage (from the project root):
+    python -m woodshed.modules.text_processing.benchmark --sizes 1MB,10MB,100MB
+    python -m woodshed.modules.text_processing.benchmark --baseline old.json
+    python -m woodshed.modules.text_processing.benchmark --vectors 100000x384 \
+        --cases flat,int8,int8_rerank,pq,pq_rerank
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .boundaries import chunk_text_by_boundaries
+from .chunk_views import ChunkViewTable
+from .chunking import chunk_text as chunk_characters
+from .enhanced_chunking import (
+    chunk_text,
+    iter_file_chunks,
+    process_directory,
+    process_file,
+    read_file_in_chunks,
+)
+
+SAMPLE_TEXTS_DIR = Path("data/test")
+SAMPLE_TEXTS = ["moby_dick.txt", "great_gatsby.txt", "sherlock_holmes.txt"]
+DEFAULT_WORK_DIR = Path("tmp/benchmarks")
+DEFAULT_OUTPUT_DIR = Path("data/output/benchmarks")
+DEFAULT_SIZES = "1MB,10MB,100MB"
+DIRECTORY_FILE_COUNT = 64  # Files per corpus for the process_directory cases
+
+CHUNK_SIZE = 1000
+OVERLAP = 200
+CHAR_CHUNK_SIZE = 1000
+VECTOR_QUERIES = 100  # Held-out queries per vector benchmark
+VECTOR_K = 10
+RECALL_TOLERANCE = 0.01  # Absolute recall drop reported as a regression
+
+SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+
+def parse_size(size: str) -> int:
+    """
+    Parse a human readable size such as "10MB" into bytes.
+
+    Raises:
+        ValueError: If the size cannot be parsed.
+    """
+    match = SIZE_PATTERN.match(size)
+    if not match:
+        raise ValueError(f"Invalid size: {size}")
+    return int(float(match.group(1)) * SIZE_UNITS[(match.group(2) or "B").upper()])
+
+
+def generate_corpus(
+    output_file: Path, size_bytes: int, sources: List[Path], seed: int = 0
+) -> Path:
+    """
+    Write a synthetic corpus of roughly ``size_bytes`` from random source paragraphs.
+
+    Paragraphs are sampled with a fixed seed, so the same arguments always
+    produce the same file; an existing file of the right size is reused.
+
+    Args:
+        output_file (Path): Where to write the corpus.
+        size_bytes (int): Target size in bytes; the file stops at the first
+            paragraph that reaches it.
+        sources (List[Path]): Text files to sample paragraphs from.
+        seed (int): Random seed.
+
+    Returns:
+        Path: The corpus file.
+    """
+    if output_file.exists() and output_file.stat().st_size >= size_bytes:
+        return output_file
+
+    paragraphs = [
+        paragraph.strip().encode("utf-8") + b"\n\n"
+        for source in sources
+        for paragraph in source.read_text(encoding="utf-8").split("\n\n")
+        if paragraph.strip()
+    ]
+    rng = random.Random(seed)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(output_file, "wb") as f:
+        while written < size_bytes:
+            paragraph = rng.choice(paragraphs)
+            f.write(paragraph)
+            written += len(paragraph)
+    return output_file
+
+
+def split_corpus(corpus_file: Path, output_dir: Path, file_count: int) -> Path:
+    """
+    Split a corpus into ``file_count`` text files on paragraph boundaries.
+
+    Returns:
+        Path: The directory holding the split files.
+    """
+    if output_dir.is_dir() and len(list(output_dir.glob("*.txt"))) == file_count:
+        return output_dir
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    target = corpus_file.stat().st_size // file_count + 1
+    index, written = 0, 0
+    out = open(output_dir / f"part_{index:05d}.txt", "wb")
+    try:
+        with open(corpus_file, "rb") as corpus:
+            for line in corpus:
+                # Only switch files between paragraphs
+                if written >= target and index < file_count - 1 and not line.strip():
+                    out.close()
+                    index, written = index + 1, 0
+                    out = open(output_dir / f"part_{index:05d}.txt", "wb")
+                out.write(line)
+                written += len(line)
+    finally:
+        out.close()
+    return output_dir
+
+
+def _count_chunk_text(path: Path) -> int:
+    text = "".join(read_file_in_chunks(path))
+    return len(chunk_text(text, CHUNK_SIZE, OVERLAP))
+
+
+def _count_process_file(path: Path) -> int:
+    return sum(
+        len(chunks) for chunks in process_file(path, CHUNK_SIZE, OVERLAP).values()
+    )
+
+
+def _count_iter_file_chunks(path: Path) -> int:
+    return sum(1 for _ in iter_file_chunks(path, CHUNK_SIZE, OVERLAP))
+
+
+def _count_boundary_chunks(path: Path) -> int:
+    text = "".join(read_file_in_chunks(path))
+    return len(chunk_text_by_boundaries(text, CHAR_CHUNK_SIZE))
+
+
+def _count_chunk_views(path: Path) -> int:
+    with ChunkViewTable() as table:
+        return table.add_file(path, CHUNK_SIZE, OVERLAP)
+
+
+def _count_process_directory(directory: Path) -> int:
+    chunks = process_directory(directory, CHUNK_SIZE, OVERLAP)
+    return sum(len(file_chunks) for file_chunks in chunks.values())
+
+
+def _count_process_directory_parallel(directory: Path) -> int:
+    chunks = process_directory(directory, CHUNK_SIZE, OVERLAP, workers=None)
+    return sum(len(file_chunks) for file_chunks in chunks.values())
+
+
+def _count_character_chunks(path: Path) -> int:
+    # An absolute path is used as is by the data directory lookup
+    return len(chunk_characters(str(path.resolve()), CHAR_CHUNK_SIZE))
+
+
+# Cases that take a single file
+FILE_CASES: Dict[str, Callable[[Path], int]] = {
+    "chunk_text": _count_chunk_text,
+    "process_file": _count_process_file,
+    "iter_file_chunks": _count_iter_file_chunks,
+    "chunk_views": _count_chunk_views,
+    "boundary_chunks": _count_boundary_chunks,
+    "character_chunk_text": _count_character_chunks,
+}
+
+# Cases that take a directory of files
+DIRECTORY_CASES: Dict[str, Callable[[Path], int]] = {
+    "process_directory": _count_process_directory,
+    "process_directory_parallel": _count_process_directory_parallel,
+}
+
+# Vector index settings compared by run_vector_benchmarks; pq needs a
+# dimension divisible by m
+VECTOR_CASES: Dict[str, Dict] = {
+    "flat": {"kind": "flat"},
+    "ivf": {"kind": "ivf", "nlist": 256, "nprobe": 16},
+    "int8": {"kind": "quantized", "method": "int8", "rerank": 0},
+    "int8_rerank": {"kind": "quantized", "method": "int8", "rerank": 4},
+    "pq": {"kind": "quantized", "method": "pq", "m": 16, "rerank": 0},
+    "pq_rerank": {"kind": "quantized", "method": "pq", "m": 16, "rerank": 8},
+}
+
+
+def _peak_rss_bytes() -> int:
+    """Peak resident set size of the current process (ru_maxrss is KB on Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure_case(
+    case: str, target: Path, trace_allocations: bool = False
+) -> Dict[str, float]:
+    """
+    Run one benchmark case in the current process and collect its metrics.
+
+    Args:
+        case (str): Name of a case in FILE_CASES or DIRECTORY_CASES.
+        target (Path): The file or directory to chunk.
+        trace_allocations (bool): Also record the peak of traced Python
+            allocations with tracemalloc. This slows the case down, so the
+            timing of a traced run should not be compared to an untraced one.
+
+    Returns:
+        Dict[str, float]: seconds, chunks, peak_rss_bytes, allocated_blocks and,
+        when traced, peak_traced_bytes.
+    """
+    function = FILE_CASES.get(case) or DIRECTORY_CASES[case]
+    if trace_allocations:
+        tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    chunks = function(target)
+    seconds = time.perf_counter() - start
+    metrics = {
+        "seconds": seconds,
+        "chunks": chunks,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "allocated_blocks": sys.getallocatedblocks() - blocks_before,
+    }
+    if trace_allocations:
+        metrics["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return metrics
+
+
+def run_case(
+    case: str, target: Path, trace_allocations: bool = False, isolate: bool = True
+) -> Dict[str, float]:
+    """
+    Run a benchmark case, by default in a freshly spawned process.
+
+    A fresh process makes peak RSS and allocated blocks attributable to the case.
+    """
+    if not isolate:
+        return measure_case(case, target, trace_allocations)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(measure_case, case, target, trace_allocations).result()
+
+
+def build_corpora(
+    sizes: List[int], work_dir: Path, sample_dir: Path = SAMPLE_TEXTS_DIR
+) -> List[Dict]:
+    """Collect the sample texts and generate one synthetic corpus per size."""
+    samples = [
+        sample_dir / name for name in SAMPLE_TEXTS if (sample_dir / name).exists()
+    ]
+    corpora = [{"name": path.stem, "file": path} for path in samples]
+    for size in sizes:
+        name = f"synthetic_{size}"
+        corpus_file = generate_corpus(work_dir / f"{name}.txt", size, samples)
+        corpora.append(
+            {
+                "name": name,
+                "file": corpus_file,
+                "directory": split_corpus(
+                    corpus_file, work_dir / name, DIRECTORY_FILE_COUNT
+                ),
+            }
+        )
+    return corpora
+
+
+def run_benchmarks(
+    sizes: List[int],
+    work_dir: Path = DEFAULT_WORK_DIR,
+    cases: Optional[List[str]] = None,
+    trace_allocations: bool = False,
+    isolate: bool = True,
+    sample_dir: Path = SAMPLE_TEXTS_DIR,
+) -> List[Dict]:
+    """
+    Run every selected case against the sample texts and synthetic corpora.
+
+    Directory cases only run on the synthetic corpora, which are split into
+    DIRECTORY_FILE_COUNT files for them.
+
+    Returns:
+        List[Dict]: One result per (case, corpus) with MB/s and chunks/s.
+    """
+    cases = cases or list(FILE_CASES) + list(DIRECTORY_CASES)
+    results = []
+    for corpus in build_corpora(sizes, work_dir, sample_dir):
+        size_bytes = corpus["file"].stat().st_size
+        for case in cases:
+            if case in DIRECTORY_CASES:
+                if "directory" not in corpus:
+                    continue
+                target = corpus["directory"]
+            else:
+                target = corpus["file"]
+            metrics = run_case(case, target, trace_allocations, isolate)
+            seconds = max(metrics["seconds"], 1e-9)
+            result = {
+                "case": case,
+                "corpus": corpus["name"],
+                "size_bytes": size_bytes,
+                **metrics,
+                "mb_per_s": size_bytes / (1 << 20) / seconds,
+                "chunks_per_s": metrics["chunks"] / seconds,
+            }
+            logging.info(
+                f"{case} on {corpus['name']}: {result['mb_per_s']:.1f} MB/s, "
+                f"{result['chunks_per_s']:.0f} chunks/s, "
+                f"peak RSS {result['peak_rss_bytes'] / (1 << 20):.0f} MB"
+            )
+            results.append(result)
+    return results
+
+
+def synthetic_vectors(
+    count: int, dim: int, clusters: int = 100, seed: int = 0
+) -> np.ndarray:
+    """
+    Random vectors shaped like text embeddings for the vector benchmarks.
+
+    Real embeddings are clustered and have a much lower intrinsic dimension
+    than their length, so the vectors are clustered points in a space of
+    dim // 8 dimensions, projected to dim dimensions with a little noise.
+    """
+    generator = np.random.default_rng(seed)
+    latent_dim = max(dim // 8, 1)
+    centers = generator.normal(size=(clusters, latent_dim))
+    labels = generator.integers(0, clusters, size=count)
+    latent = centers[labels] + 0.5 * generator.normal(size=(count, latent_dim))
+    projection = generator.normal(size=(latent_dim, dim))
+    noise = 0.1 * generator.normal(size=(count, dim))
+    return (latent @ projection + noise).astype(np.float32)
+
+
+def run_vector_benchmarks(
+    count: int,
+    dim: int,
+    work_dir: Path = DEFAULT_WORK_DIR,
+    cases: Optional[List[str]] = None,
+    queries: int = VECTOR_QUERIES,
+    k: int = VECTOR_K,
+) -> List[Dict]:
+    """
+    Measure recall, memory and speed of the vector index cases.
+
+    Each index is built, saved under work_dir and loaded back with memory
+    mapping before it is queried, so index_bytes is what a served index keeps
+    in RAM (full vectors used only for re-ranking stay on disk).
+
+    Args:
+        count (int): Number of vectors to index.
+        dim (int): Dimension of the vectors.
+        work_dir (Path): Directory for the saved indexes.
+        cases (List[str], optional): Names in VECTOR_CASES; all by default.
+        queries (int): Number of held-out query vectors.
+        k (int): Results per query; recall is measured at k.
+
+    Returns:
+        List[Dict]: One result per case with recall_at_k, index_bytes and queries_per_s.
+    """
+    # Imported here to keep this package importable without the langchain one
+    from woodshed.modules.langchain.vector_index import build_index, load_index
+
+    cases = cases or list(VECTOR_CASES)
+    data = synthetic_vectors(count + queries, dim)
+    vectors, query_vectors = data[:count], data[count:]
+    _, expected = build_index(vectors, "flat").search(query_vectors, k)
+    raw_bytes = vectors.nbytes
+
+    results = []
+    for case in cases:
+        settings = dict(VECTOR_CASES[case])
+        start = time.perf_counter()
+        index = build_index(vectors, settings.pop("kind"), **settings)
+        build_seconds = time.perf_counter() - start
+        index_dir = work_dir / "vectors" / case
+        index.save(index_dir)
+        index = load_index(index_dir)
+
+        start = time.perf_counter()
+        _, ids = index.search(query_vectors, k)
+        seconds = max(time.perf_counter() - start, 1e-9)
+        recall = sum(
+            len(set(found) & set(truth)) for found, truth in zip(ids, expected)
+        ) / (queries * k)
+        result = {
+            "case": case,
+            "corpus": f"vectors_{count}x{dim}",
+            "build_seconds": build_seconds,
+            "seconds": seconds,
+            "queries_per_s": queries / seconds,
+            "recall_at_k": recall,
+            "k": k,
+            "index_bytes": index.nbytes,
+            "compression": raw_bytes / max(index.nbytes, 1),
+            "peak_rss_bytes": _peak_rss_bytes(),
+        }
+        logging.info(
+            f"{case} on {result['corpus']}: recall@{k} {recall:.3f}, "
+            f"{result['index_bytes'] / (1 << 20):.1f} MB in memory "
+            f"({result['compression']:.1f}x smaller), "
+            f"{result['queries_per_s']:.0f} queries/s"
+        )
+        results.append(result)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: List[Dict], output_dir: Path = DEFAULT_OUTPUT_DIR) -> Path:
+    """
+    Save benchmark results with environment details to a timestamped JSON file.
+
+    Returns:
+        Path: The results file.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = output_dir / f"chunking_{timestamp}.json"
+    report = {
+        "timestamp": timestamp,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return output_file
+
+
+def compare_results(
+    baseline: List[Dict], current: List[Dict], tolerance: float = 0.10
+) -> List[str]:
+    """
+    List cases that got slower, more memory hungry or less accurate than the baseline.
+
+    Recall is compared with the absolute RECALL_TOLERANCE rather than the
+    relative tolerance.
+
+    Args:
+        baseline (List[Dict]): Results of the reference run.
+        current (List[Dict]): Results of the run to check.
+        tolerance (float): Allowed relative degradation before a case is reported.
+
+    Returns:
+        List[str]: One line per regression; empty when there are none.
+    """
+    reference = {(r["case"], r["corpus"]): r for r in baseline}
+    regressions = []
+    for result in current:
+        before = reference.get((result["case"], result["corpus"]))
+        if before is None:
+            continue
+        label = f"{result['case']} on {result['corpus']}"
+        for metric, unit in (("mb_per_s", "MB/s"), ("queries_per_s", "queries/s")):
+            if metric in result and result[metric] < before[metric] * (1 - tolerance):
+                regressions.append(
+                    f"{label}: throughput {before[metric]:.1f} -> "
+                    f"{result[metric]:.1f} {unit}"
+                )
+        if "recall_at_k" in result and (
+            result["recall_at_k"] < before["recall_at_k"] - RECALL_TOLERANCE
+        ):
+            regressions.append(
+                f"{label}: recall {before['recall_at_k']:.3f} -> "
+                f"{result['recall_at_k']:.3f}"
+            )
+        if "index_bytes" in result and (
+            result["index_bytes"] > before["index_bytes"] * (1 + tolerance)
+        ):
+            regressions.append(
+                f"{label}: index size {before['index_bytes'] / (1 << 20):.1f} -> "
+                f"{result['index_bytes'] / (1 << 20):.1f} MB"
+            )
+        if result["peak_rss_bytes"] > before["peak_rss_bytes"] * (1 + tolerance):
+            regressions.append(
+                f"{label}: peak RSS {before['peak_rss_bytes'] / (1 << 20):.0f} -> "
+                f"{result['peak_rss_bytes'] / (1 << 20):.0f} MB"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns a non-zero exit code on regressions."""
+    parser = argparse.ArgumentParser(description="Benchmark the text chunkers.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="e.g. 1MB,10MB,1GB")
+    parser.add_argument("--cases", help="Comma separated subset of cases to run")
+    parser.add_argument(
+        "--vectors", help="Also benchmark vector indexes, e.g. 100000x384"
+    )
+    parser.add_argument("--work-dir", type=Path, default=DEFAULT_WORK_DIR)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--baseline", type=Path, help="Results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--trace-allocations", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().addHandler(logging.StreamHandler())
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    cases = args.cases.split(",") if args.cases else None
+    chunk_cases = [c for c in cases if c not in VECTOR_CASES] if cases else None
+    vector_cases = [c for c in cases if c in VECTOR_CASES] if cases else None
+    results = []
+    if chunk_cases is None or chunk_cases:
+        results += run_benchmarks(
+            sizes, args.work_dir, chunk_cases, args.trace_allocations
+        )
+    if args.vectors and (vector_cases is None or vector_cases):
+        count, dim = (int(n) for n in args.vectors.lower().split("x"))
+        results += run_vector_benchmarks(count, dim, args.work_dir, vector_cases)
+    output_file = save_results(results, args.output_dir)
+    print(f"Benchmark results saved to {output_file}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_results(
+                json.load(f)["results"], results, args.tolerance
+            )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
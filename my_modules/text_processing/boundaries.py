@@ -0,0 +1,178 @@
+"""
+Sentence- and structure-aware chunking.
+
+A single pass over the text with one precompiled regex records every place a
+chunk may end, together with how strong a break it is: markdown headings,
+then paragraph breaks, then sentence ends. Chunks are then packed greedily up
+to ``max_chars``, ending at the strongest break in the back part of the
+window, so a chunk rarely stops mid-sentence and the overlap between chunks
+can be much smaller than with the fixed-size chunkers.
+"""
+
+import bisect
+import re
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+SENTENCE = 1
+PARAGRAPH = 2
+HEADING = 3
+
+# A sentence end gives way to a paragraph or heading break in the whitespace
+# that follows it. Sentence ends skip common abbreviations and must be
+# followed by something other than a lowercase letter. The leading lookahead
+# lets the scan skip ordinary characters without trying each alternative.
+BOUNDARY_PATTERN = re.compile(
+    r"(?=[\s.!?])(?:"
+    r"(?P<heading>\s*\n(?=[ \t]{0,3}#{1,6}[ \t]))"
+    r"|(?P<paragraph>[ \t]*\n[ \t]*\n\s*)"
+    r"|(?P<sentence>[.!?](?<!\bMr\.)(?<!\bMrs\.)(?<!\bMs\.)(?<!\bDr\.)"
+    r"(?<!\bSt\.)(?<!\bvs\.)(?<!\be\.g\.)(?<!\bi\.e\.)[.!?]*[\"'”’)\]]*"
+    r"(?![ \t]*\n[ \t]*\n|\s*\n[ \t]{0,3}#{1,6}[ \t])\s+(?=[^\sa-z]))"
+    r")"
+)
+STRENGTHS = {"heading": HEADING, "paragraph": PARAGRAPH, "sentence": SENTENCE}
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class BoundaryIndex(NamedTuple):
+    """Offsets at which a chunk may start, with the strength of each break."""
+
+    positions: List[int]  # Offset of the first character after the break
+    strengths: List[int]
+
+
+def build_boundary_index(text: str) -> BoundaryIndex:
+    """
+    Find every heading, paragraph and sentence break of a text in one pass.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        BoundaryIndex: The breaks in text order.
+    """
+    positions = []
+    strengths = []
+    for match in BOUNDARY_PATTERN.finditer(text):
+        if 0 < match.end() < len(text):
+            positions.append(match.end())
+            strengths.append(STRENGTHS[match.lastgroup])
+    return BoundaryIndex(positions, strengths)
+
+
+def _validate_boundary_params(max_chars: int, overlap_chars: int) -> None:
+    """
+    Validate boundary chunking parameters.
+
+    Raises:
+        ValueError: If max_chars is less than 1 or overlap_chars is outside [0, max_chars).
+    """
+    if max_chars < 1:
+        raise ValueError("max_chars must be at least 1")
+    if not 0 <= overlap_chars < max_chars:
+        raise ValueError("overlap_chars must be between 0 and max_chars - 1")
+
+
+def _find_end(
+    text: str, index: BoundaryIndex, start: int, max_chars: int, min_fill: float
+) -> int:
+    """Pick where the chunk starting at ``start`` ends."""
+    limit = start + max_chars
+    if limit >= len(text):
+        return len(text)
+
+    # Strongest break in the back part of the window, the latest one on ties
+    low = bisect.bisect_right(index.positions, start + int(max_chars * min_fill))
+    high = bisect.bisect_right(index.positions, limit)
+    if low == high:
+        low = bisect.bisect_right(index.positions, start)
+    if low < high:
+        best = max(range(low, high), key=lambda i: (index.strengths[i], i))
+        return index.positions[best]
+
+    # No break at all: cut after the last whitespace, or mid-word as a last resort
+    last_space = None
+    for last_space in WHITESPACE_PATTERN.finditer(text, start + 1, limit):
+        pass
+    return last_space.end() if last_space else limit
+
+
+def chunk_text_by_boundaries(
+    text: str,
+    max_chars: int,
+    overlap_chars: int = 0,
+    min_fill: float = 0.5,
+    index: Optional[BoundaryIndex] = None,
+) -> List[str]:
+    """
+    Split text into chunks that end at heading, paragraph or sentence breaks.
+
+    Args:
+        text (str): The input text to be chunked.
+        max_chars (int): Maximum characters per chunk, before stripping.
+        overlap_chars (int): Up to this many characters of whole trailing
+            sentences are repeated at the start of the next chunk.
+        min_fill (float): Fraction of max_chars a chunk should reach before a
+            stronger break is preferred over a later, weaker one.
+        index (BoundaryIndex, optional): A precomputed index of the text.
+
+    Returns:
+        List[str]: A list of text chunks with surrounding whitespace removed.
+
+    Raises:
+        ValueError: If max_chars or overlap_chars is invalid.
+    """
+    _validate_boundary_params(max_chars, overlap_chars)
+    index = index or build_boundary_index(text)
+
+    chunks = []
+    start = len(text) - len(text.lstrip())
+    while start < len(text):
+        end = _find_end(text, index, start, max_chars, min_fill)
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+
+        # Restart at the earliest break inside the overlap, if any
+        next_start = end
+        if overlap_chars:
+            i = bisect.bisect_left(index.positions, end - overlap_chars)
+            if i < len(index.positions) and start < index.positions[i] < end:
+                next_start = index.positions[i]
+        start = next_start
+    return chunks
+
+
+def process_directory_by_boundaries(
+    directory: Path, max_chars: int, overlap_chars: int = 0
+) -> Dict[str, List[str]]:
+    """
+    Boundary-chunk all text and markdown files in a directory.
+
+    Args:
+        directory (Path): Path to the directory containing the files.
+        max_chars (int): Maximum characters per chunk.
+        overlap_chars (int): Maximum characters shared by consecutive chunks.
+
+    Returns:
+        Dict[str, List[str]]: A dictionary with filenames as keys and lists of chunks as values.
+
+    Raises:
+        NotADirectoryError: If the specified path is not a directory.
+        ValueError: If max_chars or overlap_chars is invalid.
+    """
+    if not directory.is_dir():
+        raise NotADirectoryError(f"{directory} is not a valid directory")
+
+    file_paths = sorted(
+        path for path in directory.iterdir() if path.suffix in (".txt", ".md")
+    )
+    return {
+        path.name: chunk_text_by_boundaries(
+            path.read_text(encoding="utf-8"), max_chars, overlap_chars
+        )
+        for path in file_paths
+    }
@@ -0,0 +1,227 @@
+"""
+Streaming JSONL storage for text chunks.
+
+Each line of the output is one chunk record carrying its source file, chunk
+index and character/word offsets. Chunks are written as they are produced, so
+the full chunk set never has to sit in memory. A small side index
+(``<output>.idx.json``) maps every source to the byte range of its records,
+letting readers seek straight to the chunks of one file.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from .enhanced_chunking import iter_chunk_spans, read_file_in_chunks
+
+INDEX_VERSION = 1
+
+
+class ChunkRecord(NamedTuple):
+    """One chunk as stored in a JSONL chunk file."""
+
+    source: str
+    chunk_index: int
+    text: str
+    char_start: int
+    char_end: int
+    word_start: int
+    word_end: int
+
+
+class IndexEntry(NamedTuple):
+    """Byte range of the records of one source in a JSONL chunk file."""
+
+    offset: int
+    length: int
+    count: int
+
+
+def index_path(output_file: Path) -> Path:
+    """Return the path of the side index belonging to a JSONL chunk file."""
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.name + ".idx.json")
+
+
+class JsonlChunkWriter:
+    """
+    Write chunk records to a JSONL file one line at a time.
+
+    Records of a source must be written contiguously. The side index is
+    written when the writer is closed, and both files only appear under their
+    final names once writing has finished.
+
+    Example:
+        with JsonlChunkWriter(Path("chunks.jsonl")) as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, output_file: Path):
+        self.output_file = Path(output_file)
+        self._tmp_file = self.output_file.with_name(self.output_file.name + ".tmp")
+        self._file = open(self._tmp_file, "wb")
+        self._index: Dict[str, IndexEntry] = {}
+        self._source: Optional[str] = None
+
+    def write(self, record: ChunkRecord) -> None:
+        """
+        Append one record to the output.
+
+        Raises:
+            ValueError: If the record's source was already written earlier.
+        """
+        if record.source != self._source:
+            if record.source in self._index:
+                raise ValueError(
+                    f"Records of {record.source} must be written contiguously"
+                )
+            self._source = record.source
+            self._index[record.source] = IndexEntry(self._file.tell(), 0, 0)
+
+        line = json.dumps(record._asdict(), ensure_ascii=False).encode("utf-8")
+        self._file.write(line + b"\n")
+        offset, length, count = self._index[record.source]
+        self._index[record.source] = IndexEntry(
+            offset, length + len(line) + 1, count + 1
+        )
+
+    def close(self) -> None:
+        """Flush the records, write the side index and move both into place."""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.replace(self._tmp_file, self.output_file)
+
+        index_file = index_path(self.output_file)
+        tmp_index = index_file.with_name(index_file.name + ".tmp")
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "sources": {
+                        source: list(entry) for source, entry in self._index.items()
+                    },
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_index, index_file)
+
+    def __enter__(self) -> "JsonlChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave any previous output untouched when writing failed
+            self._file.close()
+            self._tmp_file.unlink(missing_ok=True)
+
+
+class JsonlChunkReader:
+    """
+    Read chunk records from a JSONL chunk file through its side index.
+
+    Only the index is loaded up front; records are read on demand.
+    """
+
+    def __init__(self, output_file: Path):
+        self.output_file = Path(output_file)
+        with open(index_path(self.output_file), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported chunk index version in {self.output_file}")
+        self._index = {
+            source: IndexEntry(*entry) for source, entry in data["sources"].items()
+        }
+
+    def sources(self) -> List[str]:
+        """Return the sources in the order they were written."""
+        return list(self._index)
+
+    def count(self, source: str) -> int:
+        """Return the number of chunks stored for a source."""
+        return self._index[source].count
+
+    def read_source(self, source: str) -> List[ChunkRecord]:
+        """
+        Read all chunk records of one source.
+
+        Raises:
+            KeyError: If the source is not in the index.
+        """
+        entry = self._index[source]
+        with open(self.output_file, "rb") as f:
+            f.seek(entry.offset)
+            data = f.read(entry.length)
+        return [ChunkRecord(**json.loads(line)) for line in data.splitlines()]
+
+    def __iter__(self) -> Iterator[ChunkRecord]:
+        """Stream every record in file order."""
+        with open(self.output_file, "r", encoding="utf-8") as f:
+            for line in f:
+                yield ChunkRecord(**json.loads(line))
+
+
+def iter_file_records(
+    file_path: Path, chunk_size: int, overlap: int
+) -> Iterator[ChunkRecord]:
+    """
+    Stream the word chunks of a file as chunk records.
+
+    Args:
+        file_path (Path): Path to the file to be chunked.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+
+    Yields:
+        ChunkRecord: Each chunk with its offsets, keyed by the file name.
+    """
+    spans = iter_chunk_spans(read_file_in_chunks(file_path), chunk_size, overlap)
+    for chunk_index, span in enumerate(spans):
+        yield ChunkRecord(
+            file_path.name,
+            chunk_index,
+            span.text,
+            span.char_start,
+            span.char_end,
+            span.word_start,
+            span.word_end,
+        )
+
+
+def save_directory_chunks_to_jsonl(
+    directory: Path, output_file: Path, chunk_size: int, overlap: int
+) -> Dict[str, int]:
+    """
+    Chunk every text file of a directory straight into a JSONL chunk file.
+
+    Memory use is bounded by one chunk window, however large the corpus.
+
+    Args:
+        directory (Path): Path to the directory containing text files.
+        output_file (Path): Path where the JSONL file will be saved.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+
+    Returns:
+        Dict[str, int]: The number of chunks written per file name.
+
+    Raises:
+        NotADirectoryError: If the specified path is not a directory.
+        IOError: If a file cannot be read or the output cannot be written.
+    """
+    if not directory.is_dir():
+        raise NotADirectoryError(f"{directory} is not a valid directory")
+
+    counts = {}
+    with JsonlChunkWriter(output_file) as writer:
+        for file_path in sorted(directory.glob("*.txt")):
+            counts[file_path.name] = 0
+            for record in iter_file_records(file_path, chunk_size, overlap):
+                writer.write(record)
+                counts[file_path.name] += 1
+    return counts
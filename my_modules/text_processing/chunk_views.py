@@ -0,0 +1,228 @@
+"""
+Zero-copy chunk descriptors over memory-mapped source files.
+
+Instead of one freshly allocated string per chunk (with overlapping words
+duplicated between neighbours), a ChunkViewTable stores each chunk as a
+(source id, start byte, end byte) triple in compact arrays and materializes
+the text only when asked. Each chunk costs 20 bytes of descriptor. Only the
+most recently used sources stay mapped, so a large corpus does not run out
+of file descriptors.
+
+Materialized chunks are identical to those produced by chunk_text.
+"""
+
+import mmap
+import re
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from .enhanced_chunking import _validate_chunk_params, iter_windows
+
+# Every character for which str.isspace() is true, so that splitting the raw
+# UTF-8 bytes yields exactly the words of str.split()
+WHITESPACE_CHARS = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+_SINGLE_BYTE_WHITESPACE = [c for c in WHITESPACE_CHARS if ord(c) < 0x80]
+_MULTI_BYTE_WHITESPACE = [c for c in WHITESPACE_CHARS if ord(c) >= 0x80]
+# Every mmap holds a duplicated file descriptor, so only this many stay open
+DEFAULT_MAX_OPEN_MAPS = 64
+# ASCII whitespace as a character class keeps the common case fast
+WHITESPACE_BYTES_PATTERN = re.compile(
+    b"(?:["
+    + b"".join(re.escape(c.encode("utf-8")) for c in _SINGLE_BYTE_WHITESPACE)
+    + b"]|"
+    + b"|".join(re.escape(c.encode("utf-8")) for c in _MULTI_BYTE_WHITESPACE)
+    + b")+"
+)
+
+
+def iter_word_byte_spans(buffer) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the byte span of every whitespace-delimited word in a UTF-8 buffer.
+
+    Args:
+        buffer: A bytes-like object, such as an mmap of a UTF-8 file.
+
+    Yields:
+        Tuple[int, int]: Start and end byte offsets of each word.
+    """
+    position = 0
+    for separator in WHITESPACE_BYTES_PATTERN.finditer(buffer):
+        if separator.start() > position:
+            yield position, separator.start()
+        position = separator.end()
+    if position < len(buffer):
+        yield position, len(buffer)
+
+
+class ChunkView:
+    """A lightweight handle on one chunk of a ChunkViewTable."""
+
+    __slots__ = ("_table", "source_id", "start", "end")
+
+    def __init__(self, table: "ChunkViewTable", source_id: int, start: int, end: int):
+        self._table = table
+        self.source_id = source_id
+        self.start = start
+        self.end = end
+
+    @property
+    def source(self) -> Path:
+        """Path of the file the chunk points into."""
+        return self._table.sources[self.source_id]
+
+    @property
+    def text(self) -> str:
+        """Materialize the chunk text from the memory-mapped source."""
+        return self._table.materialize(self.source_id, self.start, self.end)
+
+    def __repr__(self) -> str:
+        return (
+            f"ChunkView(source_id={self.source_id}, start={self.start}, end={self.end})"
+        )
+
+
+class ChunkViewTable:
+    """
+    Columnar store of chunk descriptors backed by memory-mapped files.
+
+    Example:
+        with ChunkViewTable() as table:
+            table.add_directory(Path("data/input/articles"), 1000, 200)
+            print(len(table), table[0].text)
+    """
+
+    def __init__(self, max_open_maps: int = DEFAULT_MAX_OPEN_MAPS):
+        if max_open_maps < 1:
+            raise ValueError("max_open_maps must be at least 1")
+        self.sources: List[Path] = []
+        self.max_open_maps = max_open_maps
+        self._source_ids = array("I")
+        self._starts = array("Q")
+        self._ends = array("Q")
+        # Mapped sources, least recently used first
+        self._maps: "OrderedDict[int, mmap.mmap]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, index: int) -> ChunkView:
+        return ChunkView(
+            self, self._source_ids[index], self._starts[index], self._ends[index]
+        )
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        return (self[i] for i in range(len(self)))
+
+    def add_file(self, file_path: Path, chunk_size: int, overlap: int) -> int:
+        """
+        Index the overlapping word chunks of a file without copying its text.
+
+        Args:
+            file_path (Path): Path to the UTF-8 file to be chunked.
+            chunk_size (int): The number of words in each chunk.
+            overlap (int): The number of words to overlap between chunks.
+
+        Returns:
+            int: The number of chunks added.
+
+        Raises:
+            FileNotFoundError: If the specified file does not exist.
+            ValueError: If chunk_size or overlap is invalid.
+        """
+        _validate_chunk_params(chunk_size, overlap)
+        source_id = len(self.sources)
+        self.sources.append(Path(file_path))
+        try:
+            buffer = self._map(source_id)
+        except OSError:
+            self.sources.pop()
+            raise
+        if buffer is None:
+            return 0
+
+        added = 0
+        spans = iter_word_byte_spans(buffer)
+        for window in iter_windows(spans, chunk_size, overlap):
+            self._source_ids.append(source_id)
+            self._starts.append(window[0][0])
+            self._ends.append(window[-1][1])
+            added += 1
+        return added
+
+    def add_directory(self, directory: Path, chunk_size: int, overlap: int) -> int:
+        """
+        Index all text files in a directory, in sorted name order.
+
+        Returns:
+            int: The number of chunks added.
+
+        Raises:
+            NotADirectoryError: If the specified path is not a directory.
+        """
+        if not directory.is_dir():
+            raise NotADirectoryError(f"{directory} is not a valid directory")
+        return sum(
+            self.add_file(path, chunk_size, overlap)
+            for path in sorted(directory.glob("*.txt"))
+        )
+
+    def materialize(self, source_id: int, start: int, end: int) -> str:
+        """Decode a byte range of a source and normalize its whitespace like chunk_text."""
+        buffer = self._map(source_id)
+        return " ".join(buffer[start:end].decode("utf-8").split())
+
+    def texts(self) -> Iterator[str]:
+        """Materialize every chunk, one at a time."""
+        for view in self:
+            yield view.text
+
+    def nbytes(self) -> int:
+        """Memory used by the chunk descriptors themselves."""
+        return sum(
+            column.itemsize * len(column)
+            for column in (self._source_ids, self._starts, self._ends)
+        )
+
+    def _map(self, source_id: int):
+        """
+        Memory-map a source on use; empty files have nothing to map.
+
+        The least recently used map is closed once more than max_open_maps
+        sources are mapped.
+        """
+        if source_id in self._maps:
+            self._maps.move_to_end(source_id)
+            return self._maps[source_id]
+        with open(self.sources[source_id], "rb") as f:
+            if f.seek(0, 2) == 0:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[source_id] = buffer
+        while len(self._maps) > self.max_open_maps:
+            _close_map(self._maps.popitem(last=False)[1])
+        return buffer
+
+    def close(self) -> None:
+        """Unmap all source files. Views can be materialized again afterwards."""
+        for buffer in self._maps.values():
+            _close_map(buffer)
+        self._maps.clear()
+
+    def __enter__(self) -> "ChunkViewTable":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _close_map(buffer: mmap.mmap) -> None:
+    try:
+        buffer.close()
+    except BufferError:
+        pass  # Still exported, e.g. by a running regex scan; closed when released
@@ -9,7 +9,8 @@ project_root = os.path.abspath(
 )
 sys.path.insert(0, project_root)
 
-from woodshed.services.scrape_wikipedia.config import config
+from woodshed.modules.text_processing.chunk_store import ChunkRecord, JsonlChunkWriter
+from woodshed.modules.text_processing.config import config
 
 
 def chunk_text(file_name: str, chunk_size: int = 1000) -> List[str]:
@@ -46,3 +47,39 @@ def save_chunks_to_json(chunks: List[str], output_file: str) -> None:
     file_path = config.tmp_dir / output_file
     with open(file_path, "w") as f:
         json.dump({"chunks": chunks}, f)
+
+
+def save_chunks_to_jsonl(chunks: List[str], output_file: str, source: str) -> None:
+    """
+    Save character chunks to a JSONL chunk file in the tmp directory, one record per chunk.
+
+    Word offsets count whitespace-delimited words of the source; a word cut in
+    two by a chunk boundary belongs to both chunks.
+
+    Args:
+    chunks (List[str]): List of consecutive text chunks, as returned by chunk_text
+    output_file (str): Name of the output JSONL file
+    source (str): Name of the file the chunks came from
+    """
+    file_path = config.tmp_dir / output_file
+    char_start = 0
+    words_seen = 0
+    ends_mid_word = False
+    with JsonlChunkWriter(file_path) as writer:
+        for chunk_index, chunk in enumerate(chunks):
+            continues_word = ends_mid_word and chunk[:1] and not chunk[0].isspace()
+            word_start = words_seen - 1 if continues_word else words_seen
+            words_seen = word_start + len(chunk.split())
+            writer.write(
+                ChunkRecord(
+                    source=source,
+                    chunk_index=chunk_index,
+                    text=chunk,
+                    char_start=char_start,
+                    char_end=char_start + len(chunk),
+                    word_start=word_start,
+                    word_end=words_seen,
+                )
+            )
+            char_start += len(chunk)
+            ends_mid_word = bool(chunk) and not chunk[-1].isspace()
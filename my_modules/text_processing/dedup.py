@@ -0,0 +1,195 @@
+"""
+Exact and near-duplicate elimination for text chunks.
+
+Scraped corpora repeat bylines, footers and syndicated paragraphs. Before
+chunks are embedded, exact copies are found by hashing their normalized
+text, and near copies by MinHash signatures over word shingles, bucketed
+with locality-sensitive hashing (LSH) so each chunk is only compared with
+likely matches. Every dropped chunk is mapped to the chunk that replaces it,
+so its source can still be resolved.
+"""
+
+import hashlib
+import re
+import zlib
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; with a, b
+# and x below 2 ** 32 the products fit in 64 bits
+MINHASH_PRIME = (1 << 32) + 15
+NORMALIZE_PATTERN = re.compile(r"\W+")
+
+
+class DedupResult(NamedTuple):
+    """Chunks to keep and where every dropped chunk went."""
+
+    kept: List[int]  # Indices of the chunks to keep, in input order
+    canonical: Dict[int, int]  # Index of each dropped chunk -> index of its kept copy
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase a text and reduce punctuation and whitespace runs to single spaces."""
+    return NORMALIZE_PATTERN.sub(" ", text.lower()).strip()
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """
+    Hash the overlapping word n-grams of a normalized text.
+
+    Texts shorter than one shingle are hashed as a whole.
+
+    Returns:
+        np.ndarray: The distinct 32-bit shingle hashes as uint64.
+    """
+    words = text.split()
+    count = max(1, len(words) - shingle_size + 1)
+    hashes = {
+        zlib.crc32(" ".join(words[i : i + shingle_size]).encode("utf-8"))
+        for i in range(count)
+    }
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+
+class MinHasher:
+    """Compute MinHash signatures with a fixed set of random hash functions."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        generator = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = generator.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = generator.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """Return the minimum of every hash function over a set of shingle hashes."""
+        if len(hashes) == 0:
+            return np.zeros(self.num_perm, dtype=np.uint64)
+        permuted = (self._a * hashes[np.newaxis, :] + self._b) % MINHASH_PRIME
+        return permuted.min(axis=1)
+
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two shingle sets from their signatures."""
+    return float(np.mean(first == second))
+
+
+def _validate_dedup_params(threshold: float, num_perm: int, bands: int) -> None:
+    """
+    Validate deduplication parameters.
+
+    Raises:
+        ValueError: If threshold is outside (0, 1] or num_perm is not a multiple of bands.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be between 0 and 1")
+    if bands < 1 or num_perm % bands:
+        raise ValueError("num_perm must be a positive multiple of bands")
+
+
+def deduplicate(
+    texts: Sequence[str],
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 8,
+    shingle_size: int = 5,
+    seed: int = 1,
+) -> DedupResult:
+    """
+    Find exact and near-duplicate texts, keeping the first occurrence of each.
+
+    Args:
+        texts (Sequence[str]): The chunks to deduplicate.
+        threshold (float): Estimated Jaccard similarity of word shingles from
+            which two chunks count as duplicates.
+        num_perm (int): Number of MinHash functions per signature.
+        bands (int): Number of LSH bands; num_perm / bands rows each. More
+            bands find more candidate pairs below the threshold.
+        shingle_size (int): Words per shingle.
+        seed (int): Seed of the MinHash functions.
+
+    Returns:
+        DedupResult: Indices of kept chunks and the duplicate mapping.
+
+    Raises:
+        ValueError: If a parameter is invalid.
+    """
+    _validate_dedup_params(threshold, num_perm, bands)
+    hasher = MinHasher(num_perm, seed)
+    rows = num_perm // bands
+
+    kept: List[int] = []
+    canonical: Dict[int, int] = {}
+    exact: Dict[bytes, int] = {}
+    signatures: Dict[int, np.ndarray] = {}
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+    for i, text in enumerate(texts):
+        normalized = normalize_text(text)
+        digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+        if digest in exact:
+            canonical[i] = exact[digest]
+            continue
+
+        signature = hasher.signature(shingle_hashes(normalized, shingle_size))
+        keys = [
+            (band, signature[band * rows : (band + 1) * rows].tobytes())
+            for band in range(bands)
+        ]
+        candidates = {j for key in keys for j in buckets.get(key, ())}
+        match = next(
+            (
+                j
+                for j in sorted(candidates)
+                if estimate_similarity(signature, signatures[j]) >= threshold
+            ),
+            None,
+        )
+        if match is not None:
+            canonical[i] = match
+            exact[digest] = match
+            continue
+
+        kept.append(i)
+        exact[digest] = i
+        signatures[i] = signature
+        for key in keys:
+            buckets.setdefault(key, []).append(i)
+    return DedupResult(kept, canonical)
+
+
+def deduplicate_file_chunks(
+    all_chunks: Dict[str, List[str]], threshold: float = 0.8
+) -> Tuple[Dict[str, List[str]], Dict[Tuple[str, int], Tuple[str, int]]]:
+    """
+    Deduplicate the output of process_directory across all files.
+
+    Args:
+        all_chunks (Dict[str, List[str]]): Chunks per file name.
+        threshold (float): Similarity from which chunks count as duplicates.
+
+    Returns:
+        Tuple: The kept chunks per file name, and a mapping from every dropped
+        (file name, index in all_chunks) to the (file name, index in the kept
+        chunks) of its kept copy, so ``kept[name][index]`` is that copy.
+    """
+    positions = [
+        (name, index)
+        for name, chunks in all_chunks.items()
+        for index in range(len(chunks))
+    ]
+    result = deduplicate(
+        [all_chunks[name][index] for name, index in positions], threshold
+    )
+
+    kept_chunks: Dict[str, List[str]] = {name: [] for name in all_chunks}
+    kept_positions = {}
+    for i in result.kept:
+        name, index = positions[i]
+        kept_positions[i] = (name, len(kept_chunks[name]))
+        kept_chunks[name].append(all_chunks[name][index])
+    mapping = {
+        positions[duplicate]: kept_positions[original]
+        for duplicate, original in result.canonical.items()
+    }
+    return kept_chunks, mapping
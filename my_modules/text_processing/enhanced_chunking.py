@@ -3,9 +3,26 @@
 import json
 import logging
 import os
+import re
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterator, List
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 # Set up logging
 log_dir = Path("/Users/mpaz/workspace/woodshed-ai/logs")
@@ -23,6 +40,31 @@ class Config:
         self.data_dir = Path("/Users/mpaz/workspace/woodshed-ai/data/input/articles")
         self.tmp_dir = Path("/Users/mpaz/workspace/woodshed-ai/data/output")
         self.output_file = self.tmp_dir / "chunked_files.json"
+        self.manifest_file = self.tmp_dir / "chunked_files.manifest.json"
+
+
+T = TypeVar("T")
+
+WORD_PATTERN = re.compile(r"\S+")
+
+
+class ChunkSpan(NamedTuple):
+    """A chunk together with its position in the source text."""
+
+    text: str
+    word_start: int  # Index of the first word in the chunk
+    word_end: int  # Index one past the last word in the chunk
+    char_start: int  # Character offset of the first word
+    char_end: int  # Character offset one past the last word
+
+
+class FileChunkResult(NamedTuple):
+    """Outcome of chunking a single file, as reported by iter_directory_results."""
+
+    file_name: str
+    chunks: List[str]
+    elapsed: float
+    error: Optional[str] = None
 
 
 def read_file_in_chunks(file_path: Path, chunk_size: int = 1024) -> Iterator[str]:
@@ -53,6 +95,206 @@ def read_file_in_chunks(file_path: Path, chunk_size: int = 1024) -> Iterator[str
         raise IOError(f"Error reading file {file_path}: {str(e)}")
 
 
+def _validate_chunk_params(chunk_size: int, overlap: int) -> None:
+    """
+    Validate word chunking parameters.
+
+    Raises:
+        ValueError: If chunk_size or overlap is less than 1, or overlap is not smaller than chunk_size.
+    """
+    if chunk_size < 1 or overlap < 1:
+        raise ValueError("chunk_size and overlap must be at least 1")
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+
+
+def iter_words(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Split a stream of text pieces into whitespace-delimited words.
+
+    A word that straddles the boundary between two pieces is carried over and
+    emitted once it is complete, so the output matches ``"".join(pieces).split()``.
+
+    Args:
+        pieces (Iterable[str]): Consecutive pieces of a text, e.g. from read_file_in_chunks.
+
+    Yields:
+        str: Words in the order they appear in the text.
+    """
+    carry = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        words = (carry + piece).split()
+        carry = ""
+        if words and not piece[-1].isspace():
+            carry = words.pop()
+        yield from words
+    if carry:
+        yield carry
+
+
+def iter_windows(
+    items: Iterable[T], chunk_size: int, overlap: int
+) -> Iterator[List[T]]:
+    """
+    Group a stream of items into overlapping windows.
+
+    Only the last ``chunk_size`` items are held in memory. The windows are the
+    same as ``items[start : start + chunk_size]`` for every
+    ``start = 0, chunk_size - overlap, ...`` below the number of items, which is
+    the slicing used by chunk_text.
+
+    Args:
+        items (Iterable[T]): The items to group.
+        chunk_size (int): The number of items in each window.
+        overlap (int): The number of items shared by consecutive windows.
+
+    Yields:
+        List[T]: Each window, in order.
+
+    Raises:
+        ValueError: If chunk_size or overlap is less than 1, or overlap is not smaller than chunk_size.
+    """
+    _validate_chunk_params(chunk_size, overlap)
+
+    step = chunk_size - overlap
+    window: Deque[T] = deque(maxlen=chunk_size)
+    seen = 0  # Number of items consumed so far
+    next_start = 0  # Index of the first item of the next window
+
+    for item in items:
+        window.append(item)
+        seen += 1
+        if seen == next_start + chunk_size:
+            yield list(window)
+            next_start += step
+
+    # Flush the trailing windows that run past the end of the stream
+    first_buffered = seen - len(window)
+    buffered = list(window)
+    while next_start < seen:
+        yield buffered[next_start - first_buffered :]
+        next_start += step
+
+
+def iter_chunks(pieces: Iterable[str], chunk_size: int, overlap: int) -> Iterator[str]:
+    """
+    Stream overlapping word chunks from a stream of text pieces.
+
+    This is the constant-memory counterpart of chunk_text: only ``chunk_size``
+    words are buffered at a time, and the chunks are identical to
+    ``chunk_text("".join(pieces), chunk_size, overlap)``.
+
+    Args:
+        pieces (Iterable[str]): Consecutive pieces of a text, e.g. from read_file_in_chunks.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+
+    Yields:
+        str: Text chunks, in order.
+
+    Raises:
+        ValueError: If chunk_size or overlap is less than 1, or overlap is not smaller than chunk_size.
+    """
+    for window in iter_windows(iter_words(pieces), chunk_size, overlap):
+        yield " ".join(window)
+
+
+def iter_word_spans(pieces: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+    """
+    Split a stream of text pieces into words along with their character offsets.
+
+    Like iter_words, but slower because positions are tracked. Words are the
+    same as those produced by ``str.split()``.
+
+    Args:
+        pieces (Iterable[str]): Consecutive pieces of a text, e.g. from read_file_in_chunks.
+
+    Yields:
+        Tuple[str, int, int]: Each word with its start and end character offsets.
+    """
+    carry = ""
+    carry_start = 0  # Offset of the carried text in the whole stream
+    for piece in pieces:
+        if not piece:
+            continue
+        text = carry + piece
+        spans = [(m.group(), m.start(), m.end()) for m in WORD_PATTERN.finditer(text)]
+        carry = ""
+        if spans and not piece[-1].isspace():
+            word, start, _ = spans.pop()
+            carry = word
+            next_carry_start = carry_start + start
+        else:
+            next_carry_start = carry_start + len(text)
+        for word, start, end in spans:
+            yield word, carry_start + start, carry_start + end
+        carry_start = next_carry_start
+    if carry:
+        yield carry, carry_start, carry_start + len(carry)
+
+
+def iter_chunk_spans(
+    pieces: Iterable[str], chunk_size: int, overlap: int
+) -> Iterator[ChunkSpan]:
+    """
+    Stream overlapping word chunks together with their word and character offsets.
+
+    The chunk texts are identical to those of iter_chunks and chunk_text.
+
+    Args:
+        pieces (Iterable[str]): Consecutive pieces of a text, e.g. from read_file_in_chunks.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+
+    Yields:
+        ChunkSpan: Each chunk with its offsets, in order.
+
+    Raises:
+        ValueError: If chunk_size or overlap is less than 1, or overlap is not smaller than chunk_size.
+    """
+    indexed_spans = (
+        (index, word, start, end)
+        for index, (word, start, end) in enumerate(iter_word_spans(pieces))
+    )
+    for window in iter_windows(indexed_spans, chunk_size, overlap):
+        first, last = window[0], window[-1]
+        yield ChunkSpan(
+            " ".join(word for _, word, _, _ in window),
+            first[0],
+            last[0] + 1,
+            first[2],
+            last[3],
+        )
+
+
+def iter_file_chunks(
+    file_path: Path, chunk_size: int, overlap: int, read_size: int = 1024
+) -> Iterator[str]:
+    """
+    Stream overlapping word chunks from a file without loading it into memory.
+
+    Args:
+        file_path (Path): Path to the file to be chunked.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+        read_size (int): Number of characters to read from the file at a time.
+
+    Yields:
+        str: Text chunks, in order.
+
+    Raises:
+        FileNotFoundError: If the specified file does not exist.
+        IOError: If there's an error reading the file.
+        ValueError: If chunk_size or overlap is invalid.
+    """
+    _validate_chunk_params(chunk_size, overlap)
+    yield from iter_chunks(
+        read_file_in_chunks(file_path, read_size), chunk_size, overlap
+    )
+
+
 def chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
     """
     Split text into chunks of words with specified overlap.
@@ -66,10 +308,9 @@ def chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
         List[str]: A list of text chunks.
 
     Raises:
-        ValueError: If chunk_size or overlap is less than 1.
+        ValueError: If chunk_size or overlap is less than 1, or overlap is not smaller than chunk_size.
     """
-    if chunk_size < 1 or overlap < 1:
-        raise ValueError("chunk_size and overlap must be at least 1")
+    _validate_chunk_params(chunk_size, overlap)
 
     words = text.split()
     chunks = []
@@ -88,7 +329,9 @@ def process_file(
     file_path: Path, chunk_size: int, overlap: int
 ) -> Dict[str, List[str]]:
     """
-    Process a single file by reading it in chunks and then splitting into overlapping word chunks.
+    Process a single file by streaming it through the word chunker.
+
+    The file is never held in memory as a whole; only the resulting chunks are.
 
     Args:
         file_path (Path): Path to the file to be processed.
@@ -103,16 +346,115 @@ def process_file(
         IOError: If there's an error reading the file.
     """
     try:
-        text = "".join(read_file_in_chunks(file_path))
-        chunks = chunk_text(text, chunk_size, overlap)
+        chunks = list(iter_file_chunks(file_path, chunk_size, overlap))
         return {file_path.name: chunks}
     except (FileNotFoundError, IOError) as e:
         logging.error(f"Error processing file {file_path}: {str(e)}")
         return {}
 
 
+def _chunk_file_timed(
+    file_path: Path, chunk_size: int, overlap: int
+) -> FileChunkResult:
+    """
+    Chunk a single file and time it, capturing any error instead of raising.
+
+    Defined at module level so it can be pickled into worker processes.
+    """
+    start = time.perf_counter()
+    try:
+        chunks = list(iter_file_chunks(file_path, chunk_size, overlap))
+        return FileChunkResult(file_path.name, chunks, time.perf_counter() - start)
+    except Exception as e:
+        return FileChunkResult(
+            file_path.name, [], time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        )
+
+
+def iter_file_results(
+    file_paths: List[Path],
+    chunk_size: int,
+    overlap: int,
+    workers: Optional[int] = 1,
+    chunker: Callable[..., Any] = _chunk_file_timed,
+) -> Iterator[Any]:
+    """
+    Chunk the given files, optionally across a process pool.
+
+    Results are yielded in the order of ``file_paths`` as soon as they are
+    ready, regardless of the number of workers. A file that fails to chunk is
+    reported through the ``error`` field of its result rather than stopping
+    the run.
+
+    Args:
+        file_paths (List[Path]): Paths of the files to chunk.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+        workers (Optional[int]): Number of worker processes. 1 chunks in the
+            current process; None uses one worker per CPU.
+        chunker (Callable): Module-level function called as
+            ``chunker(file_path, chunk_size=..., overlap=...)`` for each file;
+            it must report errors in its result rather than raise.
+
+    Yields:
+        FileChunkResult: The chunks, elapsed seconds and error (if any) of each
+        file, or whatever a custom chunker returns.
+
+    Raises:
+        ValueError: If chunk_size or overlap is invalid, or workers is less than 1.
+    """
+    _validate_chunk_params(chunk_size, overlap)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    chunk_file = partial(chunker, chunk_size=chunk_size, overlap=overlap)
+
+    if workers == 1 or len(file_paths) < 2:
+        yield from map(chunk_file, file_paths)
+        return
+
+    # Hand files to workers in batches so small files don't pay one IPC round trip each
+    batch_size = max(1, len(file_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(chunk_file, file_paths, chunksize=batch_size)
+
+
+def iter_directory_results(
+    directory: Path, chunk_size: int, overlap: int, workers: Optional[int] = 1
+) -> Iterator[FileChunkResult]:
+    """
+    Chunk all text files in a directory, in sorted name order.
+
+    See iter_file_results for how results and errors are reported.
+
+    Args:
+        directory (Path): Path to the directory containing text files.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+        workers (Optional[int]): Number of worker processes. 1 chunks in the
+            current process; None uses one worker per CPU.
+        chunker (Callable): Module-level function called as
+            ``chunker(file_path, chunk_size=..., overlap=...)`` for each file;
+            it must report errors in its result rather than raise.
+
+    Yields:
+        FileChunkResult: The chunks, elapsed seconds and error (if any) of each file.
+
+    Raises:
+        NotADirectoryError: If the specified path is not a directory.
+        ValueError: If chunk_size or overlap is invalid, or workers is less than 1.
+    """
+    if not directory.is_dir():
+        raise NotADirectoryError(f"{directory} is not a valid directory")
+    yield from iter_file_results(
+        sorted(directory.glob("*.txt")), chunk_size, overlap, workers
+    )
+
+
 def process_directory(
-    directory: Path, chunk_size: int, overlap: int
+    directory: Path, chunk_size: int, overlap: int, workers: Optional[int] = 1
 ) -> Dict[str, List[str]]:
     """
     Process all text files in the given directory.
@@ -121,6 +463,11 @@ def process_directory(
         directory (Path): Path to the directory containing text files.
         chunk_size (int): The number of words in each chunk.
         overlap (int): The number of words to overlap between chunks.
+        workers (Optional[int]): Number of worker processes. 1 chunks in the
+            current process; None uses one worker per CPU.
+        chunker (Callable): Module-level function called as
+            ``chunker(file_path, chunk_size=..., overlap=...)`` for each file;
+            it must report errors in its result rather than raise.
 
     Returns:
         Dict[str, List[str]]: A dictionary with filenames as keys and lists of chunks as values.
@@ -128,12 +475,16 @@ def process_directory(
     Raises:
         NotADirectoryError: If the specified path is not a directory.
     """
-    if not directory.is_dir():
-        raise NotADirectoryError(f"{directory} is not a valid directory")
-
     all_chunks = {}
-    for file_path in directory.glob("*.txt"):
-        all_chunks.update(process_file(file_path, chunk_size, overlap))
+    for result in iter_directory_results(directory, chunk_size, overlap, workers):
+        if result.error:
+            logging.error(f"Error processing file {result.file_name}: {result.error}")
+            continue
+        logging.info(
+            f"Chunked {result.file_name} into {len(result.chunks)} chunks "
+            f"in {result.elapsed:.3f}s"
+        )
+        all_chunks[result.file_name] = result.chunks
     return all_chunks
 
 
@@ -158,12 +509,13 @@ def save_chunks_to_json(chunks: Dict[str, List[str]], output_file: Path) -> None
 if __name__ == "__main__":
     chunk_size = 1000
     overlap = 200
+    workers = None  # One worker process per CPU
 
     # Initialize the config without parameters
     config = Config()
 
     try:
-        all_chunks = process_directory(config.data_dir, chunk_size, overlap)
+        all_chunks = process_directory(config.data_dir, chunk_size, overlap, workers)
         save_chunks_to_json(all_chunks, config.output_file)
         logging.info(f"Chunked files have been saved to {config.output_file}")
     except Exception as e:
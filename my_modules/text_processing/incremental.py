@@ -0,0 +1,381 @@
+"""
+Incremental re-chunking of a directory backed by a content-hash manifest.
+
+The manifest records, for every chunked file, its size, mtime, SHA-256 and the
+chunk parameters used, plus the byte range its entry occupies in the output
+JSON. On later runs only new or changed files are re-chunked; unchanged
+entries are copied byte for byte from the previous output and deleted files
+are dropped.
+
+The manifest also fingerprints the output it describes (size, mtime and
+SHA-256). If the two ever disagree, for instance after a crash between
+replacing the output and writing the manifest, the stale offsets are not
+trusted and the next run rebuilds everything.
+
+A re-chunked file is hashed from the same bytes that are chunked, in the
+same read, and its size and mtime are taken from that open file before
+reading. An edit made during the run therefore leaves a newer mtime than the
+manifest records, and the file is checked again on the next run.
+
+Usage: python -m woodshed.modules.text_processing.incremental
+"""
+
+import codecs
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, List, NamedTuple, Optional
+
+from .enhanced_chunking import Config, iter_chunks, iter_file_results
+
+MANIFEST_VERSION = 2
+
+
+@dataclass
+class ManifestEntry:
+    """Everything needed to decide whether a file must be re-chunked."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    chunk_size: int
+    overlap: int
+    chunk_count: int
+    offset: int  # Byte offset of the file's entry in the output JSON
+    length: int  # Byte length of the file's entry in the output JSON
+
+
+@dataclass
+class OutputFingerprint:
+    """Identifies the exact output file a manifest's byte offsets refer to."""
+
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class RechunkResult(NamedTuple):
+    """Chunks of a file together with the fingerprint of the bytes they came from."""
+
+    file_name: str
+    chunks: List[str]
+    sha256: str
+    size: int
+    mtime_ns: int
+    error: Optional[str] = None
+
+
+@dataclass
+class IncrementalSummary:
+    """File names grouped by what an incremental run did with them."""
+
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+
+
+def hash_file(file_path: Path, block_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 of a file without loading it into memory.
+
+    Args:
+        file_path (Path): Path to the file to hash.
+        block_size (int): Number of bytes to read at a time.
+
+    Returns:
+        str: The hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _matches_output(fingerprint: OutputFingerprint, output_file: Path) -> bool:
+    """Check an output file against a fingerprint, hashing only when its mtime moved."""
+    try:
+        stat = output_file.stat()
+    except FileNotFoundError:
+        return False
+    if stat.st_size != fingerprint.size:
+        return False
+    if stat.st_mtime_ns == fingerprint.mtime_ns:
+        return True
+    return hash_file(output_file) == fingerprint.sha256
+
+
+def load_manifest(
+    manifest_file: Path, output_file: Optional[Path] = None
+) -> Dict[str, ManifestEntry]:
+    """
+    Load a manifest written by save_manifest.
+
+    A missing, unreadable or outdated manifest is treated as empty, which makes
+    the next run a full pass. So is one that does not describe output_file.
+
+    Args:
+        manifest_file (Path): Path of the manifest JSON file.
+        output_file (Optional[Path]): The output the entries' byte offsets must
+            refer to; not checked if None.
+
+    Returns:
+        Dict[str, ManifestEntry]: Manifest entries keyed by file name.
+    """
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            logging.info(f"Ignoring manifest {manifest_file} with an old version")
+            return {}
+        if output_file is not None and not _matches_output(
+            OutputFingerprint(**data["output"]), output_file
+        ):
+            logging.info(f"Ignoring manifest {manifest_file} of a different output")
+            return {}
+        return {name: ManifestEntry(**entry) for name, entry in data["files"].items()}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.error(f"Ignoring unreadable manifest {manifest_file}: {str(e)}")
+        return {}
+
+
+def save_manifest(
+    entries: Dict[str, ManifestEntry],
+    manifest_file: Path,
+    output: OutputFingerprint,
+) -> None:
+    """
+    Atomically write the manifest to disk.
+
+    Args:
+        entries (Dict[str, ManifestEntry]): Manifest entries keyed by file name.
+        manifest_file (Path): Path of the manifest JSON file.
+        output (OutputFingerprint): The output file the entries describe.
+    """
+    data = {
+        "version": MANIFEST_VERSION,
+        "output": asdict(output),
+        "files": {name: asdict(entry) for name, entry in sorted(entries.items())},
+    }
+    tmp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_file, manifest_file)
+
+
+def _is_unchanged(
+    entry: Optional[ManifestEntry],
+    file_path: Path,
+    stat: os.stat_result,
+    chunk_size: int,
+    overlap: int,
+) -> bool:
+    """
+    Check a file against its manifest entry, hashing only when size and mtime disagree.
+
+    When the content turns out to be identical the entry's mtime is refreshed
+    so the next run can skip the hash.
+    """
+    if entry is None or (entry.chunk_size, entry.overlap) != (chunk_size, overlap):
+        return False
+    if entry.size != stat.st_size:
+        return False
+    if entry.mtime_ns == stat.st_mtime_ns:
+        return True
+    if hash_file(file_path) != entry.sha256:
+        return False
+    entry.mtime_ns = stat.st_mtime_ns
+    return True
+
+
+def _rechunk_file(
+    file_path: Path, chunk_size: int, overlap: int, block_size: int = 1 << 16
+) -> RechunkResult:
+    """
+    Chunk a file and fingerprint the bytes that were chunked, in one read.
+
+    Defined at module level so it can be pickled into worker processes.
+    """
+    try:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+
+            def pieces():
+                decoder = codecs.getincrementaldecoder("utf-8")()
+                for block in iter(lambda: f.read(block_size), b""):
+                    digest.update(block)
+                    yield decoder.decode(block)
+                yield decoder.decode(b"", final=True)
+
+            chunks = list(iter_chunks(pieces(), chunk_size, overlap))
+        return RechunkResult(
+            file_path.name, chunks, digest.hexdigest(), stat.st_size, stat.st_mtime_ns
+        )
+    except Exception as e:
+        return RechunkResult(file_path.name, [], "", 0, 0, f"{type(e).__name__}: {e}")
+
+
+class _HashingWriter:
+    """Binary file wrapper that hashes everything written through it."""
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        return self.out.write(data)
+
+    def tell(self) -> int:
+        return self.out.tell()
+
+
+def _write_entry(out: BinaryIO, is_first: bool, entry_bytes: bytes) -> int:
+    """Write one ``"name": [...]`` member of the output object and return its offset."""
+    out.write(b"\n  " if is_first else b",\n  ")
+    offset = out.tell()
+    out.write(entry_bytes)
+    return offset
+
+
+def incremental_process_directory(
+    directory: Path,
+    output_file: Path,
+    manifest_file: Path,
+    chunk_size: int,
+    overlap: int,
+    workers: Optional[int] = 1,
+) -> IncrementalSummary:
+    """
+    Bring the chunk output of a directory up to date, re-chunking only what changed.
+
+    The output has the same ``{file name: [chunks]}`` shape as
+    save_chunks_to_json, so existing readers keep working.
+
+    Args:
+        directory (Path): Path to the directory containing text files.
+        output_file (Path): Path of the chunk output JSON file.
+        manifest_file (Path): Path of the manifest JSON file.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+        workers (Optional[int]): Number of worker processes used for re-chunking.
+
+    Returns:
+        IncrementalSummary: Which files were added, changed, unchanged, removed or failed.
+
+    Raises:
+        NotADirectoryError: If the specified path is not a directory.
+    """
+    if not directory.is_dir():
+        raise NotADirectoryError(f"{directory} is not a valid directory")
+
+    # Without the previous output there is nothing to copy entries from
+    old_entries = (
+        load_manifest(manifest_file, output_file) if output_file.exists() else {}
+    )
+    summary = IncrementalSummary()
+    file_paths = sorted(directory.glob("*.txt"))
+    stats = {path.name: path.stat() for path in file_paths}
+
+    stale_paths = []
+    for path in file_paths:
+        entry = old_entries.get(path.name)
+        if _is_unchanged(entry, path, stats[path.name], chunk_size, overlap):
+            summary.unchanged.append(path.name)
+        else:
+            stale_paths.append(path)
+            (summary.changed if entry else summary.added).append(path.name)
+    summary.removed = sorted(set(old_entries) - set(stats))
+
+    unchanged = set(summary.unchanged)
+    new_entries: Dict[str, ManifestEntry] = {}
+    rechunked = iter_file_results(
+        stale_paths, chunk_size, overlap, workers, chunker=_rechunk_file
+    )
+    next_result = next(rechunked, None)
+
+    tmp_file = output_file.with_name(output_file.name + ".tmp")
+    old_output = open(output_file, "rb") if summary.unchanged else None
+    try:
+        with open(tmp_file, "wb") as tmp:
+            out = _HashingWriter(tmp)
+            out.write(b"{")
+            for path in file_paths:
+                name = path.name
+                is_first = not new_entries
+                if name in unchanged:
+                    entry = old_entries[name]
+                    old_output.seek(entry.offset)
+                    entry.offset = _write_entry(
+                        out, is_first, old_output.read(entry.length)
+                    )
+                    new_entries[name] = entry
+                    continue
+
+                # Stale files come back from the pool in file_paths order
+                result, next_result = next_result, next(rechunked, None)
+                if result.error:
+                    logging.error(f"Error processing file {name}: {result.error}")
+                    summary.failed.append(name)
+                    continue
+
+                entry_bytes = (
+                    f"{json.dumps(name, ensure_ascii=False)}: "
+                    f"{json.dumps(result.chunks, ensure_ascii=False)}"
+                ).encode("utf-8")
+                new_entries[name] = ManifestEntry(
+                    path=str(path),
+                    size=result.size,
+                    mtime_ns=result.mtime_ns,
+                    sha256=result.sha256,
+                    chunk_size=chunk_size,
+                    overlap=overlap,
+                    chunk_count=len(result.chunks),
+                    offset=_write_entry(out, is_first, entry_bytes),
+                    length=len(entry_bytes),
+                )
+            out.write(b"\n}\n" if new_entries else b"}\n")
+    finally:
+        if old_output is not None:
+            old_output.close()
+
+    os.replace(tmp_file, output_file)
+    stat = output_file.stat()
+    output = OutputFingerprint(stat.st_size, stat.st_mtime_ns, out.digest.hexdigest())
+    save_manifest(new_entries, manifest_file, output)
+    return summary
+
+
+if __name__ == "__main__":
+    chunk_size = 1000
+    overlap = 200
+    workers = None  # One worker process per CPU
+
+    # Initialize the config without parameters
+    config = Config()
+
+    try:
+        summary = incremental_process_directory(
+            config.data_dir,
+            config.output_file,
+            config.manifest_file,
+            chunk_size,
+            overlap,
+            workers,
+        )
+        logging.info(
+            f"Incremental chunking done: {len(summary.added)} added, "
+            f"{len(summary.changed)} changed, {len(summary.unchanged)} unchanged, "
+            f"{len(summary.removed)} removed, {len(summary.failed)} failed"
+        )
+    except Exception as e:
+        logging.error(f"An error occurred: {str(e)}")
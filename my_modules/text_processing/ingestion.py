@@ -0,0 +1,380 @@
+"""
+Multi-format ingestion into the word chunker.
+
+Each supported format has an extractor that streams a file as a sequence of
+sections: paragraphs of plain text, paragraphs under their heading for
+Markdown and HTML, and pages for PDF. Sections flow straight into the
+sliding-window chunker, so no file is ever held in memory as one string,
+and every chunk carries the metadata of where it came from (heading, page
+numbers). Files are processed in parallel the same way as process_directory.
+
+Usage: python -m woodshed.modules.text_processing.ingestion
+"""
+
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from .enhanced_chunking import Config, _validate_chunk_params, iter_windows
+
+HEADING_PATTERN = re.compile(r"^[ \t]{0,3}(#{1,6})[ \t]+(.*?)[ \t#]*$")
+HTML_READ_SIZE = 1 << 16
+
+
+class Section(NamedTuple):
+    """A piece of a document together with what is known about its position."""
+
+    text: str
+    metadata: Dict[str, object]
+
+
+class DocumentChunk(NamedTuple):
+    """A chunk of an ingested document with the metadata of its first section."""
+
+    source: str
+    chunk_index: int
+    text: str
+    metadata: Dict[str, object]
+
+
+class IngestResult(NamedTuple):
+    """Outcome of ingesting a single file, as reported by iter_ingest_results."""
+
+    file_name: str
+    chunks: List[DocumentChunk]
+    elapsed: float
+    error: Optional[str] = None
+
+
+def _iter_paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    """Group lines into paragraphs separated by blank lines."""
+    paragraph: List[str] = []
+    for line in lines:
+        if line.strip():
+            paragraph.append(line)
+        elif paragraph:
+            yield "".join(paragraph)
+            paragraph = []
+    if paragraph:
+        yield "".join(paragraph)
+
+
+def extract_text_sections(file_path: Path) -> Iterator[Section]:
+    """Stream a plain text file paragraph by paragraph."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        for paragraph in _iter_paragraphs(f):
+            yield Section(paragraph, {})
+
+
+def extract_markdown_sections(file_path: Path) -> Iterator[Section]:
+    """Stream a Markdown file paragraph by paragraph, tagged with the heading path."""
+    headings: List[str] = []
+
+    def lines_with_headings(f) -> Iterator[str]:
+        for line in f:
+            match = HEADING_PATTERN.match(line)
+            if match:
+                # End the paragraph before the heading while the old path applies
+                yield "\n"
+                level = len(match.group(1))
+                del headings[level - 1 :]
+                headings.extend([""] * (level - 1 - len(headings)))
+                headings.append(match.group(2))
+            yield line
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        for paragraph in _iter_paragraphs(lines_with_headings(f)):
+            metadata = {"heading": " > ".join(h for h in headings if h)}
+            yield Section(paragraph, metadata if headings else {})
+
+
+class _HTMLSectionParser(HTMLParser):
+    """Collect the visible text of an HTML document as paragraphs under headings."""
+
+    BLOCK_TAGS = {
+        "p",
+        "div",
+        "li",
+        "ul",
+        "ol",
+        "br",
+        "tr",
+        "table",
+        "section",
+        "article",
+        "blockquote",
+        "pre",
+        "header",
+        "footer",
+        "main",
+        "nav",
+        "dd",
+        "dt",
+    }
+    HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+    HIDDEN_TAGS = {"script", "style", "noscript", "template", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections: List[Section] = []
+        self._text: List[str] = []
+        self._hidden = 0
+        self._heading: Optional[str] = None
+        self._in_heading = False
+
+    def _flush(self) -> None:
+        text = " ".join("".join(self._text).split())
+        self._text = []
+        if not text:
+            return
+        if self._in_heading:
+            self._heading = text
+        metadata = {"heading": self._heading} if self._heading else {}
+        self.sections.append(Section(text, metadata))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.HIDDEN_TAGS:
+            self._hidden += 1
+        elif tag in self.HEADING_TAGS:
+            self._flush()
+            self._in_heading = True
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self.HIDDEN_TAGS:
+            self._hidden = max(0, self._hidden - 1)
+        elif tag in self.HEADING_TAGS:
+            self._flush()
+            self._in_heading = False
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._hidden:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract_html_sections(file_path: Path) -> Iterator[Section]:
+    """Stream the visible text of an HTML file block by block, tagged with the heading."""
+    parser = _HTMLSectionParser()
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        while piece := f.read(HTML_READ_SIZE):
+            parser.feed(piece)
+            yield from parser.sections
+            parser.sections.clear()
+    parser.close()
+    yield from parser.sections
+
+
+def extract_pdf_sections(file_path: Path) -> Iterator[Section]:
+    """Stream a PDF page by page, tagged with the 1-based page number."""
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError(
+            "pypdf is required to ingest PDF files: pip install pypdf"
+        ) from e
+
+    reader = PdfReader(str(file_path))
+    for page_number, page in enumerate(reader.pages, start=1):
+        yield Section(page.extract_text() or "", {"page": page_number})
+
+
+EXTRACTORS: Dict[str, Callable[[Path], Iterator[Section]]] = {
+    ".txt": extract_text_sections,
+    ".md": extract_markdown_sections,
+    ".markdown": extract_markdown_sections,
+    ".html": extract_html_sections,
+    ".htm": extract_html_sections,
+    ".pdf": extract_pdf_sections,
+}
+
+
+def iter_sections(file_path: Path) -> Iterator[Section]:
+    """
+    Stream the sections of a file with the extractor for its suffix.
+
+    Raises:
+        ValueError: If the file format is not supported.
+    """
+    extractor = EXTRACTORS.get(file_path.suffix.lower())
+    if extractor is None:
+        raise ValueError(f"Unsupported file format: {file_path.suffix}")
+    return extractor(file_path)
+
+
+def iter_section_chunks(
+    sections: Iterable[Section], chunk_size: int, overlap: int
+) -> Iterator[Section]:
+    """
+    Chunk a stream of sections into overlapping word windows.
+
+    Windows run across section boundaries. Each chunk takes the metadata of
+    the section its first word came from; when a chunk spans several pages,
+    ``page_end`` holds the page of its last word.
+
+    Args:
+        sections (Iterable[Section]): The sections of one document, in order.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+
+    Yields:
+        Section: Each chunk's text and metadata.
+
+    Raises:
+        ValueError: If chunk_size or overlap is invalid.
+    """
+    _validate_chunk_params(chunk_size, overlap)
+    tagged_words = (
+        (word, section.metadata)
+        for section in sections
+        for word in section.text.split()
+    )
+    for window in iter_windows(tagged_words, chunk_size, overlap):
+        metadata = window[0][1]
+        last_page = window[-1][1].get("page")
+        if last_page is not None and last_page != metadata.get("page"):
+            metadata = dict(metadata, page_end=last_page)
+        yield Section(" ".join(word for word, _ in window), metadata)
+
+
+def iter_document_chunks(
+    file_path: Path, chunk_size: int, overlap: int
+) -> Iterator[DocumentChunk]:
+    """
+    Stream the chunks of a file of any supported format.
+
+    Args:
+        file_path (Path): Path to the file to be ingested.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+
+    Yields:
+        DocumentChunk: Each chunk with its source, index and metadata.
+
+    Raises:
+        ValueError: If the file format or the chunk parameters are invalid.
+    """
+    chunks = iter_section_chunks(iter_sections(file_path), chunk_size, overlap)
+    for chunk_index, (text, metadata) in enumerate(chunks):
+        yield DocumentChunk(file_path.name, chunk_index, text, metadata)
+
+
+def _ingest_file_timed(file_path: Path, chunk_size: int, overlap: int) -> IngestResult:
+    """
+    Ingest a single file and time it, capturing any error instead of raising.
+
+    Defined at module level so it can be pickled into worker processes.
+    """
+    start = time.perf_counter()
+    try:
+        chunks = list(iter_document_chunks(file_path, chunk_size, overlap))
+        return IngestResult(file_path.name, chunks, time.perf_counter() - start)
+    except Exception as e:
+        return IngestResult(
+            file_path.name, [], time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        )
+
+
+def iter_ingest_results(
+    directory: Path, chunk_size: int, overlap: int, workers: Optional[int] = 1
+) -> Iterator[IngestResult]:
+    """
+    Ingest every supported file in a directory, optionally across a process pool.
+
+    Results are yielded in sorted file name order as soon as they are ready.
+    A file that fails is reported through the ``error`` field of its result
+    rather than stopping the run.
+
+    Args:
+        directory (Path): Path to the directory containing the documents.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+        workers (Optional[int]): Number of worker processes. 1 ingests in the
+            current process; None uses one worker per CPU.
+
+    Yields:
+        IngestResult: The chunks, elapsed seconds and error (if any) of each file.
+
+    Raises:
+        NotADirectoryError: If the specified path is not a directory.
+        ValueError: If chunk_size or overlap is invalid, or workers is less than 1.
+    """
+    if not directory.is_dir():
+        raise NotADirectoryError(f"{directory} is not a valid directory")
+    _validate_chunk_params(chunk_size, overlap)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    file_paths = sorted(
+        path for path in directory.iterdir() if path.suffix.lower() in EXTRACTORS
+    )
+    ingest_file = partial(_ingest_file_timed, chunk_size=chunk_size, overlap=overlap)
+
+    if workers == 1 or len(file_paths) < 2:
+        yield from map(ingest_file, file_paths)
+        return
+
+    # Large PDFs dominate the run time, so hand files out one at a time
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(ingest_file, file_paths)
+
+
+def ingest_directory(
+    directory: Path, chunk_size: int, overlap: int, workers: Optional[int] = 1
+) -> Dict[str, List[DocumentChunk]]:
+    """
+    Ingest all supported documents in a directory.
+
+    Args:
+        directory (Path): Path to the directory containing the documents.
+        chunk_size (int): The number of words in each chunk.
+        overlap (int): The number of words to overlap between chunks.
+        workers (Optional[int]): Number of worker processes. 1 ingests in the
+            current process; None uses one worker per CPU.
+
+    Returns:
+        Dict[str, List[DocumentChunk]]: A dictionary with filenames as keys and lists of chunks as values.
+
+    Raises:
+        NotADirectoryError: If the specified path is not a directory.
+    """
+    all_chunks = {}
+    for result in iter_ingest_results(directory, chunk_size, overlap, workers):
+        if result.error:
+            logging.error(f"Error ingesting file {result.file_name}: {result.error}")
+            continue
+        logging.info(
+            f"Ingested {result.file_name} into {len(result.chunks)} chunks "
+            f"in {result.elapsed:.3f}s"
+        )
+        all_chunks[result.file_name] = result.chunks
+    return all_chunks
+
+
+if __name__ == "__main__":
+    chunk_size = 1000
+    overlap = 200
+    workers = None  # One worker process per CPU
+
+    # Initialize the config without parameters
+    config = Config()
+
+    try:
+        chunks = ingest_directory(config.data_dir, chunk_size, overlap, workers)
+        logging.info(f"Ingested {len(chunks)} documents")
+    except Exception as e:
+        logging.error(f"An error occurred: {str(e)}")
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+
+from woodshed.modules.text_processing.benchmark import (
+    compare_results,
+    parse_size,
+    run_benchmarks,
+    run_vector_benchmarks,
+)
+
+SAMPLE_DIR = Path(__file__).resolve().parents[3] / "data" / "test"
+
+
+def test_parse_size():
+    assert parse_size("100") == 100
+    assert parse_size("1KB") == 1024
+    assert parse_size("1.5 mb") == 3 << 19
+    with pytest.raises(ValueError):
+        parse_size("ten megabytes")
+
+
+def test_run_benchmarks_reports_metrics(tmp_path):
+    results = run_benchmarks(
+        [parse_size("20KB")],
+        work_dir=tmp_path,
+        cases=["chunk_text", "iter_file_chunks", "chunk_views", "process_directory"],
+        isolate=False,
+        sample_dir=SAMPLE_DIR,
+    )
+
+    synthetic = {r["case"]: r for r in results if r["corpus"].startswith("synthetic")}
+    assert set(synthetic) == {
+        "chunk_text",
+        "iter_file_chunks",
+        "chunk_views",
+        "process_directory",
+    }
+    # Every chunker must agree on the number of chunks of the same corpus
+    assert synthetic["chunk_text"]["chunks"] == synthetic["iter_file_chunks"]["chunks"]
+    assert synthetic["chunk_text"]["chunks"] == synthetic["chunk_views"]["chunks"]
+    assert synthetic["chunk_text"]["size_bytes"] >= parse_size("20KB")
+    for result in results:
+        assert result["mb_per_s"] > 0
+        assert result["peak_rss_bytes"] > 0
+
+
+def test_compare_results_flags_regressions():
+    baseline = [
+        {
+            "case": "chunk_text",
+            "corpus": "c",
+            "mb_per_s": 10.0,
+            "peak_rss_bytes": 100,
+        }
+    ]
+    slower = [dict(baseline[0], mb_per_s=8.0)]
+    bigger = [dict(baseline[0], peak_rss_bytes=200)]
+
+    assert compare_results(baseline, baseline) == []
+    assert len(compare_results(baseline, slower)) == 1
+    assert len(compare_results(baseline, bigger)) == 1
+    assert compare_results(baseline, slower, tolerance=0.5) == []
+
+
+def test_run_vector_benchmarks_reports_recall_and_memory(tmp_path):
+    results = run_vector_benchmarks(
+        4000, 64, tmp_path, ["flat", "int8", "pq", "pq_rerank"], queries=20
+    )
+
+    by_case = {r["case"]: r for r in results}
+    assert by_case["flat"]["recall_at_k"] == 1.0
+    assert by_case["int8"]["index_bytes"] * 3 < by_case["flat"]["index_bytes"]
+    assert by_case["pq"]["index_bytes"] < by_case["int8"]["index_bytes"]
+    assert by_case["pq_rerank"]["recall_at_k"] > by_case["pq"]["recall_at_k"]
+
+
+def test_compare_results_flags_recall_drop():
+    baseline = [
+        {
+            "case": "pq",
+            "corpus": "vectors_10x4",
+            "queries_per_s": 100.0,
+            "recall_at_k": 0.9,
+            "index_bytes": 100,
+            "peak_rss_bytes": 100,
+        }
+    ]
+
+    assert compare_results(baseline, baseline) == []
+    assert len(compare_results(baseline, [dict(baseline[0], recall_at_k=0.85)])) == 1
+    assert len(compare_results(baseline, [dict(baseline[0], index_bytes=200)])) == 1
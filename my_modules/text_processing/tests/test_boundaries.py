@@ -0,0 +1,86 @@
+import pytest
+
+from woodshed.modules.text_processing.boundaries import (
+    HEADING,
+    PARAGRAPH,
+    SENTENCE,
+    build_boundary_index,
+    chunk_text_by_boundaries,
+    process_directory_by_boundaries,
+)
+
+DOCUMENT = (
+    "# Title\n\n"
+    "Dr. Watson met Mr. Holmes. They talked for hours! Was it late? Yes.\n\n"
+    "A second paragraph follows, e.g. with an example. It ends here.\n"
+    "## Section\n"
+    "The section body has one sentence."
+)
+
+
+def test_boundary_index_kinds():
+    index = build_boundary_index(DOCUMENT)
+    breaks = {
+        DOCUMENT[position:].split()[0]: strength
+        for position, strength in zip(index.positions, index.strengths)
+    }
+
+    # A heading is never separated from the line after it
+    assert breaks == {
+        "Dr.": PARAGRAPH,
+        "They": SENTENCE,
+        "Was": SENTENCE,
+        "Yes.": SENTENCE,
+        "A": PARAGRAPH,
+        "It": SENTENCE,
+        "##": HEADING,
+    }
+
+
+def test_chunks_end_at_boundaries():
+    chunks = chunk_text_by_boundaries(DOCUMENT, max_chars=90)
+
+    assert all(len(chunk) <= 90 for chunk in chunks)
+    assert all(chunk[-1] in ".!?" or chunk.startswith("#") for chunk in chunks)
+    # The heading starts a chunk rather than ending one
+    assert any(chunk.startswith("## Section") for chunk in chunks)
+    assert " ".join(" ".join(chunks).split()) == " ".join(DOCUMENT.split())
+
+
+def test_overlap_repeats_whole_sentences():
+    text = " ".join(f"Sentence number {i} is here." for i in range(20))
+    chunks = chunk_text_by_boundaries(text, max_chars=100, overlap_chars=40)
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        first_sentence = chunk.split(".")[0] + "."
+        assert first_sentence in previous
+        assert chunk.startswith("Sentence number")
+
+
+def test_text_without_boundaries_is_cut_between_words():
+    text = " ".join(["word"] * 100)
+    chunks = chunk_text_by_boundaries(text, max_chars=32)
+
+    assert all(len(chunk) <= 32 for chunk in chunks)
+    assert all(set(chunk.split()) == {"word"} for chunk in chunks)
+    assert sum(len(chunk.split()) for chunk in chunks) == 100
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        chunk_text_by_boundaries("text", max_chars=0)
+    with pytest.raises(ValueError):
+        chunk_text_by_boundaries("text", max_chars=10, overlap_chars=10)
+
+
+def test_process_directory_by_boundaries(tmp_path):
+    (tmp_path / "a.md").write_text(DOCUMENT)
+    (tmp_path / "b.txt").write_text("Only one sentence.")
+    (tmp_path / "c.json").write_text("{}")
+
+    chunks = process_directory_by_boundaries(tmp_path, max_chars=200)
+
+    assert list(chunks) == ["a.md", "b.txt"]
+    assert chunks["b.txt"] == ["Only one sentence."]
+    with pytest.raises(NotADirectoryError):
+        process_directory_by_boundaries(tmp_path / "a.md", max_chars=200)
@@ -0,0 +1,54 @@
+import pytest
+
+from woodshed.modules.text_processing.chunk_store import (
+    ChunkRecord,
+    JsonlChunkReader,
+    JsonlChunkWriter,
+    save_directory_chunks_to_jsonl,
+)
+from woodshed.modules.text_processing.enhanced_chunking import chunk_text
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    directory = tmp_path / "corpus"
+    directory.mkdir()
+    (directory / "a.txt").write_text("First  file,\nwith a few words in it.")
+    (directory / "b.txt").write_text("Ünïcode wörds\tand more words here too")
+    return directory
+
+
+def test_save_directory_chunks_to_jsonl_round_trip(corpus, tmp_path):
+    output_file = tmp_path / "chunks.jsonl"
+
+    counts = save_directory_chunks_to_jsonl(
+        corpus, output_file, chunk_size=4, overlap=1
+    )
+
+    reader = JsonlChunkReader(output_file)
+    assert reader.sources() == ["a.txt", "b.txt"]
+    for source in reader.sources():
+        text = (corpus / source).read_text()
+        records = reader.read_source(source)
+        assert len(records) == counts[source] == reader.count(source)
+        assert [r.text for r in records] == chunk_text(text, 4, 1)
+        assert [r.chunk_index for r in records] == list(range(len(records)))
+        for record in records:
+            assert " ".join(text[record.char_start : record.char_end].split()) == (
+                record.text
+            )
+            assert text.split()[record.word_start : record.word_end] == (
+                record.text.split()
+            )
+    assert len(list(reader)) == sum(counts.values())
+
+
+def test_writer_requires_contiguous_sources(tmp_path):
+    def record(source, index):
+        return ChunkRecord(source, index, "text", 0, 4, 0, 1)
+
+    writer = JsonlChunkWriter(tmp_path / "chunks.jsonl")
+    writer.write(record("a.txt", 0))
+    writer.write(record("b.txt", 0))
+    with pytest.raises(ValueError):
+        writer.write(record("a.txt", 1))
@@ -0,0 +1,65 @@
+import sys
+
+import pytest
+
+from woodshed.modules.text_processing.chunk_views import (
+    WHITESPACE_CHARS,
+    ChunkViewTable,
+)
+from woodshed.modules.text_processing.enhanced_chunking import chunk_text
+
+TEXT = (
+    "Plain words,\r\nwindows line endings\tand tabs. Non-breaking　"
+    "ideographic thin spaces, ünïcödé letters and a final word"
+)
+
+
+def test_whitespace_chars_match_str_isspace():
+    expected = {chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace()}
+    assert set(WHITESPACE_CHARS) == expected
+
+
+@pytest.mark.parametrize("chunk_size, overlap", [(3, 1), (5, 2), (50, 10)])
+def test_views_materialize_like_chunk_text(tmp_path, chunk_size, overlap):
+    source = tmp_path / "doc.txt"
+    source.write_bytes(TEXT.encode("utf-8"))
+
+    with ChunkViewTable() as table:
+        added = table.add_file(source, chunk_size, overlap)
+
+        assert added == len(table)
+        assert list(table.texts()) == chunk_text(TEXT, chunk_size, overlap)
+        assert table[0].source == source
+
+
+def test_add_directory_and_memory_footprint(tmp_path):
+    (tmp_path / "a.txt").write_text("one two three four five")
+    (tmp_path / "b.txt").write_text("")
+    (tmp_path / "c.txt").write_text("six seven eight")
+
+    table = ChunkViewTable()
+    assert table.add_directory(tmp_path, chunk_size=2, overlap=1) == 8
+    assert [view.source.name for view in table] == ["a.txt"] * 5 + ["c.txt"] * 3
+    assert table[6].text == "seven eight"
+    assert table.nbytes() <= 20 * len(table)
+
+    table.close()
+    assert table[0].text == "one two"
+    table.close()
+
+
+def test_only_recently_used_sources_stay_mapped(tmp_path):
+    for i in range(5):
+        (tmp_path / f"{i}.txt").write_text(f"file {i} has five words")
+
+    with ChunkViewTable(max_open_maps=2) as table:
+        table.add_directory(tmp_path, chunk_size=3, overlap=1)
+        assert len(table._maps) == 2
+
+        texts = list(table.texts())
+        assert len(table._maps) == 2
+    assert texts == [
+        chunk
+        for i in range(5)
+        for chunk in chunk_text(f"file {i} has five words", 3, 1)
+    ]
@@ -0,0 +1,35 @@
+import pytest
+
+from woodshed.modules.text_processing import chunking
+from woodshed.modules.text_processing.chunk_store import JsonlChunkReader
+from woodshed.modules.text_processing.config import config
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    monkeypatch.setitem(config.__dict__, "data_dir", data_dir)
+    monkeypatch.setitem(config.__dict__, "tmp_dir", tmp_path)
+    return data_dir, tmp_path
+
+
+def test_save_chunks_to_jsonl_round_trip(dirs):
+    data_dir, tmp_dir = dirs
+    text = "alpha beta gamma delta"
+    (data_dir / "doc.txt").write_text(text)
+
+    chunks = chunking.chunk_text("doc.txt", chunk_size=7)
+    chunking.save_chunks_to_jsonl(chunks, "chunks.jsonl", "doc.txt")
+
+    records = JsonlChunkReader(tmp_dir / "chunks.jsonl").read_source("doc.txt")
+    assert [r.text for r in records] == chunks == ["alpha b", "eta gam", "ma delt", "a"]
+    assert [r.chunk_index for r in records] == [0, 1, 2, 3]
+    assert all(text[r.char_start : r.char_end] == r.text for r in records)
+    # A word cut by a chunk boundary belongs to both chunks
+    assert [(r.word_start, r.word_end) for r in records] == [
+        (0, 2),
+        (1, 3),
+        (2, 4),
+        (3, 4),
+    ]
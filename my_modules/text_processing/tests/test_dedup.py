@@ -0,0 +1,66 @@
+import pytest
+
+from woodshed.modules.text_processing.dedup import (
+    deduplicate,
+    deduplicate_file_chunks,
+    normalize_text,
+)
+
+ARTICLE = (
+    "The city council voted on Tuesday to expand the bike lane network across "
+    "the downtown core, citing a sharp rise in cycling commuters over the past "
+    "two years and a string of collisions at busy intersections near the river."
+)
+FOOTER = (
+    "Subscribe to our newsletter for more stories like this one. All rights reserved."
+)
+OTHER = (
+    "Researchers at the university have mapped the migration routes of monarch "
+    "butterflies using tiny radio tags weighing less than a grain of rice."
+)
+
+
+def test_normalize_text():
+    assert normalize_text("  Hello,\n  WORLD!! ") == "hello world"
+
+
+def test_exact_and_near_duplicates_are_collapsed():
+    near_copy = ARTICLE.replace("river", "harbour")
+    texts = [ARTICLE, FOOTER, OTHER, FOOTER.upper(), near_copy]
+
+    result = deduplicate(texts)
+
+    assert result.kept == [0, 1, 2]
+    assert result.canonical == {3: 1, 4: 0}
+
+
+def test_different_texts_are_kept():
+    texts = [ARTICLE, OTHER, FOOTER]
+    assert deduplicate(texts).kept == [0, 1, 2]
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        deduplicate([ARTICLE], threshold=0)
+    with pytest.raises(ValueError):
+        deduplicate([ARTICLE], num_perm=64, bands=5)
+
+
+def test_deduplicate_file_chunks_maps_sources():
+    all_chunks = {"a.txt": [ARTICLE, FOOTER], "b.txt": [OTHER, FOOTER]}
+
+    kept, mapping = deduplicate_file_chunks(all_chunks)
+
+    assert kept == {"a.txt": [ARTICLE, FOOTER], "b.txt": [OTHER]}
+    assert mapping == {("b.txt", 1): ("a.txt", 1)}
+
+
+def test_deduplicate_file_chunks_maps_into_kept_chunks():
+    all_chunks = {"a.txt": [FOOTER, FOOTER, ARTICLE], "b.txt": [OTHER, ARTICLE]}
+
+    kept, mapping = deduplicate_file_chunks(all_chunks)
+
+    assert kept == {"a.txt": [FOOTER, ARTICLE], "b.txt": [OTHER]}
+    assert mapping == {("a.txt", 1): ("a.txt", 0), ("b.txt", 1): ("a.txt", 1)}
+    for (name, index), (kept_name, kept_index) in mapping.items():
+        assert kept[kept_name][kept_index] == all_chunks[name][index]
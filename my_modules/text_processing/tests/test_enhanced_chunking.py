@@ -6,6 +6,11 @@ import pytest
 
 from woodshed.modules.text_processing.enhanced_chunking import (
     chunk_text,
+    iter_chunks,
+    iter_directory_results,
+    iter_file_chunks,
+    iter_words,
+    process_directory,
     read_file_in_chunks,
 )
 
@@ -51,3 +56,56 @@ def test_chunk_text():
     assert chunks[1] == "test sentence for chunking text"
     assert chunks[2] == "chunking text into smaller pieces."
     assert chunks[3] == "smaller pieces."
+
+
+def test_iter_words_across_read_boundaries():
+    text = "  Words split\tacross   read\nboundaries end here  "
+    for size in range(1, len(text) + 1):
+        pieces = [text[i : i + size] for i in range(0, len(text), size)]
+        assert list(iter_words(pieces)) == text.split()
+
+
+@pytest.mark.parametrize(
+    "chunk_size, overlap", [(5, 2), (3, 1), (4, 3), (10, 2), (50, 10)]
+)
+def test_iter_chunks_matches_chunk_text(chunk_size, overlap):
+    text = "This is a test sentence for chunking text into smaller pieces. " * 3
+    pieces = [text[i : i + 7] for i in range(0, len(text), 7)]
+    assert list(iter_chunks(pieces, chunk_size, overlap)) == chunk_text(
+        text, chunk_size, overlap
+    )
+
+
+def test_iter_file_chunks_matches_chunk_text():
+    test_file = config.tmp_dir / "file1.txt"
+    streamed = list(iter_file_chunks(test_file, chunk_size=4, overlap=1, read_size=3))
+    assert streamed == chunk_text(test_file.read_text(), chunk_size=4, overlap=1)
+
+
+def test_chunk_text_rejects_overlap_not_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        chunk_text("some text", chunk_size=3, overlap=3)
+
+
+def test_process_directory_parallel_matches_sequential(tmp_path):
+    for i in range(6):
+        (tmp_path / f"doc{i}.txt").write_text(f"document {i} " + "word " * (i * 7))
+
+    sequential = process_directory(tmp_path, chunk_size=5, overlap=2)
+    parallel = process_directory(tmp_path, chunk_size=5, overlap=2, workers=3)
+
+    assert parallel == sequential
+    assert list(parallel) == sorted(parallel)
+
+
+def test_iter_directory_results_reports_errors_and_continues(tmp_path):
+    (tmp_path / "a.txt").write_text("good file with some words")
+    (tmp_path / "b.txt").write_bytes(b"\xff\xfe invalid utf-8")
+    (tmp_path / "c.txt").write_text("another good file")
+
+    results = list(iter_directory_results(tmp_path, chunk_size=3, overlap=1, workers=2))
+
+    assert [r.file_name for r in results] == ["a.txt", "b.txt", "c.txt"]
+    assert results[1].error is not None
+    assert results[0].chunks and results[2].chunks
+    assert all(r.elapsed >= 0 for r in results)
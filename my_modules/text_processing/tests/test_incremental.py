@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+from unittest import mock
+
+from woodshed.modules.text_processing.enhanced_chunking import process_directory
+from woodshed.modules.text_processing import incremental
+from woodshed.modules.text_processing.incremental import (
+    incremental_process_directory,
+    load_manifest,
+)
+
+
+def write_corpus(directory):
+    directory.mkdir()
+    (directory / "a.txt").write_text("alpha beta gamma delta epsilon zeta eta theta")
+    (directory / "b.txt").write_text("one two three four five six")
+    (directory / "c.txt").write_text("red green blue")
+
+
+def run(tmp_path, chunk_size=4, overlap=1):
+    return incremental_process_directory(
+        tmp_path / "corpus",
+        tmp_path / "chunks.json",
+        tmp_path / "chunks.manifest.json",
+        chunk_size,
+        overlap,
+    )
+
+
+def load_output(tmp_path):
+    with open(tmp_path / "chunks.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_first_run_chunks_everything(tmp_path):
+    write_corpus(tmp_path / "corpus")
+
+    summary = run(tmp_path)
+
+    assert summary.added == ["a.txt", "b.txt", "c.txt"]
+    assert load_output(tmp_path) == process_directory(tmp_path / "corpus", 4, 1)
+    manifest = load_manifest(tmp_path / "chunks.manifest.json")
+    assert manifest["b.txt"].chunk_count == 2
+    assert manifest["b.txt"].size == len("one two three four five six")
+
+
+def test_second_run_only_touches_changed_files(tmp_path):
+    corpus = tmp_path / "corpus"
+    write_corpus(corpus)
+    run(tmp_path)
+
+    (corpus / "b.txt").write_text("one two three four five six seven ünïcode")
+    (corpus / "c.txt").unlink()
+    (corpus / "d.txt").write_text("a brand new file")
+    # Same content with a new mtime must not count as a change
+    os.utime(corpus / "a.txt", ns=(0, 12345))
+
+    summary = run(tmp_path)
+
+    assert summary.unchanged == ["a.txt"]
+    assert summary.changed == ["b.txt"]
+    assert summary.added == ["d.txt"]
+    assert summary.removed == ["c.txt"]
+    assert load_output(tmp_path) == process_directory(corpus, 4, 1)
+    assert load_manifest(tmp_path / "chunks.manifest.json")["a.txt"].mtime_ns == 12345
+
+
+def test_changed_chunk_parameters_force_rechunk(tmp_path):
+    write_corpus(tmp_path / "corpus")
+    run(tmp_path)
+
+    summary = run(tmp_path, chunk_size=3, overlap=1)
+
+    assert summary.unchanged == []
+    assert load_output(tmp_path) == process_directory(tmp_path / "corpus", 3, 1)
+
+
+def test_crash_between_output_and_manifest_forces_rebuild(tmp_path):
+    corpus = tmp_path / "corpus"
+    write_corpus(corpus)
+    run(tmp_path)
+
+    # The new output is in place but the old manifest is left behind
+    (corpus / "a.txt").write_text("a much longer replacement text " * 3)
+    with mock.patch.object(incremental, "save_manifest", side_effect=OSError):
+        try:
+            run(tmp_path)
+        except OSError:
+            pass
+    (corpus / "c.txt").write_text("cyan magenta yellow black")
+
+    summary = run(tmp_path)
+
+    assert summary.unchanged == []
+    assert load_output(tmp_path) == process_directory(corpus, 4, 1)
+
+
+def test_rechunked_files_are_hashed_from_the_chunked_read(tmp_path):
+    corpus = tmp_path / "corpus"
+    write_corpus(corpus)
+
+    with mock.patch.object(incremental, "hash_file", side_effect=AssertionError):
+        run(tmp_path)
+
+    manifest = load_manifest(tmp_path / "chunks.manifest.json")
+    content = (corpus / "b.txt").read_bytes()
+    assert manifest["b.txt"].sha256 == hashlib.sha256(content).hexdigest()
+
+
+def test_edit_during_a_run_is_picked_up_by_the_next_run(tmp_path):
+    corpus = tmp_path / "corpus"
+    write_corpus(corpus)
+    iter_file_results = incremental.iter_file_results
+
+    def edit_after_chunking(*args, **kwargs):
+        for result in iter_file_results(*args, **kwargs):
+            if result.file_name == "b.txt":
+                # Same size, a later mtime
+                (corpus / "b.txt").write_text("six five four three two one")
+                stat = (corpus / "b.txt").stat()
+                os.utime(
+                    corpus / "b.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9)
+                )
+            yield result
+
+    with mock.patch.object(incremental, "iter_file_results", edit_after_chunking):
+        run(tmp_path)
+    summary = run(tmp_path)
+
+    assert summary.changed == ["b.txt"]
+    assert load_output(tmp_path) == process_directory(corpus, 4, 1)
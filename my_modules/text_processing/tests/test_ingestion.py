@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+
+from woodshed.modules.text_processing.enhanced_chunking import chunk_text
+from woodshed.modules.text_processing.ingestion import (
+    Section,
+    ingest_directory,
+    iter_document_chunks,
+    iter_section_chunks,
+    iter_sections,
+)
+
+SAMPLE_PDF = (
+    Path(__file__).resolve().parents[3] / "data" / "test" / "python-basics-intro.pdf"
+)
+
+MARKDOWN = """Intro line before any heading.
+
+# Guide
+Welcome to the guide.
+
+## Install
+Run the installer.
+
+Then restart.
+# Usage
+Use it daily.
+"""
+
+HTML = """<html><head><title>Hidden title</title><style>p {color: red}</style></head>
+<body><h1>Main &amp; only</h1><p>First paragraph.</p>
+<script>var hidden = 1;</script><div>Second <b>bold</b> block.</div>
+<h2>Details</h2><ul><li>One</li><li>Two</li></ul></body></html>"""
+
+
+def test_text_chunks_match_chunk_text(tmp_path):
+    text = "one two three\nfour five\n\nsix seven eight nine\nten"
+    source = tmp_path / "doc.txt"
+    source.write_text(text)
+
+    chunks = list(iter_document_chunks(source, 4, 1))
+
+    assert [chunk.text for chunk in chunks] == chunk_text(text, 4, 1)
+    assert [chunk.chunk_index for chunk in chunks] == list(range(len(chunks)))
+    assert all(chunk.source == "doc.txt" for chunk in chunks)
+
+
+def test_markdown_sections_carry_heading_path(tmp_path):
+    source = tmp_path / "guide.md"
+    source.write_text(MARKDOWN)
+
+    sections = [(s.text.split()[0], s.metadata) for s in iter_sections(source)]
+
+    assert sections == [
+        ("Intro", {}),
+        ("#", {"heading": "Guide"}),
+        ("##", {"heading": "Guide > Install"}),
+        ("Then", {"heading": "Guide > Install"}),
+        ("#", {"heading": "Usage"}),
+    ]
+
+
+def test_html_sections_skip_hidden_text(tmp_path):
+    source = tmp_path / "page.html"
+    source.write_text(HTML)
+
+    sections = list(iter_sections(source))
+
+    assert [s.text for s in sections] == [
+        "Main & only",
+        "First paragraph.",
+        "Second bold block.",
+        "Details",
+        "One",
+        "Two",
+    ]
+    assert sections[2].metadata == {"heading": "Main & only"}
+    assert sections[-1].metadata == {"heading": "Details"}
+
+
+def test_chunks_spanning_pages_record_page_end():
+    sections = [
+        Section("a b c", {"page": 1}),
+        Section("d e", {"page": 2}),
+        Section("f g h", {"page": 3}),
+    ]
+
+    chunks = list(iter_section_chunks(sections, 4, 1))
+
+    assert chunks[0] == Section("a b c d", {"page": 1, "page_end": 2})
+    assert chunks[1] == Section("d e f g", {"page": 2, "page_end": 3})
+    assert chunks[2] == Section("g h", {"page": 3})
+
+
+def test_pdf_sections_are_pages():
+    pytest.importorskip("pypdf")
+    sections = list(iter_sections(SAMPLE_PDF))
+
+    assert [s.metadata["page"] for s in sections] == list(range(1, len(sections) + 1))
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        iter_sections(tmp_path / "data.json")
+
+
+def test_ingest_directory_parallel_matches_sequential(tmp_path):
+    (tmp_path / "guide.md").write_text(MARKDOWN)
+    (tmp_path / "page.html").write_text(HTML)
+    (tmp_path / "notes.txt").write_text("plain words " * 50)
+    (tmp_path / "broken.txt").write_bytes(b"\xff\xfe not utf-8 \xff")
+    (tmp_path / "skipped.json").write_text("{}")
+
+    sequential = ingest_directory(tmp_path, 10, 2)
+    parallel = ingest_directory(tmp_path, 10, 2, workers=2)
+
+    assert sequential == parallel
+    assert list(sequential) == ["guide.md", "notes.txt", "page.html"]
+    assert sequential["page.html"][0].metadata == {"heading": "Main & only"}
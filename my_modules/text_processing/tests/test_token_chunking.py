@@ -0,0 +1,83 @@
+import pytest
+
+from woodshed.modules.text_processing.token_chunking import (
+    chunk_text_by_tokens,
+    chunk_texts_by_tokens,
+    get_tokenizer,
+    process_directory_by_tokens,
+    split_sentences,
+)
+
+TEXT = (
+    "The quick brown fox jumps over the lazy dog. It was not amused! "
+    "Why would anyone jump over a dog? Foxes are strange animals.\n\n"
+    "A new paragraph starts here. It has two sentences."
+)
+
+
+def test_get_tokenizer_is_shared():
+    assert get_tokenizer() is get_tokenizer("approx")
+    with pytest.raises(ValueError):
+        get_tokenizer("unknown")
+
+
+def test_split_sentences():
+    assert split_sentences(TEXT) == [
+        "The quick brown fox jumps over the lazy dog.",
+        "It was not amused!",
+        "Why would anyone jump over a dog?",
+        "Foxes are strange animals.",
+        "A new paragraph starts here.",
+        "It has two sentences.",
+    ]
+
+
+@pytest.mark.parametrize("max_tokens, overlap_tokens", [(12, 0), (20, 8), (40, 10)])
+def test_chunks_fit_budget_and_keep_whole_sentences(max_tokens, overlap_tokens):
+    tokenizer = get_tokenizer()
+    sentences = split_sentences(TEXT)
+
+    chunks = chunk_text_by_tokens(TEXT, max_tokens, overlap_tokens)
+
+    for chunk in chunks:
+        assert sum(tokenizer.count(s) for s in split_sentences(chunk)) <= max_tokens
+        assert all(s in sentences for s in split_sentences(chunk))
+    assert chunks[0].startswith(sentences[0])
+    assert chunks[-1].endswith(sentences[-1])
+
+
+def test_overlap_repeats_trailing_sentences():
+    chunks = chunk_text_by_tokens(TEXT, max_tokens=20, overlap_tokens=8)
+    first, second = split_sentences(chunks[0]), split_sentences(chunks[1])
+    assert first[-1] == second[0]
+
+    no_overlap = chunk_text_by_tokens(TEXT, max_tokens=20, overlap_tokens=0)
+    assert sum(len(split_sentences(c)) for c in no_overlap) == len(
+        split_sentences(TEXT)
+    )
+
+
+def test_long_sentence_is_split_to_fit():
+    sentence = " ".join(["word"] * 50) + "."
+    chunks = chunk_text_by_tokens(sentence, max_tokens=10, overlap_tokens=0)
+    assert len(chunks) > 1
+    assert all(get_tokenizer().count(c) <= 10 for c in chunks)
+    assert " ".join(chunks) == sentence
+
+
+def test_batched_chunking_matches_single_texts(tmp_path):
+    texts = [TEXT, "Short text.", TEXT.upper()]
+    assert chunk_texts_by_tokens(texts, 20, 5) == [
+        chunk_text_by_tokens(text, 20, 5) for text in texts
+    ]
+
+    for i, text in enumerate(texts):
+        (tmp_path / f"{i}.txt").write_text(text)
+    assert process_directory_by_tokens(tmp_path, 20, 5, batch_files=2) == {
+        f"{i}.txt": chunk_text_by_tokens(text, 20, 5) for i, text in enumerate(texts)
+    }
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        chunk_text_by_tokens(TEXT, max_tokens=10, overlap_tokens=10)
@@ -0,0 +1,338 @@
+"""
+Token-budget chunking.
+
+Chunks are measured in model tokens rather than words or characters: whole
+sentences are packed greedily up to ``max_tokens`` and consecutive chunks
+share up to ``overlap_tokens`` worth of trailing sentences. Every sentence is
+tokenized exactly once, so the overlapping regions are never re-tokenized.
+
+The tokenizer is pluggable. The default is a local BPE approximation that
+needs no network access or extra packages; ``get_tokenizer("tiktoken")`` uses
+the real OpenAI encoding when tiktoken is installed. Tokenizers are created
+once per process and reused across files.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+
+# Pre-tokenizer in the spirit of the GPT-2 pattern: contractions, words with
+# their leading space, numbers, punctuation runs and whitespace
+PRETOKEN_PATTERN = re.compile(
+    r"'(?:s|t|re|ve|m|ll|d)| ?[^\W\d_]+| ?\d{1,3}| ?(?:[^\s\w]|_)+|\s+(?!\S)|\s+"
+)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"')\]])\s+|\n\s*\n")
+
+APPROX_VOCAB_SIZE = 100_000
+APPROX_PIECE_CHARS = 4  # Average characters per BPE piece in long words
+APPROX_WHOLE_WORD_CHARS = 7  # Words up to this length are usually one token
+
+
+class Tokenizer(Protocol):
+    """Interface expected from tokenizers used for token-budget chunking."""
+
+    def encode(self, text: str) -> List[int]: ...
+
+    def count(self, text: str) -> int: ...
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]: ...
+
+
+class ApproxBPETokenizer:
+    """
+    Offline approximation of a byte-pair-encoding tokenizer.
+
+    Text is pre-tokenized like GPT-style tokenizers; short words count as a
+    single token and longer ones as one token per few characters. Counts are
+    an estimate; use TiktokenTokenizer where exact budgets matter. Ids are
+    stable hashes of the pieces, which is enough for counting and hashing,
+    not for feeding a model.
+    """
+
+    @staticmethod
+    def _split_pretoken(pretoken: str) -> List[str]:
+        """Split a pre-token into the pieces a BPE vocabulary would likely use."""
+        word = pretoken.lstrip(" ")
+        if len(word) <= APPROX_WHOLE_WORD_CHARS or not word.isalpha():
+            return [pretoken]
+        return [
+            pretoken[i : i + APPROX_PIECE_CHARS]
+            for i in range(0, len(pretoken), APPROX_PIECE_CHARS)
+        ]
+
+    def encode(self, text: str) -> List[int]:
+        """Return approximate token ids for a text."""
+        return [
+            zlib.crc32(piece.encode("utf-8")) % APPROX_VOCAB_SIZE
+            for pretoken in PRETOKEN_PATTERN.findall(text)
+            for piece in self._split_pretoken(pretoken)
+        ]
+
+    def count(self, text: str) -> int:
+        """Return the approximate number of tokens in a text."""
+        return sum(
+            len(self._split_pretoken(pretoken))
+            for pretoken in PRETOKEN_PATTERN.findall(text)
+        )
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        """Return the approximate number of tokens of each text."""
+        return [self.count(text) for text in texts]
+
+
+class TiktokenTokenizer:
+    """Exact OpenAI tokenizer backed by the optional tiktoken package."""
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        try:
+            import tiktoken
+        except ImportError as e:
+            raise ImportError(
+                "tiktoken is required for TiktokenTokenizer: pip install tiktoken"
+            ) from e
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def encode(self, text: str) -> List[int]:
+        """Return the token ids of a text."""
+        return self._encoding.encode(text, disallowed_special=())
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in a text."""
+        return len(self.encode(text))
+
+    def count_batch(self, texts: Sequence[str]) -> List[int]:
+        """Return the number of tokens of each text, encoding them in parallel."""
+        encoded = self._encoding.encode_batch(list(texts), disallowed_special=())
+        return [len(tokens) for tokens in encoded]
+
+
+def get_tokenizer(name: str = "approx") -> Tokenizer:
+    """
+    Get a shared tokenizer instance, creating it on first use.
+
+    Args:
+        name (str): "approx" for the offline approximation, "tiktoken" or
+            "tiktoken:<encoding name>" for an exact OpenAI encoding.
+
+    Returns:
+        Tokenizer: The tokenizer, reused by every later call with the same name.
+
+    Raises:
+        ValueError: If the tokenizer name is unknown.
+    """
+    return _load_tokenizer(name)
+
+
+@lru_cache(maxsize=None)
+def _load_tokenizer(name: str) -> Tokenizer:
+    """Create a tokenizer; cached so each one is loaded once per process."""
+    if name == "approx":
+        return ApproxBPETokenizer()
+    if name == "tiktoken":
+        return TiktokenTokenizer()
+    if name.startswith("tiktoken:"):
+        return TiktokenTokenizer(name.split(":", 1)[1])
+    raise ValueError(f"Unknown tokenizer: {name}")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences on sentence-ending punctuation and blank lines.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        List[str]: Non-empty sentences with surrounding whitespace removed.
+    """
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+
+def _split_long_sentence(
+    sentence: str, max_tokens: int, tokenizer: Tokenizer
+) -> List[Tuple[str, int]]:
+    """Break a sentence that exceeds the budget into word runs that fit it."""
+    words = sentence.split()
+    pieces = []
+    current: List[str] = []
+    current_tokens = 0
+    for word, tokens in zip(words, tokenizer.count_batch([" " + w for w in words])):
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append((" ".join(current), current_tokens))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append((" ".join(current), current_tokens))
+    return pieces
+
+
+def pack_sentences(
+    sentences: Sequence[str],
+    token_counts: Sequence[int],
+    max_tokens: int,
+    overlap_tokens: int,
+    tokenizer: Tokenizer,
+) -> List[str]:
+    """
+    Greedily pack pre-counted sentences into chunks within a token budget.
+
+    Args:
+        sentences (Sequence[str]): The sentences of one text, in order.
+        token_counts (Sequence[int]): The token count of each sentence.
+        max_tokens (int): Maximum tokens per chunk.
+        overlap_tokens (int): Maximum tokens of trailing sentences repeated at
+            the start of the next chunk.
+        tokenizer (Tokenizer): Used only to split sentences longer than max_tokens.
+
+    Returns:
+        List[str]: The chunks, each the space-joined sentences it contains.
+    """
+    units = []
+    for sentence, tokens in zip(sentences, token_counts):
+        if tokens > max_tokens:
+            units.extend(_split_long_sentence(sentence, max_tokens, tokenizer))
+        else:
+            units.append((sentence, tokens))
+
+    chunks = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    for unit in units:
+        if current and current_tokens + unit[1] > max_tokens:
+            chunks.append(" ".join(text for text, _ in current))
+            # Carry trailing sentences into the next chunk, never the whole chunk
+            carried: List[Tuple[str, int]] = []
+            carried_tokens = 0
+            for previous in reversed(current[1:]):
+                if carried_tokens + previous[1] > overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+            while carried and carried_tokens + unit[1] > max_tokens:
+                carried_tokens -= carried.pop(0)[1]
+            current, current_tokens = carried, carried_tokens
+        current.append(unit)
+        current_tokens += unit[1]
+    if current:
+        chunks.append(" ".join(text for text, _ in current))
+    return chunks
+
+
+def _validate_token_params(max_tokens: int, overlap_tokens: int) -> None:
+    """
+    Validate token chunking parameters.
+
+    Raises:
+        ValueError: If max_tokens is less than 1 or overlap_tokens is outside [0, max_tokens).
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be between 0 and max_tokens - 1")
+
+
+def chunk_text_by_tokens(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    tokenizer: Optional[Tokenizer] = None,
+) -> List[str]:
+    """
+    Split text into chunks of whole sentences that fit a token budget.
+
+    Args:
+        text (str): The input text to be chunked.
+        max_tokens (int): Maximum tokens per chunk.
+        overlap_tokens (int): Maximum tokens shared by consecutive chunks.
+        tokenizer (Tokenizer, optional): Tokenizer to count with; defaults to
+            the shared offline approximation.
+
+    Returns:
+        List[str]: A list of text chunks.
+
+    Raises:
+        ValueError: If max_tokens or overlap_tokens is invalid.
+    """
+    return chunk_texts_by_tokens([text], max_tokens, overlap_tokens, tokenizer)[0]
+
+
+def chunk_texts_by_tokens(
+    texts: Sequence[str],
+    max_tokens: int,
+    overlap_tokens: int,
+    tokenizer: Optional[Tokenizer] = None,
+) -> List[List[str]]:
+    """
+    Token-chunk several texts, counting all of their sentences in one batch.
+
+    Args:
+        texts (Sequence[str]): The input texts.
+        max_tokens (int): Maximum tokens per chunk.
+        overlap_tokens (int): Maximum tokens shared by consecutive chunks.
+        tokenizer (Tokenizer, optional): Tokenizer to count with; defaults to
+            the shared offline approximation.
+
+    Returns:
+        List[List[str]]: The chunks of each text, in input order.
+
+    Raises:
+        ValueError: If max_tokens or overlap_tokens is invalid.
+    """
+    _validate_token_params(max_tokens, overlap_tokens)
+    tokenizer = tokenizer or get_tokenizer()
+
+    sentences_per_text = [split_sentences(text) for text in texts]
+    all_counts = tokenizer.count_batch(
+        [s for sentences in sentences_per_text for s in sentences]
+    )
+
+    results = []
+    position = 0
+    for sentences in sentences_per_text:
+        counts = all_counts[position : position + len(sentences)]
+        position += len(sentences)
+        results.append(
+            pack_sentences(sentences, counts, max_tokens, overlap_tokens, tokenizer)
+        )
+    return results
+
+
+def process_directory_by_tokens(
+    directory: Path,
+    max_tokens: int,
+    overlap_tokens: int,
+    tokenizer: Optional[Tokenizer] = None,
+    batch_files: int = 64,
+) -> Dict[str, List[str]]:
+    """
+    Token-chunk all text files in a directory, tokenizing files in batches.
+
+    Args:
+        directory (Path): Path to the directory containing text files.
+        max_tokens (int): Maximum tokens per chunk.
+        overlap_tokens (int): Maximum tokens shared by consecutive chunks.
+        tokenizer (Tokenizer, optional): Tokenizer to count with; defaults to
+            the shared offline approximation.
+        batch_files (int): Number of files whose sentences are counted together.
+
+    Returns:
+        Dict[str, List[str]]: A dictionary with filenames as keys and lists of chunks as values.
+
+    Raises:
+        NotADirectoryError: If the specified path is not a directory.
+        ValueError: If max_tokens or overlap_tokens is invalid.
+    """
+    if not directory.is_dir():
+        raise NotADirectoryError(f"{directory} is not a valid directory")
+
+    file_paths = sorted(directory.glob("*.txt"))
+    all_chunks = {}
+    for start in range(0, len(file_paths), batch_files):
+        batch = file_paths[start : start + batch_files]
+        texts = [path.read_text(encoding="utf-8") for path in batch]
+        chunked = chunk_texts_by_tokens(texts, max_tokens, overlap_tokens, tokenizer)
+        all_chunks.update((path.name, chunks) for path, chunks in zip(batch, chunked))
+    return all_chunks
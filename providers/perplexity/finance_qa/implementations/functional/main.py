@@ -23,11 +23,13 @@ import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from woodshed.modules.questions.answer_cache import AnswerCache
+
 # Load environment variables
 load_dotenv()
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
@@ -35,6 +37,10 @@ PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 # Define output directory
 OUTPUT_DIR = Path("data/output/perplexity_finance")
 
+# Answers are reused for a day; the cache is shared with the questions module
+ANSWER_CACHE_PATH = Path("data/cache/answers.sqlite3")
+MODEL_NAME = "llama-3.1-sonar-large-128k-online"
+
 
 def create_progress_animation() -> Tuple[Callable, Callable]:
     """
@@ -90,7 +96,7 @@ async def generate_related_questions(client: OpenAI, question: str) -> List[str]
     ]
 
     response = client.chat.completions.create(
-        model="llama-3.1-sonar-large-128k-online",
+        model=MODEL_NAME,
         messages=messages,
     )
 
@@ -101,30 +107,40 @@ async def generate_related_questions(client: OpenAI, question: str) -> List[str]
     ]
 
 
-async def get_answer(client: OpenAI, question: str) -> Dict:
-    """Get an answer for a specific question using the Perplexity API."""
+async def get_answer(
+    client: OpenAI, question: str, cache: Optional[AnswerCache] = None
+) -> Dict:
+    """Get an answer for a specific question, from the cache if it was asked before."""
+    system_prompt = (
+        "You are a financial expert. Provide a clear, concise, and accurate "
+        "answer to the following finance-related question."
+    )
+    if cache is not None:
+        answer = cache.get(MODEL_NAME, "financial expert", system_prompt, question)
+        if answer is not None:
+            return {"question": question, "answer": answer}
+
     messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a financial expert. Provide a clear, concise, and accurate "
-                "answer to the following finance-related question."
-            ),
-        },
+        {"role": "system", "content": system_prompt},
         {"role": "user", "content": question},
     ]
 
     response = client.chat.completions.create(
-        model="llama-3.1-sonar-large-128k-online",
+        model=MODEL_NAME,
         messages=messages,
     )
 
-    return {"question": question, "answer": response.choices[0].message.content}
+    answer = response.choices[0].message.content
+    if cache is not None:
+        cache.put(MODEL_NAME, "financial expert", system_prompt, question, answer)
+    return {"question": question, "answer": answer}
 
 
-async def process_questions(client: OpenAI, questions: List[str]) -> List[Dict]:
+async def process_questions(
+    client: OpenAI, questions: List[str], cache: Optional[AnswerCache] = None
+) -> List[Dict]:
     """Process multiple questions in parallel using the Perplexity API."""
-    tasks = [get_answer(client, question) for question in questions]
+    tasks = [get_answer(client, question, cache) for question in questions]
     return await asyncio.gather(*tasks)
 
 
@@ -200,6 +216,7 @@ async def process_single_question(
     question: str,
     start_animation: Callable,
     stop_animation: Callable,
+    cache: Optional[AnswerCache] = None,
 ):
     """Process a single question through the Q&A pipeline."""
     try:
@@ -211,7 +228,7 @@ async def process_single_question(
         # Process questions with progress indicator
         task = start_animation("Fetching answers")
         all_questions = [question] + related_questions
-        results = await process_questions(client, all_questions)
+        results = await process_questions(client, all_questions, cache)
         stop_animation(task, len("Fetching answers"))
 
         display_results(results)
@@ -225,6 +242,7 @@ async def process_single_question(
 
 async def main():
     """Main function to run the Finance Q&A application."""
+    cache = None
     try:
         # Ensure output directory exists
         ensure_output_directory(OUTPUT_DIR)
@@ -237,6 +255,9 @@ async def main():
         # Create progress animation functions
         start_animation, stop_animation = create_progress_animation()
 
+        # Reuse answers to questions asked before
+        cache = AnswerCache(ANSWER_CACHE_PATH)
+
         print("Welcome to the Finance Q&A Assistant!")
         print(f"Results will be saved to: {OUTPUT_DIR}")
 
@@ -249,7 +270,7 @@ async def main():
                 continue
 
             await process_single_question(
-                client, question, start_animation, stop_animation
+                client, question, start_animation, stop_animation, cache
             )
 
             if not get_user_choice():
@@ -261,6 +282,8 @@ async def main():
     except Exception as e:
         print(f"\nAn unexpected error occurred: {str(e)}")
     finally:
+        if cache is not None:
+            cache.close()
         print("\nApplication terminated.")
         exit(0)
 
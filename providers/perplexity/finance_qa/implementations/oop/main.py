@@ -24,11 +24,13 @@ import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from woodshed.modules.questions.answer_cache import AnswerCache
+
 # Load environment variables
 load_dotenv()
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
@@ -36,6 +38,10 @@ PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 # Define output directory
 OUTPUT_DIR = Path("data/output/perplexity_finance")
 
+# Answers are reused for a day; the cache is shared with the questions module
+ANSWER_CACHE_PATH = Path("data/cache/answers.sqlite3")
+MODEL_NAME = "llama-3.1-sonar-large-128k-online"
+
 
 class ProgressIndicator:
     """
@@ -112,7 +118,7 @@ async def generate_related_questions(question: str) -> List[str]:
 
     client = OpenAI(api_key=PERPLEXITY_API_KEY, base_url="https://api.perplexity.ai")
     response = client.chat.completions.create(
-        model="llama-3.1-sonar-large-128k-online",
+        model=MODEL_NAME,
         messages=messages,
     )
 
@@ -126,24 +132,34 @@ async def generate_related_questions(question: str) -> List[str]:
     return questions
 
 
-async def get_answer(client: OpenAI, question: str) -> Dict:
+async def get_answer(
+    client: OpenAI, question: str, cache: Optional[AnswerCache] = None
+) -> Dict:
     """
     Get an answer for a specific question using the Perplexity API.
 
     Args:
         client (OpenAI): The OpenAI client instance
         question (str): The question to be answered
+        cache (AnswerCache, optional): Answers questions asked before without
+            calling the API
 
     Returns:
         Dict: A dictionary containing the question and its answer
     """
+    system_prompt = (
+        "You are a financial expert. Provide a clear, concise, and accurate "
+        "answer to the following finance-related question."
+    )
+    if cache is not None:
+        answer = cache.get(MODEL_NAME, "financial expert", system_prompt, question)
+        if answer is not None:
+            return {"question": question, "answer": answer}
+
     messages = [
         {
             "role": "system",
-            "content": (
-                "You are a financial expert. Provide a clear, concise, and accurate "
-                "answer to the following finance-related question."
-            ),
+            "content": system_prompt,
         },
         {
             "role": "user",
@@ -152,25 +168,31 @@ async def get_answer(client: OpenAI, question: str) -> Dict:
     ]
 
     response = client.chat.completions.create(
-        model="llama-3.1-sonar-large-128k-online",
+        model=MODEL_NAME,
         messages=messages,
     )
 
-    return {"question": question, "answer": response.choices[0].message.content}
+    answer = response.choices[0].message.content
+    if cache is not None:
+        cache.put(MODEL_NAME, "financial expert", system_prompt, question, answer)
+    return {"question": question, "answer": answer}
 
 
-async def process_questions(questions: List[str]) -> List[Dict]:
+async def process_questions(
+    questions: List[str], cache: Optional[AnswerCache] = None
+) -> List[Dict]:
     """
     Process multiple questions in parallel using the Perplexity API.
 
     Args:
         questions (List[str]): List of questions to be processed
+        cache (AnswerCache, optional): Cache of answers to questions asked before
 
     Returns:
         List[Dict]: List of dictionaries containing questions and their answers
     """
     client = OpenAI(api_key=PERPLEXITY_API_KEY, base_url="https://api.perplexity.ai")
-    tasks = [get_answer(client, question) for question in questions]
+    tasks = [get_answer(client, question, cache) for question in questions]
     results = await asyncio.gather(*tasks)
     return results
 
@@ -265,12 +287,13 @@ def get_user_choice() -> bool:
         print("Please enter 'yes' or 'no'")
 
 
-async def process_single_question(question: str):
+async def process_single_question(question: str, cache: Optional[AnswerCache] = None):
     """
     Process a single question through the Q&A pipeline.
 
     Args:
         question (str): The user's question
+        cache (AnswerCache, optional): Cache of answers to questions asked before
     """
     try:
         # Generate related questions with progress indicator
@@ -283,7 +306,7 @@ async def process_single_question(question: str):
         progress = ProgressIndicator("Fetching answers")
         progress.start()
         all_questions = [question] + related_questions
-        results = await process_questions(all_questions)
+        results = await process_questions(all_questions, cache)
         progress.stop()
 
         display_results(results)
@@ -298,10 +321,14 @@ async def main():
     """
     Main function to run the Finance Q&A application.
     """
+    cache = None
     try:
         # Ensure output directory exists
         ensure_output_directory()
 
+        # Reuse answers to questions asked before
+        cache = AnswerCache(ANSWER_CACHE_PATH)
+
         print("Welcome to the Finance Q&A Assistant!")
         print(f"Results will be saved to: {OUTPUT_DIR}")
 
@@ -313,7 +340,7 @@ async def main():
                 print("Please enter a valid question.")
                 continue
 
-            await process_single_question(question)
+            await process_single_question(question, cache)
 
             if not get_user_choice():
                 print("\nThank you for using the Finance Q&A Assistant!")
@@ -324,6 +351,8 @@ async def main():
     except Exception as e:
         print(f"\nAn unexpected error occurred: {str(e)}")
     finally:
+        if cache is not None:
+            cache.close()
         print("\nApplication terminated.")
         exit(0)
 